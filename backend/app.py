@@ -6,7 +6,7 @@ import sys
 import django
 from django.conf import settings
 from django.core.management import execute_from_command_line
-from django.http import JsonResponse, HttpResponse
+from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.urls import path, include
@@ -16,6 +16,9 @@ import pandas as pd
 from datetime import datetime, timedelta
 import uuid
 
+# Make the backend package (used by the middleware below) importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 # Django Settings Configuration
 if not settings.configured:
     settings.configure(
@@ -30,6 +33,7 @@ if not settings.configured:
         ],
         MIDDLEWARE=[
             'corsheaders.middleware.CorsMiddleware',
+            'backend.middleware.APICompressionMiddleware',
             'django.middleware.common.CommonMiddleware',
             'django.contrib.sessions.middleware.SessionMiddleware',
             'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -49,6 +53,10 @@ if not settings.configured:
 
 django.setup()
 
+from backend.chart_storage import hydrate_chart
+from backend.diet_generator import parse_duration
+from backend.responses import json_response
+
 # Import our models after Django setup
 try:
     from .models import Patient, FoodItem, DietChart, DoshaAssessment
@@ -104,11 +112,11 @@ def patients_api(request):
                 'allergies': patient.allergies,
                 'occupation': patient.occupation,
                 'exercise_frequency': patient.exercise_frequency,
-                'last_visit': patient.last_visit.strftime('%Y-%m-%d'),
-                'created_at': patient.created_at.strftime('%Y-%m-%d')
+                'last_visit': patient.last_visit,
+                'created_at': patient.created_at.date()
             })
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'data': patients_data,
             'total': len(patients_data)
@@ -173,18 +181,18 @@ def patients_api(request):
                 'allergies': patient.allergies,
                 'occupation': patient.occupation,
                 'exercise_frequency': patient.exercise_frequency,
-                'last_visit': patient.last_visit.strftime('%Y-%m-%d'),
-                'created_at': patient.created_at.strftime('%Y-%m-%d')
+                'last_visit': patient.last_visit,
+                'created_at': patient.created_at.date()
             }
             
-            return JsonResponse({
+            return json_response({
                 'success': True,
                 'message': 'Patient added successfully',
                 'data': patient_data
             })
             
         except Exception as e:
-            return JsonResponse({
+            return json_response({
                 'success': False,
                 'error': str(e)
             }, status=400)
@@ -232,7 +240,7 @@ def food_database_api(request):
             'description': food.description
         })
     
-    return JsonResponse({
+    return json_response({
         'success': True,
         'data': foods_data,
         'total': len(foods_data)
@@ -247,18 +255,18 @@ def diet_charts_api(request):
         charts_data = []
         for chart in charts:
             charts_data.append({
-                'id': str(chart.id),
+                'id': chart.id,
                 'patient_id': chart.patient.id,
                 'patient_name': chart.patient.name,
                 'goal': chart.goal,
                 'target_calories': chart.target_calories,
                 'duration': chart.duration,
-                'chart_data': chart.chart_data,
-                'created_at': chart.created_at.strftime('%Y-%m-%d'),
+                'chart_data': hydrate_chart(chart.chart_data),
+                'created_at': chart.created_at.date(),
                 'status': chart.status
             })
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'data': charts_data,
             'total': len(charts_data)
@@ -278,30 +286,30 @@ def diet_charts_api(request):
                 patient=patient,
                 goal=data.get('goal', 'Maintenance'),
                 target_calories=data.get('target_calories', 2000),
-                duration=data.get('duration', 30),
+                duration=parse_duration(data.get('duration')),
                 chart_data=diet_chart
             )
             
             chart_data = {
-                'id': str(new_chart.id),
+                'id': new_chart.id,
                 'patient_id': patient_id,
                 'patient_name': patient.name,
                 'goal': new_chart.goal,
                 'target_calories': new_chart.target_calories,
                 'duration': new_chart.duration,
                 'chart_data': new_chart.chart_data,
-                'created_at': new_chart.created_at.strftime('%Y-%m-%d'),
+                'created_at': new_chart.created_at.date(),
                 'status': new_chart.status
             }
             
-            return JsonResponse({
+            return json_response({
                 'success': True,
                 'message': 'Diet chart generated successfully',
                 'data': chart_data
             })
             
         except Exception as e:
-            return JsonResponse({
+            return json_response({
                 'success': False,
                 'error': str(e)
             }, status=400)
@@ -325,7 +333,7 @@ def dosha_assessment_api(request):
         )
         
         assessment_data = {
-            'id': str(assessment.id),
+            'id': assessment.id,
             'patient_id': assessment.patient_id,
             'assessment_type': assessment.assessment_type,
             'responses': assessment.responses,
@@ -333,17 +341,17 @@ def dosha_assessment_api(request):
             'dosha_scores': assessment.dosha_scores,
             'confidence': assessment.confidence,
             'recommendations': assessment.recommendations,
-            'created_at': assessment.created_at.strftime('%Y-%m-%d %H:%M:%S')
+            'created_at': assessment.created_at
         }
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'message': 'Dosha assessment saved successfully',
             'data': assessment_data
         })
         
     except Exception as e:
-        return JsonResponse({
+        return json_response({
             'success': False,
             'error': str(e)
         }, status=400)
@@ -483,10 +491,10 @@ def analytics_api(request):
         recent_patients.append({
             'id': patient.id,
             'name': patient.name,
-            'created_at': patient.created_at.strftime('%Y-%m-%d')
+            'created_at': patient.created_at.date()
         })
     
-    return JsonResponse({
+    return json_response({
         'success': True,
         'data': {
             'total_patients': total_patients,
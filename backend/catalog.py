@@ -0,0 +1,303 @@
+"""
+NutriVeda in-memory food catalog
+
+Diet-chart generation reads foods from a process-local snapshot of the
+FoodItem table instead of querying per meal and category. The snapshot keeps
+foods grouped by category and their Ayurvedic properties encoded as a numeric
+feature matrix (``backend.food_features``), so compatibility with any
+constitution - single or dual dosha - is scored for every food at once. Each
+constitution's ranking is computed on first use and kept with the snapshot.
+It is rebuilt only when the ``fooditem`` table version (see TableVersion)
+changes.
+
+The version is re-checked at most every FOOD_CATALOG_CHECK_INTERVAL seconds,
+so generating a chart normally runs without any queries. Writes made in this
+process invalidate the snapshot immediately through model signals.
+
+When FOOD_CATALOG_ARTIFACT_DIR is set, a snapshot is loaded from the
+columnar artifact of its version (``backend.catalog_artifact``), which is
+memory-mapped and shared by all processes on the machine: foods are decoded
+from it on access, and only row lookups are built per process. The first
+process to load a version from the database writes that artifact. An
+artifact is only used for the database state it was written from (see
+current_stamp), since version numbers repeat across databases.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import namedtuple
+from collections.abc import Mapping
+
+import numpy as np
+from django.conf import settings
+from django.db import connections
+from django.db.models.signals import post_delete, post_save
+
+from .catalog_artifact import FoodTable, read_artifact, write_artifact
+from .food_features import FoodFeatures, parse_constitution
+from .food_import import NUTRIENT_VECTOR_COLUMNS
+from .models import FoodItem, TableVersion
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECK_INTERVAL = 5.0
+
+FOOD_FIELDS = (
+    'id', 'name', 'category', 'calories', 'serving', 'protein', 'carbs', 'fat', 'fiber',
+    'virya', 'digestion', 'rasa', 'guna', 'vata_effect', 'pitta_effect', 'kapha_effect',
+    'season', 'benefits', 'precautions', 'description', 'nutrient_vector',
+)
+
+# Columns of FoodCatalog.nutrients, per serving
+NUTRIENT_FIELDS = ('calories', 'protein', 'carbs', 'fat', 'fiber')
+
+# Lightweight stand-in for FoodItem with the same attribute names
+FoodRecord = namedtuple('FoodRecord', FOOD_FIELDS)
+
+
+def nutrient_vector_row(food):
+    """The full nutrient vector of a food with NaN for unknown values
+
+    Foods without a stored vector (added by hand rather than from Book1.csv)
+    fill in the columns they have named fields for.
+    """
+    vector = food.nutrient_vector or ()
+    if len(vector) == len(NUTRIENT_VECTOR_COLUMNS):
+        return [np.nan if value is None else value for value in vector]
+    return [
+        getattr(food, column) if column in NUTRIENT_FIELDS else np.nan
+        for column in NUTRIENT_VECTOR_COLUMNS
+    ]
+
+
+def food_column(foods, column):
+    """The values of ``column`` for every food in ``foods`` (a FoodTable or records)"""
+    if isinstance(foods, FoodTable):
+        return foods.column(column)
+    return [getattr(food, column) for food in foods]
+
+
+class FoodLookup(Mapping):
+    """Read-only ``key -> food`` view of ``foods`` through a ``key -> row`` dict"""
+
+    def __init__(self, foods, rows):
+        self.foods = foods
+        self.rows = rows
+
+    def __getitem__(self, key):
+        return self.foods[self.rows[key]]
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class FoodCatalog:
+    """Immutable snapshot of the food table at one table version
+
+    ``source`` identifies the database state the foods were read from (see
+    current_stamp). ``foods`` is a FoodTable or an iterable of records;
+    ``arrays`` optionally supplies the matrices already built, as read from a
+    catalog artifact.
+    """
+
+    def __init__(self, foods, version, arrays=None, source=None):
+        self.version = version
+        self.source = source
+        self.foods = foods if isinstance(foods, FoodTable) else tuple(foods)
+        self.index = {food_id: row for row, food_id in enumerate(food_column(self.foods, 'id'))}
+        self.by_id = FoodLookup(self.foods, self.index)
+        self.by_name = FoodLookup(
+            self.foods, {name: row for row, name in enumerate(food_column(self.foods, 'name'))}
+        )
+
+        if arrays is None:
+            arrays = {
+                # One row per food, NUTRIENT_FIELDS columns
+                'nutrients': np.array(
+                    [[getattr(food, field) or 0 for field in NUTRIENT_FIELDS] for food in self.foods],
+                    dtype=float
+                ).reshape(len(self.foods), len(NUTRIENT_FIELDS)),
+                # One row per food, NUTRIENT_VECTOR_COLUMNS columns, NaN where unknown
+                'nutrient_vectors': np.array(
+                    [nutrient_vector_row(food) for food in self.foods], dtype=float
+                ).reshape(len(self.foods), len(NUTRIENT_VECTOR_COLUMNS)),
+                'features': None,
+            }
+        self.nutrients = arrays['nutrients']
+        self.nutrient_vectors = arrays['nutrient_vectors']
+        self.features = FoodFeatures(self.foods, arrays['features'])
+
+        rows = {}
+        for row, category in enumerate(food_column(self.foods, 'category')):
+            rows.setdefault(category.lower(), []).append(row)
+        self.category_rows = {category: np.array(items) for category, items in rows.items()}
+
+        # Keyed by the constitution's doshas; filled on first use
+        self._scores = {}
+        self._ranked = {}
+
+    def arrays(self):
+        """The catalog matrices by name, as stored in a catalog artifact"""
+        return {
+            'nutrients': self.nutrients,
+            'nutrient_vectors': self.nutrient_vectors,
+            'features': self.features.matrix,
+        }
+
+    def category(self, category):
+        """All foods in ``category`` (case-insensitive)"""
+        return tuple(self.foods[row] for row in self.category_rows.get(category.lower(), ()))
+
+    def ranked(self, category, constitution):
+        """Foods in ``category`` suited to ``constitution``, best first"""
+        doshas = parse_constitution(constitution)
+        ranked = self._ranked.get(doshas)
+        if ranked is None:
+            ranked = self._ranked[doshas] = self._rank(doshas)
+        return ranked.get(category.lower(), ())
+
+    def _rank(self, doshas):
+        """category -> compatible foods sorted by score (ties keep catalog order)
+
+        A category with no compatible foods falls back to all of its foods. An
+        unknown constitution treats every food as compatible with score 0.
+        """
+        constitution = '-'.join(doshas)
+        scores = self.constitution_scores(constitution)
+        compatible = self.features.compatible(constitution)
+        ranked = {}
+        for category, rows in self.category_rows.items():
+            chosen = rows[compatible[rows]]
+            if not len(chosen):
+                chosen = rows
+            order = chosen[np.argsort(-scores[chosen], kind='stable')]
+            ranked[category] = tuple(self.foods[row] for row in order)
+        return ranked
+
+    def rotation(self, category, constitution, size, day=0, days=1, exclude=()):
+        """``size`` foods of ``category`` for day ``day`` of a ``days``-day rotation
+
+        Successive days take successive windows of the ranked list, so a food
+        comes back at most every ``days`` days when the category is big enough.
+        Day 0 always gets the best-ranked foods. Food IDs in ``exclude`` are
+        skipped.
+        """
+        ranked = self.ranked(category, constitution)
+        if exclude:
+            ranked = tuple(food for food in ranked if food.id not in exclude)
+        pool = ranked[:size * days]
+        if not pool:
+            return pool
+        start = ((day % days) * size) % len(pool)
+        return (pool[start:] + pool[:start])[:size]
+
+    def constitution_scores(self, constitution):
+        """Compatibility score of every food (catalog row order) for ``constitution``"""
+        doshas = parse_constitution(constitution)
+        scores = self._scores.get(doshas)
+        if scores is None:
+            scores = self._scores[doshas] = self.features.scores(constitution)
+        return scores
+
+
+def load_catalog(version=None, source=None):
+    """Build a FoodCatalog from the catalog artifact of ``version``, or from the database
+
+    The artifact is used only if it was written from ``source``.
+    """
+    if version is None:
+        version, source = current_stamp()
+    directory = artifact_directory()
+    if directory:
+        stored = read_artifact(directory, version, source, FoodRecord)
+        if stored is not None:
+            foods, arrays = stored
+            return FoodCatalog(foods, version, arrays, source)
+
+    rows = FoodItem.objects.order_by('id').values_list(*FOOD_FIELDS)
+    catalog = FoodCatalog((FoodRecord(*row) for row in rows), version, source=source)
+    if directory and catalog.foods:
+        export_catalog(catalog, directory)
+    return catalog
+
+
+def artifact_directory():
+    """FOOD_CATALOG_ARTIFACT_DIR, or None when catalog artifacts are disabled"""
+    return getattr(settings, 'FOOD_CATALOG_ARTIFACT_DIR', None) or None
+
+
+def export_catalog(catalog, directory):
+    """Write the artifact of ``catalog`` for other processes; a failure only costs sharing"""
+    try:
+        return write_artifact(
+            directory, catalog.version, catalog.source, FOOD_FIELDS, catalog.foods, catalog.arrays()
+        )
+    except OSError:
+        logger.warning('Could not write the food catalog artifact to %s', directory, exc_info=True)
+        return None
+
+
+def current_stamp():
+    """``(version, source)`` of the ``fooditem`` table
+
+    ``source`` is a digest of the database and the time the table reached
+    that version, so the same version number in another database, or in one
+    recreated from scratch, has a different source.
+    """
+    row = TableVersion.objects.filter(table='fooditem').values_list('version', 'updated_at').first()
+    return table_stamp(*(row or (0, None)))
+
+
+def table_stamp(version, updated_at):
+    """``(version, source)`` for a ``fooditem`` TableVersion row's version and updated_at"""
+    database = connections[TableVersion.objects.db]
+    stamp = updated_at.isoformat() if updated_at else ''
+    identity = f"{database.vendor}:{database.settings_dict['NAME']}:{stamp}"
+    return version, hashlib.md5(identity.encode('utf-8')).hexdigest()[:12]
+
+
+_lock = threading.Lock()
+_catalog = None
+_checked_at = 0.0
+
+
+def get_catalog(stamp=None):
+    """Return the process-wide catalog, rebuilding it if the food table changed
+
+    ``stamp`` is a ``(version, source)`` already read from the database (see
+    table_stamp); the catalog is then brought to it at once instead of after
+    the check interval, so it matches validators computed from that row.
+    """
+    global _catalog, _checked_at
+    interval = getattr(settings, 'FOOD_CATALOG_CHECK_INTERVAL', DEFAULT_CHECK_INTERVAL)
+    now = time.monotonic()
+    catalog = _catalog
+    if catalog is not None:
+        if stamp is not None and (catalog.version, catalog.source) == stamp:
+            return catalog
+        if stamp is None and now - _checked_at < interval:
+            return catalog
+
+    with _lock:
+        if stamp is None and _catalog is not None and now - _checked_at < interval:
+            return _catalog
+        version, source = stamp or current_stamp()
+        if _catalog is None or (_catalog.version, _catalog.source) != (version, source):
+            _catalog = load_catalog(version, source)
+        _checked_at = now
+        return _catalog
+
+
+def invalidate_catalog(**kwargs):
+    """Force the next get_catalog() call to re-check the table version"""
+    global _checked_at
+    _checked_at = 0.0
+
+
+post_save.connect(invalidate_catalog, sender=FoodItem, dispatch_uid='food_catalog_save')
+post_delete.connect(invalidate_catalog, sender=FoodItem, dispatch_uid='food_catalog_delete')
@@ -0,0 +1,221 @@
+"""
+NutriVeda food catalog artifact
+
+A columnar, read-only export of the food catalog (``backend.catalog``) that
+worker processes memory-map instead of each querying and decoding the food
+table. The matrices the catalog works on - nutrients, the full nutrient
+vectors and the feature matrix - are loaded straight from the file with
+``numpy.load(mmap_mode='r')``, so every worker on a machine shares one copy
+through the page cache.
+
+An artifact is a directory ``<FOOD_CATALOG_ARTIFACT_DIR>/v<version>`` for one
+``fooditem`` table version, holding:
+
+* ``manifest.json`` - format, table version, source (the database state the
+  foods were read from, see ``backend.catalog.current_stamp``), food count
+  and field names;
+* ``<column>.npy`` - one array per numeric food column (INTEGER_COLUMNS,
+  FLOAT_COLUMNS);
+* ``<column>.codes.npy`` - indexes into the string table for text columns and
+  JSON-encoded list columns (JSON_COLUMNS);
+* ``strings.npy`` / ``string_offsets.npy`` - the string table: every distinct
+  value once, UTF-8 encoded back to back;
+* ``<name>.array.npy`` - the catalog matrices (ARRAYS).
+
+Every file is memory-mapped on read. Foods are not decoded up front: a
+FoodTable builds a food record from the mapped columns and the string table
+when it is accessed, so the food data itself stays in the shared page cache
+rather than being copied into each worker's heap.
+
+Artifacts are written to a temporary directory and renamed into place, so a
+reader never sees a partial one and concurrent writers do not clash. One
+written from another database at the same version is rejected on read and
+replaced on the next write.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+ARTIFACT_FORMAT = 2
+INTEGER_COLUMNS = ('id', 'calories')
+FLOAT_COLUMNS = ('protein', 'carbs', 'fat', 'fiber')
+JSON_COLUMNS = ('season', 'benefits', 'precautions', 'nutrient_vector')
+# FoodCatalog matrices stored as they are
+ARRAYS = ('nutrients', 'nutrient_vectors', 'features')
+
+
+def artifact_path(directory, version):
+    """Directory of the artifact for table version ``version``"""
+    return Path(directory) / f'v{version}'
+
+
+def read_manifest(path):
+    """The manifest of the artifact at ``path``, or None if it cannot be read"""
+    try:
+        return json.loads((Path(path) / 'manifest.json').read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _encode(column, value):
+    if column in JSON_COLUMNS:
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    return '' if value is None else str(value)
+
+
+def _decode(column, text):
+    return json.loads(text) if column in JSON_COLUMNS else text
+
+
+def write_artifact(directory, version, source, fields, foods, arrays, replace=False):
+    """Write ``foods`` (records with ``fields``) and ``arrays`` as the artifact of ``version``
+
+    Returns the artifact path. An artifact that already exists for the
+    version and ``source`` is kept unless ``replace`` is true; one from
+    another source is always replaced. Processes that mapped the replaced
+    files keep reading them until they reload. ``foods`` must not be empty
+    (empty files cannot be memory-mapped).
+    """
+    target = artifact_path(directory, version)
+    if target.exists() and not replace:
+        manifest = read_manifest(target)
+        if manifest is not None and manifest.get('source') == source:
+            return target
+        replace = True
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix='.building-', dir=directory))
+    try:
+        # mkdtemp is private to its owner; workers may run as another user
+        os.chmod(staging, 0o755)
+        strings = {}
+        for column in fields:
+            values = [getattr(food, column) for food in foods]
+            if column in INTEGER_COLUMNS:
+                np.save(staging / f'{column}.npy', np.array(values, dtype=np.int64))
+            elif column in FLOAT_COLUMNS:
+                np.save(staging / f'{column}.npy', np.array(values, dtype=np.float64))
+            else:
+                codes = [strings.setdefault(_encode(column, value), len(strings)) for value in values]
+                np.save(staging / f'{column}.codes.npy', np.array(codes, dtype=np.int32))
+
+        encoded = [text.encode('utf-8') for text in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in encoded], out=offsets[1:])
+        np.save(staging / 'strings.npy', np.frombuffer(b''.join(encoded), dtype=np.uint8))
+        np.save(staging / 'string_offsets.npy', offsets)
+
+        for name in ARRAYS:
+            np.save(staging / f'{name}.array.npy', np.ascontiguousarray(arrays[name]))
+        (staging / 'manifest.json').write_text(json.dumps({
+            'format': ARTIFACT_FORMAT,
+            'version': version,
+            'source': source,
+            'count': len(foods),
+            'fields': list(fields),
+        }))
+        if replace and target.exists():
+            retired = Path(tempfile.mkdtemp(prefix='.retired-', dir=directory))
+            os.rename(target, retired / target.name)
+            os.rename(staging, target)
+            shutil.rmtree(retired, ignore_errors=True)
+        else:
+            os.rename(staging, target)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+        # Another process finished the same artifact first
+        manifest = read_manifest(target)
+        if manifest is not None and manifest.get('source') == source:
+            return target
+        raise
+    return target
+
+
+class FoodTable:
+    """Read-only sequence of the foods of an artifact, built from its mapped columns
+
+    ``table[row]`` decodes one food as a ``record`` namedtuple on each access;
+    nothing is kept, so JSON values are never shared between callers.
+    ``column(name)`` returns one column for all foods.
+    """
+
+    def __init__(self, path, record, count):
+        self.record = record
+        self.count = count
+        self._blob = _load(path, 'strings.npy')
+        self._offsets = _load(path, 'string_offsets.npy')
+        self._columns = {}
+        for column in record._fields:
+            if column in INTEGER_COLUMNS or column in FLOAT_COLUMNS:
+                self._columns[column] = _load(path, f'{column}.npy')
+            else:
+                self._columns[column] = _load(path, f'{column}.codes.npy')
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, row):
+        row = range(self.count)[row]
+        return self.record(*(self._value(column, row) for column in self.record._fields))
+
+    def __iter__(self):
+        return (self[row] for row in range(self.count))
+
+    def column(self, column):
+        """The values of ``column`` for every food, in table order"""
+        values = self._columns[column]
+        if column in INTEGER_COLUMNS or column in FLOAT_COLUMNS:
+            return values.tolist()
+        # One pass over a copy of the string table instead of a slice per food
+        blob, offsets = bytes(self._blob), self._offsets.tolist()
+        return [
+            _decode(column, blob[offsets[code]:offsets[code + 1]].decode('utf-8')) for code in values.tolist()
+        ]
+
+    def _value(self, column, row):
+        value = self._columns[column][row]
+        if column in INTEGER_COLUMNS or column in FLOAT_COLUMNS:
+            return value.item()
+        return self._string(column, value)
+
+    def _string(self, column, code):
+        start, end = self._offsets[code], self._offsets[code + 1]
+        return _decode(column, bytes(self._blob[start:end]).decode('utf-8'))
+
+
+def _load(path, name):
+    return np.load(path / name, mmap_mode='r')
+
+
+def read_artifact(directory, version, source, record):
+    """``(foods, arrays)`` from the artifact of ``version``, or None if there is none
+
+    An artifact written from another ``source`` counts as none. Foods are a
+    FoodTable of ``record`` namedtuples; the arrays are read-only memory maps.
+    """
+    path = artifact_path(directory, version)
+    manifest = read_manifest(path)
+    if (manifest is None or manifest.get('format') != ARTIFACT_FORMAT or manifest.get('version') != version
+            or manifest.get('source') != source or manifest.get('fields') != list(record._fields)):
+        return None
+    foods = FoodTable(path, record, manifest['count'])
+    arrays = {name: _load(path, f'{name}.array.npy') for name in ARRAYS}
+    return foods, arrays
+
+
+def prune_artifacts(directory, keep_version):
+    """Remove the artifacts of versions other than ``keep_version``; returns how many"""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return 0
+    keep = artifact_path(directory, keep_version).name
+    removed = 0
+    for path in directory.iterdir():
+        if path.is_dir() and path.name.startswith('v') and path.name != keep:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
@@ -0,0 +1,99 @@
+"""
+NutriVeda diet-chart template cache
+
+The meal plan of a generated chart depends only on the normalized
+constitution, the calorie target, the goal and the food catalog. Plans are
+therefore memoized per process in an LRU with a time-to-live, keyed by:
+
+* constitution (lowercase);
+* calorie band - the target rounded to DIET_CHART_CALORIE_BAND kcal;
+* goal (lowercase);
+* portion engine;
+* rotation day;
+* catalog version.
+
+Patient-specific fields (name, raw prakriti, requested calories, dates) are
+applied to a copy of the cached template. Settings, all optional:
+
+* DIET_CHART_CACHE_ENTRIES - templates kept per process (0 disables the cache)
+* DIET_CHART_CACHE_TTL     - seconds a template stays valid
+* DIET_CHART_CALORIE_BAND  - calorie band width in kcal (1 = exact targets)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL = 3600
+DEFAULT_CALORIE_BAND = 50
+
+
+class ChartTemplateCache:
+    """Thread-safe LRU of chart templates whose entries expire after ``ttl`` seconds"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, template):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), template)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_template_cache():
+    """The process-wide template cache, created from settings on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ChartTemplateCache(
+                    getattr(settings, 'DIET_CHART_CACHE_ENTRIES', DEFAULT_MAX_ENTRIES),
+                    getattr(settings, 'DIET_CHART_CACHE_TTL', DEFAULT_TTL),
+                )
+    return _cache
+
+
+def calorie_band(calories):
+    """Round a calorie target to its band (DIET_CHART_CALORIE_BAND)"""
+    band = max(int(getattr(settings, 'DIET_CHART_CALORIE_BAND', DEFAULT_CALORIE_BAND)), 1)
+    return max(int(round(calories / band)) * band, band)
+
+
+def copy_meals(meals):
+    """Copy cached meals deep enough that callers may edit meals and items"""
+    return [{**meal, 'items': [dict(item) for item in meal['items']]} for meal in meals]
@@ -0,0 +1,149 @@
+"""
+NutriVeda diet-chart editing
+
+Changes one meal of a stored chart without rebuilding the rest of the plan:
+
+* regenerating a meal builds it again for the chart's constitution, calorie
+  band, goal and the day's rotation window, leaving out the meal's current
+  foods so the result differs;
+* swapping an item replaces it with another food of the same category (or a
+  given food) at about the same calories.
+
+Meal and day totals change by the difference in the meal's calories. On
+SQLite only the edited meal (and the snapshots of foods new to the chart) is
+written, with JSON_SET on its path in the stored chart_data; charts in the original format, days not generated yet and
+other databases save the whole field once.
+"""
+
+import json
+
+from django.db import connection, transaction
+from django.db.models import F, Func, JSONField, Value
+
+from .catalog import get_catalog
+from .chart_storage import compact_chart, compact_meal, hydrate_chart, meal_path
+from .diet_generator import build_meal, extend_plan, fill_plan_fields, food_item, normalize_constitution
+from .models import DietChart, TableVersion
+from .optimizer import MAX_SERVINGS, MIN_SERVINGS
+
+
+class ChartEditError(ValueError):
+    """Raised for an edit that cannot be applied to the chart"""
+
+
+class JSONSet(Func):
+    """SQLite ``JSON_SET(column, path, JSON(value), ...)`` for ``(path, value_json)`` pairs"""
+    function = 'JSON_SET'
+    output_field = JSONField()
+
+    def __init__(self, expression, *pairs):
+        arguments = []
+        for path, value_json in pairs:
+            arguments += [Value(path), Func(Value(value_json), function='JSON')]
+        super().__init__(expression, *arguments)
+
+
+def find_meal(meals, meal_name):
+    """Index of the meal called ``meal_name`` (case-insensitive)"""
+    wanted = (meal_name or '').strip().lower()
+    for index, meal in enumerate(meals):
+        if meal.get('name', '').lower() == wanted:
+            return index
+    names = ', '.join(meal.get('name', '') for meal in meals)
+    raise ChartEditError(f"No meal named '{meal_name}'; choose from {names}")
+
+
+def meal_food_ids(meal, catalog):
+    """Catalog IDs of the foods in ``meal``"""
+    foods = (catalog.by_name.get(item.get('name')) for item in meal['items'])
+    return {food.id for food in foods if food is not None}
+
+
+def regenerate_meal(chart_data, day, meal, exclude, catalog):
+    """A new version of ``meal`` for plan day ``day`` without its current foods"""
+    return build_meal(
+        normalize_constitution(chart_data.get('constitution')), meal['name'], chart_data['calories'],
+        chart_data['goal'], catalog, day - 1, meal_food_ids(meal, catalog) | exclude
+    )
+
+
+def swap_item(chart_data, meal, index, food_id, exclude, catalog):
+    """``meal`` with item ``index`` replaced by ``food_id`` or the best-ranked alternative"""
+    if not 0 <= index < len(meal['items']):
+        raise ChartEditError(f"item must be between 0 and {len(meal['items']) - 1}")
+    old_item = meal['items'][index]
+    if food_id is not None:
+        food = catalog.by_id.get(food_id)
+        if food is None:
+            raise ChartEditError(f'Food {food_id} not found')
+    else:
+        if not old_item.get('category'):
+            raise ChartEditError('Pass food_id to replace an item without a category')
+        taken = meal_food_ids(meal, catalog) | exclude
+        constitution = normalize_constitution(chart_data.get('constitution'))
+        food = next(
+            (food for food in catalog.ranked(old_item['category'], constitution) if food.id not in taken), None
+        )
+        if food is None:
+            raise ChartEditError(f"No other {old_item['category']} foods to swap in")
+
+    # Keep the item's calories within the serving bounds
+    servings = old_item.get('calories', 0) / food.calories if food.calories else 1.0
+    servings = round(min(max(servings, MIN_SERVINGS), MAX_SERVINGS), 1)
+    items = list(meal['items'])
+    items[index] = food_item(food, servings)
+    return {**meal, 'items': items, 'totalCalories': sum(item.get('calories', 0) for item in items)}
+
+
+def edit_meal(chart, day, meal_name, item=None, food_id=None, exclude=(), catalog=None):
+    """Regenerate a meal of ``chart`` (or swap one of its items when ``item`` is given)
+
+    Saves the change and returns ``(plan_day, meal)`` in full form.
+    Charts from the original generator are completed with
+    ``fill_plan_fields``, so ``chart`` needs the columns it reads.
+    """
+    if not 1 <= day <= chart.duration:
+        raise ChartEditError(f'day must be between 1 and {chart.duration}')
+    catalog = catalog or get_catalog()
+    exclude = set(exclude)
+    stored = chart.chart_data
+    chart_data = hydrate_chart(stored)
+    filled = fill_plan_fields(chart_data, chart)
+    extended = extend_plan(chart_data, day, day, chart.duration, catalog) or filled
+
+    plan_day = chart_data['days'][day - 1]
+    index = find_meal(plan_day['meals'], meal_name)
+    old_meal = plan_day['meals'][index]
+    # In charts written before compact storage, meals is a separate copy of day 1
+    linked = day == 1 and chart_data.get('meals') == plan_day['meals']
+
+    if item is None:
+        meal = regenerate_meal(chart_data, day, old_meal, exclude, catalog)
+    else:
+        meal = swap_item(chart_data, old_meal, item, food_id, exclude, catalog)
+    plan_day['meals'][index] = meal
+    # Meals of the original generator call it total_calories
+    change = meal['totalCalories'] - old_meal.get('totalCalories', old_meal.get('total_calories', 0))
+    plan_day['totalCalories'] = plan_day.get('totalCalories', 0) + change
+    if linked:
+        chart_data['meals'] = plan_day['meals']
+        if 'total_calories' in chart_data:
+            chart_data['total_calories'] += change
+
+    path = None if extended else meal_path(stored, day - 1, index)
+    if path and connection.vendor == 'sqlite':
+        foods = dict(stored['foods'])
+        changes = [(path, json.dumps(compact_meal(meal, catalog, foods)))]
+        # Snapshots of the foods new to the chart
+        changes += [
+            (f'$.foods."{key}"', json.dumps(snapshot))
+            for key, snapshot in foods.items() if key not in stored['foods']
+        ]
+        with transaction.atomic():
+            DietChart.objects.filter(id=chart.id).update(chart_data=JSONSet(F('chart_data'), *changes))
+            # update() does not send post_save
+            TableVersion.bump('dietchart')
+    else:
+        chart.chart_data = compact_chart(chart_data, catalog)
+        chart.save(update_fields=['chart_data'])
+    return plan_day, meal
@@ -0,0 +1,262 @@
+"""
+NutriVeda compact diet-chart storage
+
+Generated charts repeat the food name, quantity text, virya, rasa and category
+of every item, and the same guideline lists, across thousands of rows.
+``DietChart.chart_data`` therefore stores a compact form that refers to foods
+by ID, and reads hydrate it back to the full chart:
+
+* ``foods`` maps each food ID used in the chart to its SNAPSHOT_FIELDS as
+  they were when the chart was stored, so editing or deleting a food later
+  does not change charts already issued;
+* a catalog item is ``[food_id, servings]``, or
+  ``[food_id, servings, calories]`` when its calories are not
+  ``int(food.calories * servings)`` (greedy portions are not rounded);
+* a fallback item of a standard meal is ``['fallback', index, calories]``,
+  ``index`` into that meal's ``get_fallback_foods`` list;
+* a meal is ``[slot, items]``, ``slot`` indexing MEAL_SLOTS; its total is
+  derived;
+* ``days`` holds one list of meals per plan day (null for days not generated
+  yet); day numbers, dates and totals are derived from the chart date;
+* ``meals`` is left out when it is day 1;
+* ``guidelineSet`` names the constitution whose guideline, seasonal and
+  avoid lists the chart uses.
+
+Only parts that hydrate back exactly are compacted; anything else (fallback
+items, edited meals, custom guidelines) is kept as it was. Hydration needs no
+catalog. Rows without the ``v`` marker are in the original format and are
+returned unchanged.
+"""
+
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from .catalog import get_catalog
+from .diet_generator import (
+    BEDTIME_MEAL, MEAL_STRUCTURE, food_item, get_constitution_guidelines, get_fallback_foods,
+    get_foods_to_avoid, get_seasonal_recommendations, normalize_constitution,
+)
+
+COMPACT_VERSION = 3
+
+# Food values a chart item is built from (see diet_generator.food_item)
+SNAPSHOT_FIELDS = ('name', 'serving', 'calories', 'virya', 'rasa', 'category')
+FoodSnapshot = namedtuple('FoodSnapshot', SNAPSHOT_FIELDS)
+
+# (name, time) of the standard meals, in chart order
+MEAL_SLOTS = tuple((meal['name'], meal['time']) for meal in MEAL_STRUCTURE) + (
+    (BEDTIME_MEAL['name'], BEDTIME_MEAL['time']),
+)
+SLOT_INDEX = {slot: index for index, slot in enumerate(MEAL_SLOTS)}
+
+FALLBACK = 'fallback'
+
+GUIDELINE_KEYS = ('guidelines', 'seasonalRecommendations', 'doNotEat')
+GUIDELINE_SETS = ('vata', 'pitta', 'kapha', 'default')
+
+MEAL_KEYS = {'name', 'time', 'items', 'totalCalories'}
+DAY_KEYS = {'day', 'date', 'meals', 'totalCalories'}
+
+
+def is_compact(chart_data):
+    return isinstance(chart_data, dict) and chart_data.get('v') == COMPACT_VERSION
+
+
+def guideline_set(name):
+    """The guideline lists of a guideline set"""
+    return {
+        'guidelines': get_constitution_guidelines(name),
+        'seasonalRecommendations': get_seasonal_recommendations(),
+        'doNotEat': get_foods_to_avoid(name),
+    }
+
+
+def compact_chart(chart_data, catalog=None):
+    """Return the storage form of a full chart (a no-op for compact or unknown data)"""
+    if is_compact(chart_data) or not isinstance(chart_data, dict) or 'meals' not in chart_data:
+        return chart_data
+    try:
+        start_date = datetime.strptime(chart_data['date'], '%Y-%m-%d').date()
+    except (KeyError, TypeError, ValueError):
+        return chart_data
+    catalog = catalog or get_catalog()
+
+    compact = {'v': COMPACT_VERSION}
+    foods = {}
+    guidelines = _match_guideline_set(chart_data)
+    days = chart_data.get('days')
+    for key, value in chart_data.items():
+        if key == 'meals':
+            if not days or not isinstance(days[0], dict) or value != days[0].get('meals'):
+                compact['meals'] = [compact_meal(meal, catalog, foods) for meal in value]
+        elif key == 'days':
+            compact['days'] = _compact_days(value, start_date, catalog, foods)
+        elif guidelines and key in GUIDELINE_KEYS:
+            compact.setdefault('guidelineSet', guidelines)
+        else:
+            compact[key] = value
+    # Always present, so a meal edit can add foods to it in place
+    compact['foods'] = foods
+    return compact
+
+
+def hydrate_chart(chart_data):
+    """Return the full chart for stored ``chart_data`` (either format)"""
+    if not is_compact(chart_data):
+        return chart_data
+    foods = chart_data['foods']
+    start_date = datetime.strptime(chart_data['date'], '%Y-%m-%d').date()
+
+    data = {}
+    for key, value in chart_data.items():
+        if key in ('v', 'foods'):
+            continue
+        elif key == 'meals':
+            data['meals'] = [hydrate_meal(meal, foods) for meal in value]
+        elif key == 'days':
+            data['days'] = [_hydrate_day(day, index, start_date, foods) for index, day in enumerate(value)]
+        elif key == 'guidelineSet':
+            data.update(guideline_set(value))
+        else:
+            data[key] = value
+    if 'meals' not in data:
+        data['meals'] = data['days'][0]['meals']
+    return data
+
+
+def _match_guideline_set(chart_data):
+    """Name of the guideline set the chart's lists come from, or None"""
+    if any(key not in chart_data for key in GUIDELINE_KEYS):
+        return None
+    own = normalize_constitution(chart_data.get('constitution'))
+    for name in dict.fromkeys((own,) + GUIDELINE_SETS):
+        lists = guideline_set(name)
+        if all(chart_data[key] == lists[key] for key in GUIDELINE_KEYS):
+            return name
+    return None
+
+
+def _compact_days(days, start_date, catalog, foods):
+    compact = []
+    for index, day in enumerate(days):
+        if not isinstance(day, dict) or not isinstance(day.get('meals'), list):
+            compact.append(day)
+            continue
+        meals = [compact_meal(meal, catalog, foods) for meal in day['meals']]
+        derived = _day_fields(index, start_date, day['meals'])
+        if set(day) == DAY_KEYS and all(day[key] == value for key, value in derived.items()):
+            compact.append(meals)
+        else:
+            compact.append({**day, 'meals': meals})
+    return compact
+
+
+def _hydrate_day(day, index, start_date, foods):
+    if not isinstance(day, list):
+        if isinstance(day, dict) and isinstance(day.get('meals'), list):
+            return {**day, 'meals': [hydrate_meal(meal, foods) for meal in day['meals']]}
+        return day
+    meals = [hydrate_meal(meal, foods) for meal in day]
+    return {**_day_fields(index, start_date, meals), 'meals': meals}
+
+
+def _day_fields(index, start_date, meals):
+    return {
+        'day': index + 1,
+        'date': (start_date + timedelta(days=index)).strftime('%Y-%m-%d'),
+        'totalCalories': sum(meal.get('totalCalories', 0) for meal in meals if isinstance(meal, dict)),
+    }
+
+
+def meal_path(chart_data, day_index, meal_index):
+    """JSON path of a plan meal in compact ``chart_data``, or None
+
+    Only days stored as bare meal lists qualify: their totals are derived, so
+    rewriting the meal alone keeps the day consistent.
+    """
+    if not is_compact(chart_data):
+        return None
+    days = chart_data.get('days') or []
+    if day_index >= len(days) or not isinstance(days[day_index], list):
+        return None
+    if meal_index >= len(days[day_index]):
+        return None
+    return f'$.days[{day_index}][{meal_index}]'
+
+
+def compact_meal(meal, catalog, foods):
+    """Storage form of one meal; adds the snapshots of its foods to ``foods``
+
+    ``foods`` is the chart's food snapshot map. An item whose food already has
+    a different snapshot there is kept in full.
+    """
+    if not isinstance(meal, dict) or not isinstance(meal.get('items'), list):
+        return meal
+    slot = SLOT_INDEX.get((meal.get('name'), meal.get('time')))
+    if (slot is not None and set(meal) == MEAL_KEYS
+            and meal['totalCalories'] == _total_calories(meal['items'])):
+        return [slot, [_compact_item(item, catalog, foods, meal['name']) for item in meal['items']]]
+    return {**meal, 'items': [_compact_item(item, catalog, foods) for item in meal['items']]}
+
+
+def hydrate_meal(meal, foods):
+    """Full form of one stored meal, ``foods`` being the chart's food snapshot map"""
+    if not isinstance(meal, list):
+        if isinstance(meal, dict) and isinstance(meal.get('items'), list):
+            return {**meal, 'items': [_hydrate_item(item, foods) for item in meal['items']]}
+        return meal
+    slot, items = meal
+    name, time = MEAL_SLOTS[slot]
+    items = [_hydrate_item(item, foods, name) for item in items]
+    return {'name': name, 'time': time, 'items': items, 'totalCalories': _total_calories(items)}
+
+
+def _total_calories(items):
+    return sum(item.get('calories', 0) if isinstance(item, dict) else 0 for item in items)
+
+
+def _compact_item(item, catalog, foods, meal_name=None):
+    if not isinstance(item, dict):
+        return item
+    food = catalog.by_name.get(item.get('name'))
+    if food is None:
+        return _compact_fallback_item(item, meal_name)
+    try:
+        servings = float(str(item['quantity']).split(' ', 1)[0])
+    except (KeyError, ValueError):
+        return item
+    if servings.is_integer():
+        servings = int(servings)
+
+    entry = [food.id, servings]
+    hydrated = food_item(food, servings)
+    if hydrated['calories'] != item.get('calories'):
+        entry.append(item.get('calories'))
+        hydrated['calories'] = item.get('calories')
+    if hydrated != item:
+        return item
+    snapshot = [getattr(food, field) for field in SNAPSHOT_FIELDS]
+    if foods.setdefault(str(food.id), snapshot) != snapshot:
+        return item
+    return entry
+
+
+def _compact_fallback_item(item, meal_name):
+    if meal_name is None:
+        return item
+    for index, fallback in enumerate(get_fallback_foods(meal_name, 0)):
+        if {**fallback, 'calories': item.get('calories')} == item:
+            return [FALLBACK, index, item['calories']]
+    return item
+
+
+def _hydrate_item(entry, foods, meal_name=None):
+    if not isinstance(entry, list):
+        return entry
+    if entry[0] == FALLBACK:
+        return {**get_fallback_foods(meal_name, 0)[entry[1]], 'calories': entry[2]}
+    food_id, servings = entry[0], entry[1]
+    item = food_item(FoodSnapshot(*foods[str(food_id)]), servings)
+    if len(entry) > 2:
+        item['calories'] = entry[2]
+    return item
@@ -0,0 +1,215 @@
+"""
+NutriVeda cohort diet-chart generation
+
+Generates diet charts for a whole group of patients - a list of IDs or a
+patient filter - in one call. Chart generation is spread over a process pool:
+
+* workers receive the food catalog once, through the pool initializer;
+  with the ``fork`` start method it is shared copy-on-write. Callers in a
+  multi-threaded process (the job worker) pass ``safe_start_method()``
+  instead, since forking while other threads hold locks can deadlock;
+* patients are sent in chunks of COHORT_CHUNK_SIZE;
+* workers only compute chart data, already in its compact storage form
+  (``backend.chart_storage``), and never touch the database;
+* the parent writes the charts with ``bulk_create`` in one transaction.
+
+COHORT_WORKERS sets the default pool size; 1 generates in-process.
+"""
+
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .catalog import get_catalog
+from .chart_storage import compact_chart
+from .diet_generator import generate_database_driven_diet_chart
+from .models import DietChart, Patient, TableVersion
+from .search import filter_patients, filter_patients_by_text
+
+DEFAULT_CHUNK_SIZE = 50
+DEFAULT_BATCH_SIZE = 500
+
+# The patient fields chart generation reads
+CohortPatient = namedtuple('CohortPatient', ('id', 'name', 'prakriti'))
+
+
+class CohortError(ValueError):
+    """Raised for an invalid cohort request"""
+
+
+def max_worker_count():
+    """COHORT_WORKERS, or up to 4 by CPU count when it is 0 or unset"""
+    return getattr(settings, 'COHORT_WORKERS', None) or min(4, os.cpu_count() or 1)
+
+
+def get_worker_count(value=None):
+    """Resolve the pool size from the request, at most max_worker_count()
+
+    Requests come from API clients, so they can ask for fewer processes than
+    the configured pool but never more.
+    """
+    if value in (None, ''):
+        return max_worker_count()
+    try:
+        workers = int(value)
+    except (TypeError, ValueError) as e:
+        raise CohortError('workers must be an integer') from e
+    if workers < 1:
+        raise CohortError('workers must be positive')
+    return min(workers, max_worker_count())
+
+
+def safe_start_method():
+    """A pool start method that does not fork the calling process: forkserver or spawn"""
+    return 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def get_chunk_size():
+    """Patients per task sent to a worker (COHORT_CHUNK_SIZE)"""
+    return getattr(settings, 'COHORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def select_cohort(patient_ids=None, filters=None):
+    """Return ``(patients, missing_ids)`` for a list of IDs and/or a patient filter
+
+    ``filters`` accepts the search filters: q, prakriti, gender, age_min and
+    age_max. At least one ID or filter is required.
+    """
+    filters = {key: value for key, value in (filters or {}).items() if value not in (None, '')}
+    if not patient_ids and not filters:
+        raise CohortError('Provide patient_ids or a filter')
+    unknown = set(filters) - {'q', 'prakriti', 'gender', 'age_min', 'age_max'}
+    if unknown:
+        raise CohortError(f"Unknown filters: {', '.join(sorted(unknown))}")
+
+    patients = Patient.objects.all()
+    if patient_ids:
+        try:
+            patient_ids = [int(patient_id) for patient_id in patient_ids]
+        except (TypeError, ValueError) as e:
+            raise CohortError('patient_ids must be integers') from e
+        patients = patients.filter(id__in=patient_ids)
+    try:
+        patients = filter_patients(
+            filter_patients_by_text(patients, filters.get('q', '')),
+            filters.get('prakriti', ''), filters.get('gender', ''),
+            int(filters['age_min']) if 'age_min' in filters else None,
+            int(filters['age_max']) if 'age_max' in filters else None,
+        )
+    except (TypeError, ValueError) as e:
+        raise CohortError('age_min and age_max must be integers') from e
+
+    cohort = [CohortPatient(*row) for row in patients.order_by('id').values_list(*CohortPatient._fields)]
+    missing = []
+    if patient_ids:
+        found = {patient.id for patient in cohort}
+        missing = [patient_id for patient_id in dict.fromkeys(patient_ids) if patient_id not in found]
+    return cohort, missing
+
+
+_worker_catalog = None
+
+
+def _init_worker(catalog):
+    """Pool initializer: keep the catalog passed from the parent"""
+    global _worker_catalog
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        # spawn start method: the worker starts from a fresh interpreter
+        django.setup()
+    _worker_catalog = catalog
+
+
+def _generate_chunk(patients, target_calories, goal, duration, catalog=None):
+    catalog = catalog or _worker_catalog
+    return [
+        (patient.id, compact_chart(
+            generate_database_driven_diet_chart(patient, target_calories, goal, catalog, duration), catalog
+        ))
+        for patient in patients
+    ]
+
+
+def generate_chart_data(patients, target_calories, goal, duration=30, workers=1, chunk_size=None,
+                        catalog=None, start_method=None):
+    """Yield ``(patient_id, chart_data)`` for ``patients`` in order, chart_data in storage form
+
+    The pool uses ``start_method``, by default fork where it is available.
+    """
+    catalog = catalog or get_catalog()
+    chunk_size = chunk_size or get_chunk_size()
+    chunks = [patients[start:start + chunk_size] for start in range(0, len(patients), chunk_size)]
+    workers = min(workers, len(chunks))
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _generate_chunk(chunk, target_calories, goal, duration, catalog)
+        return
+
+    if start_method is None and 'fork' in multiprocessing.get_all_start_methods():
+        start_method = 'fork'
+    context = multiprocessing.get_context(start_method)
+    if context.get_start_method() == 'fork':
+        # Forked workers must not inherit open database connections
+        for connection in connections.all(initialized_only=True):
+            if not connection.in_atomic_block:
+                connection.close()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(catalog,)) as pool:
+        tasks = pool.map(_generate_chunk, chunks, repeat(target_calories), repeat(goal), repeat(duration))
+        for results in tasks:
+            yield from results
+
+
+def generate_cohort_charts(patients, target_calories=2000, goal='Maintenance', duration=30,
+                           workers=None, batch_size=DEFAULT_BATCH_SIZE, progress=None, start_method=None):
+    """Generate and store a diet chart for every patient in ``patients``
+
+    Returns the created chart IDs (in ``patients`` order) and timing figures.
+    Charts are generated before the write transaction opens, so the pool is
+    never forked while a transaction holds the database connection.
+    ``progress(fraction, message)`` is called as charts are generated;
+    ``start_method`` is passed to generate_chart_data.
+    """
+    workers = get_worker_count(workers)
+    started = time.perf_counter()
+    charts = []
+    chart_data_items = generate_chart_data(
+        patients, target_calories, goal, duration, workers, start_method=start_method
+    )
+    for patient_id, chart_data in chart_data_items:
+        charts.append(DietChart(
+            patient_id=patient_id,
+            goal=goal,
+            target_calories=target_calories,
+            duration=duration,
+            chart_data=chart_data
+        ))
+        if progress:
+            progress(0.9 * len(charts) / len(patients), f'Generated {len(charts)} of {len(patients)} charts')
+    generated = time.perf_counter()
+
+    with transaction.atomic():
+        DietChart.objects.bulk_create(charts, batch_size=batch_size)
+        if charts:
+            # bulk_create does not send post_save
+            TableVersion.bump('dietchart')
+
+    finished = time.perf_counter()
+    seconds = finished - started
+    return {
+        'created': len(charts),
+        'chart_ids': [chart.id for chart in charts],
+        'workers': workers,
+        'generate_seconds': round(generated - started, 3),
+        'write_seconds': round(finished - generated, 3),
+        'seconds': round(seconds, 3),
+        'charts_per_second': round(len(charts) / seconds, 1) if seconds > 0 else None,
+    }
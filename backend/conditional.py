@@ -0,0 +1,52 @@
+"""
+NutriVeda conditional GET support
+
+Read APIs expose the write counters in TableVersion as a weak ETag (and the
+time of the last write as Last-Modified). A matching If-None-Match is answered
+with 304 after a single primary-key lookup, before the list query runs.
+"""
+
+import hashlib
+
+from django.views.decorators.http import condition
+
+from .models import TableVersion
+
+
+def get_table_versions(request, tables):
+    """Return {table: (version, updated_at)} for ``tables``, cached on the request"""
+    cache = request.__dict__.setdefault('_table_versions', {})
+    key = tuple(tables)
+    if key not in cache:
+        found = {
+            row.table: (row.version, row.updated_at)
+            for row in TableVersion.objects.filter(table__in=tables)
+        }
+        cache[key] = {table: found.get(table, (0, None)) for table in tables}
+    return cache[key]
+
+
+def versioned(*tables):
+    """Decorate a read view with ETag / Last-Modified derived from ``tables``
+
+    The ETag also covers the query string, since ?fields=, ?limit= and the
+    filters all change the representation.
+    """
+    def etag_func(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        versions = get_table_versions(request, tables)
+        tag = '.'.join(str(versions[table][0]) for table in tables)
+        query = request.GET.urlencode()
+        if query:
+            tag += '-' + hashlib.md5(query.encode('utf-8')).hexdigest()[:12]
+        return f'W/"{tag}"'
+
+    def last_modified_func(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        stamps = [updated_at for _, updated_at in get_table_versions(request, tables).values()
+                  if updated_at is not None]
+        return max(stamps) if stamps else None
+
+    return condition(etag_func=etag_func, last_modified_func=last_modified_func)
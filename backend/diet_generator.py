@@ -0,0 +1,433 @@
+"""
+NutriVeda database-driven diet chart generation
+
+Builds a meal plan from the food catalog according to the patient's
+constitution. Foods are read from the in-memory snapshot in ``backend.catalog``
+so generating a chart does not query the food table.
+
+DIET_CHART_ENGINE selects how portions are chosen:
+
+* ``optimizer`` - solve all meals at once for calorie and macro targets
+  (``backend.optimizer``, the default)
+* ``greedy``    - fill each category's calories from its best-ranked foods
+
+Meal plans are memoized per constitution, calorie band and goal (see
+``backend.chart_cache``).
+
+A chart covers ``duration`` days. Day N draws its foods from rotation window
+(N - 1) mod DIET_PLAN_ROTATION_DAYS of each category's ranked list, so menus
+vary from day to day. Every day can be computed on its own. Only the first
+DIET_PLAN_INITIAL_DAYS are generated with the chart; ``extend_plan`` fills in
+later days on first access, only those requested.
+"""
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+
+from .catalog import get_catalog
+from .chart_cache import calorie_band, copy_meals, get_template_cache
+from .optimizer import optimize_meals
+
+MEAL_STRUCTURE = [
+    {'name': 'Early Morning', 'time': '6:00 AM', 'calorie_percent': 0.05},
+    {'name': 'Breakfast', 'time': '8:00 AM', 'calorie_percent': 0.25},
+    {'name': 'Mid-Morning Snack', 'time': '11:00 AM', 'calorie_percent': 0.10},
+    {'name': 'Lunch', 'time': '1:00 PM', 'calorie_percent': 0.35},
+    {'name': 'Evening Snack', 'time': '4:00 PM', 'calorie_percent': 0.10},
+    {'name': 'Dinner', 'time': '7:00 PM', 'calorie_percent': 0.15}
+]
+
+BEDTIME_MEAL = {'name': 'Bedtime', 'time': '9:00 PM', 'calories': 50}
+
+# Food categories of each meal and their share of the meal's calories
+MEAL_CATEGORIES = {
+    'Early Morning': (['Beverages', 'Nuts'], [0.3, 0.7]),
+    'Breakfast': (['Grains', 'Fruits', 'Beverages'], [0.6, 0.3, 0.1]),
+    'Mid-Morning Snack': (['Beverages', 'Nuts', 'Fruits'], [0.2, 0.5, 0.3]),
+    'Lunch': (['Grains', 'Legumes', 'Vegetables', 'Dairy'], [0.4, 0.3, 0.2, 0.1]),
+    'Evening Snack': (['Beverages', 'Nuts', 'Fruits'], [0.3, 0.4, 0.3]),
+    'Dinner': (['Grains', 'Vegetables', 'Dairy'], [0.5, 0.3, 0.2]),
+    'Bedtime': (['Beverages', 'Dairy'], [0.7, 0.3]),
+}
+DEFAULT_MEAL_CATEGORIES = (['Grains', 'Vegetables'], [0.6, 0.4])
+
+DIET_CHART_ENGINES = ('optimizer', 'greedy')
+
+DEFAULT_INITIAL_DAYS = 7
+DEFAULT_ROTATION_DAYS = 4
+# Longest plan a chart can be created for, in days
+MAX_DURATION = 365
+
+
+def parse_duration(value, default=30):
+    """Plan length in days from a request value; raises ValueError outside 1..MAX_DURATION"""
+    try:
+        duration = int(value) if value not in (None, '') else default
+    except (TypeError, ValueError) as e:
+        raise ValueError('duration must be an integer') from e
+    if not 1 <= duration <= MAX_DURATION:
+        raise ValueError(f'duration must be between 1 and {MAX_DURATION} days')
+    return duration
+
+def get_engine():
+    """The configured portion engine (DIET_CHART_ENGINE)"""
+    engine = getattr(settings, 'DIET_CHART_ENGINE', 'optimizer')
+    if engine not in DIET_CHART_ENGINES:
+        raise ValueError(f"Unknown DIET_CHART_ENGINE '{engine}'; choose from {', '.join(DIET_CHART_ENGINES)}")
+    return engine
+
+def generate_database_driven_diet_chart(patient, target_calories, goal, catalog=None, duration=30):
+    """Generate diet chart using foods from the database based on patient constitution
+    
+    The first DIET_PLAN_INITIAL_DAYS days of the ``duration``-day plan are
+    generated now; ``extend_plan`` adds later days when they are first needed.
+    """
+    constitution = normalize_constitution(patient.prakriti)
+    catalog = catalog or get_catalog()
+    start_date = datetime.now().date()
+    
+    days = [
+        plan_day(constitution, target_calories, goal, catalog, day, start_date)
+        for day in range(1, min(duration, get_initial_days()) + 1)
+    ]
+    template = get_chart_template(constitution, target_calories, goal, catalog)
+    
+    return {
+        'patientName': patient.name,
+        'constitution': patient.prakriti,
+        'goal': goal,
+        'calories': target_calories,
+        'duration': duration,
+        'date': start_date.strftime('%Y-%m-%d'),
+        'meals': days[0]['meals'] if days else copy_meals(template['meals']),
+        'guidelines': list(template['guidelines']),
+        'seasonalRecommendations': list(template['seasonalRecommendations']),
+        'doNotEat': list(template['doNotEat']),
+        'days': days
+    }
+
+def normalize_constitution(prakriti):
+    """Constitution key used for food ranking ('Vata-Pitta' -> 'vata-pitta')"""
+    return prakriti.lower() if prakriti else 'vata'
+
+def get_initial_days():
+    """Plan days generated together with the chart (DIET_PLAN_INITIAL_DAYS)"""
+    return getattr(settings, 'DIET_PLAN_INITIAL_DAYS', DEFAULT_INITIAL_DAYS)
+
+def get_rotation_days():
+    """Days before a daily menu repeats (DIET_PLAN_ROTATION_DAYS)"""
+    return max(int(getattr(settings, 'DIET_PLAN_ROTATION_DAYS', DEFAULT_ROTATION_DAYS)), 1)
+
+def get_chart_template(constitution, target_calories, goal, catalog, rotation=0):
+    """Cached patient-independent chart for one rotation day"""
+    # The meal plan only depends on these; patient fields are applied on top
+    band = calorie_band(target_calories)
+    rotation_days = get_rotation_days()
+    rotation %= rotation_days
+    key = (constitution, band, (goal or '').strip().lower(), get_engine(), rotation, rotation_days, catalog.version)
+    cache = get_template_cache()
+    template = cache.get(key)
+    if template is None:
+        template = build_chart_template(constitution, band, goal, catalog, rotation, rotation_days)
+        cache.set(key, template)
+    return template
+
+def plan_day(constitution, target_calories, goal, catalog, day, start_date):
+    """Meals for day ``day`` (1-based) of a plan starting on ``start_date``"""
+    template = get_chart_template(constitution, target_calories, goal, catalog, day - 1)
+    meals = copy_meals(template['meals'])
+    return {
+        'day': day,
+        'date': (start_date + timedelta(days=day - 1)).strftime('%Y-%m-%d'),
+        'meals': meals,
+        'totalCalories': sum(meal['totalCalories'] for meal in meals)
+    }
+
+def fill_plan_fields(chart_data, chart):
+    """Add the fields plan days are generated from when ``chart_data`` lacks them
+    
+    Charts from the original generator have no date, constitution, calories
+    or goal; they are taken from the DietChart row ``chart`` (its creation
+    date, the patient's prakriti, target calories and goal). Returns True when
+    ``chart_data`` was changed.
+    """
+    changed = False
+    if 'date' not in chart_data:
+        chart_data['date'] = chart.created_at.strftime('%Y-%m-%d')
+        changed = True
+    if 'constitution' not in chart_data:
+        chart_data['constitution'] = chart.patient.prakriti
+        changed = True
+    if 'calories' not in chart_data:
+        chart_data['calories'] = chart.target_calories
+        changed = True
+    if 'goal' not in chart_data:
+        chart_data['goal'] = chart.goal
+        changed = True
+    return changed
+
+def extend_plan(chart_data, first_day, last_day, duration, catalog=None):
+    """Generate the days ``first_day`` to ``last_day`` of ``chart_data`` that do not exist yet
+    
+    Days are independent, so only the requested window is generated; days
+    before it that were never requested stay None. Charts created before
+    multi-day plans only have ``meals``; those become day 1. Charts from the
+    original generator need ``fill_plan_fields`` first. Returns True when
+    ``chart_data`` was changed.
+    """
+    missing = [key for key in ('date', 'calories', 'goal') if key not in chart_data]
+    if missing:
+        raise ValueError(f"Chart data has no {', '.join(missing)} to plan more days from")
+    days = chart_data.setdefault('days', [])
+    changed = False
+    start_date = datetime.strptime(chart_data['date'], '%Y-%m-%d').date()
+    if not days and chart_data.get('meals'):
+        days.append({
+            'day': 1,
+            'date': chart_data['date'],
+            'meals': chart_data['meals'],
+            # Meals of the original generator call it total_calories
+            'totalCalories': sum(
+                meal.get('totalCalories', meal.get('total_calories', 0)) for meal in chart_data['meals']
+            )
+        })
+        changed = True
+    
+    last_day = min(last_day, duration)
+    if len(days) < last_day:
+        days.extend([None] * (last_day - len(days)))
+    catalog = catalog or get_catalog()
+    constitution = normalize_constitution(chart_data.get('constitution'))
+    for day in range(max(first_day, 1), last_day + 1):
+        if days[day - 1] is None:
+            days[day - 1] = plan_day(constitution, chart_data['calories'], chart_data['goal'], catalog, day, start_date)
+            changed = True
+    return changed
+
+def build_chart_template(constitution, target_calories, goal, catalog, rotation=0, rotation_days=1):
+    """Build the patient-independent part of a diet chart for one rotation day"""
+    meal_plan = get_meal_plan(target_calories)
+    meal_items = choose_meal_items(constitution, meal_plan, goal, catalog, rotation, rotation_days)
+    
+    meals = []
+    for (name, time, _), items in zip(meal_plan, meal_items):
+        meals.append({
+            'name': name,
+            'time': time,
+            'items': items,
+            'totalCalories': sum(item['calories'] for item in items)
+        })
+    
+    return {
+        'meals': meals,
+        'guidelines': get_constitution_guidelines(constitution),
+        'seasonalRecommendations': get_seasonal_recommendations(),
+        'doNotEat': get_foods_to_avoid(constitution)
+    }
+
+def get_meal_plan(target_calories):
+    """``(name, time, calories)`` of each meal of a day, bedtime last"""
+    meal_plan = [
+        (meal_info['name'], meal_info['time'], int(target_calories * meal_info['calorie_percent']))
+        for meal_info in MEAL_STRUCTURE
+    ]
+    meal_plan.append((BEDTIME_MEAL['name'], BEDTIME_MEAL['time'], BEDTIME_MEAL['calories']))
+    return meal_plan
+
+def choose_meal_items(constitution, meal_plan, goal, catalog, rotation=0, rotation_days=1, exclude=()):
+    """Items of each meal in ``meal_plan`` from the configured engine, skipping food IDs in ``exclude``"""
+    if get_engine() == 'optimizer':
+        return optimize_meal_items(constitution, meal_plan, goal, catalog, rotation, rotation_days, exclude)
+    return [
+        select_foods_for_meal(constitution, name, meal_calories, catalog, rotation, rotation_days, exclude)
+        for name, _, meal_calories in meal_plan
+    ]
+
+def build_meal(constitution, meal_name, target_calories, goal, catalog, rotation=0, exclude=()):
+    """One meal of the plan for ``target_calories`` on rotation day ``rotation``
+    
+    Used to regenerate a single meal of a stored chart; the foods in
+    ``exclude`` are left out so the meal comes out different.
+    """
+    meal_plan = [entry for entry in get_meal_plan(calorie_band(target_calories)) if entry[0] == meal_name]
+    if not meal_plan:
+        raise ValueError(f"Unknown meal '{meal_name}'")
+    rotation_days = get_rotation_days()
+    items = choose_meal_items(
+        constitution, meal_plan, goal, catalog, rotation % rotation_days, rotation_days, exclude
+    )[0]
+    name, time, _ = meal_plan[0]
+    return {
+        'name': name,
+        'time': time,
+        'items': items,
+        'totalCalories': sum(item['calories'] for item in items)
+    }
+
+def get_meal_categories(meal_name, target_calories):
+    """``(category, calories)`` pairs making up a meal"""
+    categories, calorie_distribution = MEAL_CATEGORIES.get(meal_name, DEFAULT_MEAL_CATEGORIES)
+    return [
+        (category, int(target_calories * share))
+        for category, share in zip(categories, calorie_distribution)
+    ]
+
+def optimize_meal_items(constitution, meal_plan, goal, catalog, rotation=0, rotation_days=1, exclude=()):
+    """Choose every meal's foods and portions in one optimizer run"""
+    meals = [
+        (meal_calories, get_meal_categories(name, meal_calories))
+        for name, _, meal_calories in meal_plan
+    ]
+    selections = optimize_meals(catalog, constitution, meals, goal, rotation, rotation_days, exclude)
+    
+    meal_items = []
+    for (name, _, meal_calories), selection in zip(meal_plan, selections):
+        items = [food_item(food, servings) for food, servings in selection]
+        meal_items.append(items or get_fallback_foods(name, meal_calories))
+    return meal_items
+
+def select_foods_for_meal(constitution, meal_name, target_calories, catalog, rotation=0, rotation_days=1,
+                          exclude=()):
+    """Select appropriate foods from database for a specific meal based on constitution"""
+    foods = []
+    
+    # Select foods for each category
+    for category, category_calories in get_meal_categories(meal_name, target_calories):
+        category_foods = get_foods_by_category_and_constitution(
+            category, constitution, category_calories, catalog, rotation, rotation_days, exclude
+        )
+        foods.extend(category_foods)
+    
+    # If no foods found, add some basic items
+    if not foods:
+        foods = get_fallback_foods(meal_name, target_calories)
+    
+    return foods
+
+def food_item(food, quantity):
+    """Chart entry for ``quantity`` servings of ``food``"""
+    return {
+        'name': food.name,
+        'quantity': f"{quantity:.1f} {food.serving}",
+        'calories': int(food.calories * quantity),
+        'virya': food.virya,
+        'rasa': food.rasa,
+        'category': food.category
+    }
+
+def get_foods_by_category_and_constitution(category, constitution, target_calories, catalog,
+                                           rotation=0, rotation_days=1, exclude=()):
+    """Get foods from the catalog filtered by category and constitution compatibility"""
+    try:
+        # Compatible foods come pre-sorted by constitution compatibility; the
+        # rotation picks this day's window of 5
+        constitution_foods = catalog.rotation(category, constitution, 5, rotation, rotation_days, exclude)
+        
+        # Select foods to meet calorie target
+        selected_foods = []
+        remaining_calories = target_calories
+        
+        for food in constitution_foods:  # Limit to 5 foods per category
+            if remaining_calories <= 0:
+                break
+                
+            # Calculate quantity based on calories
+            quantity = min(remaining_calories / food.calories, 3)  # Max 3 servings
+            if quantity >= 0.5:  # Only include if at least half serving
+                selected_foods.append(food_item(food, quantity))
+                remaining_calories -= int(food.calories * quantity)
+        
+        return selected_foods
+        
+    except Exception as e:
+        print(f"Error selecting foods: {e}")
+        return []
+
+def get_fallback_foods(meal_name, target_calories):
+    """Provide fallback foods if database selection fails"""
+    fallback_foods = {
+        'Early Morning': [
+            {'name': 'Warm Water with Lemon', 'quantity': '1 glass', 'calories': 5, 'virya': 'Hot'},
+            {'name': 'Soaked Almonds', 'quantity': '5-6 pieces', 'calories': 35, 'virya': 'Hot'}
+        ],
+        'Breakfast': [
+            {'name': 'Oatmeal with Fruits', 'quantity': '1 bowl', 'calories': int(target_calories * 0.6), 'virya': 'Cold'},
+            {'name': 'Herbal Tea', 'quantity': '1 cup', 'calories': 5, 'virya': 'Hot'}
+        ],
+        'Mid-Morning Snack': [
+            {'name': 'Green Tea', 'quantity': '1 cup', 'calories': 2, 'virya': 'Hot'},
+            {'name': 'Mixed Nuts', 'quantity': '10-12 pieces', 'calories': int(target_calories * 0.8), 'virya': 'Hot'}
+        ],
+        'Lunch': [
+            {'name': 'Dal with Rice', 'quantity': '1 plate', 'calories': int(target_calories * 0.6), 'virya': 'Hot'},
+            {'name': 'Vegetable Curry', 'quantity': '1 serving', 'calories': int(target_calories * 0.3), 'virya': 'Hot'},
+            {'name': 'Chapati', 'quantity': '2 pieces', 'calories': int(target_calories * 0.1), 'virya': 'Hot'}
+        ],
+        'Evening Snack': [
+            {'name': 'Herbal Tea', 'quantity': '1 cup', 'calories': 5, 'virya': 'Hot'},
+            {'name': 'Roasted Chana', 'quantity': '1 small bowl', 'calories': int(target_calories * 0.8), 'virya': 'Hot'}
+        ],
+        'Dinner': [
+            {'name': 'Chapati with Sabzi', 'quantity': '2 pieces', 'calories': int(target_calories * 0.7), 'virya': 'Hot'},
+            {'name': 'Dal', 'quantity': '1 bowl', 'calories': int(target_calories * 0.3), 'virya': 'Hot'}
+        ],
+        'Bedtime': [
+            {'name': 'Warm Milk with Turmeric', 'quantity': '1 glass', 'calories': 50, 'virya': 'Hot'}
+        ]
+    }
+    
+    return fallback_foods.get(meal_name, [
+        {'name': 'Balanced Meal', 'quantity': '1 serving', 'calories': target_calories, 'virya': 'Hot'}
+    ])
+
+def get_constitution_guidelines(constitution):
+    """Get dietary guidelines based on constitution"""
+    guidelines = {
+        'vata': [
+            'Eat warm, cooked foods',
+            'Include sweet, sour, and salty tastes',
+            'Avoid cold, raw foods',
+            'Maintain regular meal times',
+            'Include healthy fats and oils'
+        ],
+        'pitta': [
+            'Eat cooling, calming foods',
+            'Include sweet, bitter, and astringent tastes',
+            'Avoid spicy, hot foods',
+            'Eat at regular intervals',
+            'Include fresh fruits and vegetables'
+        ],
+        'kapha': [
+            'Eat light, warm foods',
+            'Include pungent, bitter, and astringent tastes',
+            'Avoid heavy, oily foods',
+            'Eat smaller portions',
+            'Include plenty of vegetables and spices'
+        ]
+    }
+    return guidelines.get(constitution, [
+        'Eat balanced, nutritious meals',
+        'Maintain regular meal times',
+        'Include variety in your diet',
+        'Stay hydrated'
+    ])
+
+def get_seasonal_recommendations():
+    """Get seasonal dietary recommendations"""
+    return [
+        'Include seasonal fruits and vegetables',
+        'Adjust spices according to season',
+        'Stay hydrated with herbal teas',
+        'Modify cooking methods for seasonal needs'
+    ]
+
+def get_foods_to_avoid(constitution):
+    """Get foods to avoid based on constitution"""
+    avoid_foods = {
+        'vata': ['Cold foods', 'Raw vegetables', 'Excess bitter taste', 'Dry foods'],
+        'pitta': ['Spicy foods', 'Hot beverages', 'Sour foods', 'Fried foods'],
+        'kapha': ['Heavy foods', 'Oily foods', 'Sweet foods', 'Cold drinks']
+    }
+    return avoid_foods.get(constitution, ['Processed foods', 'Excess sugar', 'Artificial additives'])
+
@@ -0,0 +1,205 @@
+"""
+NutriVeda faceted food filtering
+
+Facet filters and nutrient ranges are resolved against the food catalog
+snapshot (``backend.catalog``) with boolean bitmaps, one per facet value,
+built once per catalog version. No database query is needed.
+
+* Facets: category, virya, guna, digestion, rasa, vata, pitta, kapha and
+  season. A request may list several values of a facet (comma-separated);
+  a food matches when it has any of them. Different facets must all match.
+* rasa and season come from the catalog's feature matrix, so a food with
+  several tastes counts under each and season "All" counts under every season.
+* Dosha effects accept the arrows or ``down`` / ``up`` / ``neutral``.
+* Ranges: ``<nutrient>_min`` / ``<nutrient>_max`` per serving, inclusive, for
+  calories, protein, carbs, fat and fiber.
+* Sorting: ``sort=<nutrient>`` (ascending) or ``sort=-<nutrient>``
+  (descending) on the same nutrients; ties keep the previous order.
+
+Facet counts follow the usual disjunctive rule: each facet is counted with
+every filter applied except its own, so the other values of a selected facet
+still show how many foods they would add.
+"""
+
+import threading
+
+import numpy as np
+
+from .catalog import NUTRIENT_FIELDS, food_column, get_catalog
+from .food_features import COLUMN, EFFECT_VALUES, RASA_VALUES, SEASONS
+
+# Facets read from a single catalog attribute
+ATTRIBUTE_FACETS = {
+    'category': 'category',
+    'virya': 'virya',
+    'guna': 'guna',
+    'digestion': 'digestion',
+    'vata': 'vata_effect',
+    'pitta': 'pitta_effect',
+    'kapha': 'kapha_effect',
+}
+# Facets read from feature-matrix columns
+FEATURE_FACETS = {
+    'rasa': ('rasa', RASA_VALUES),
+    'season': ('season', SEASONS),
+}
+FACETS = tuple(ATTRIBUTE_FACETS) + tuple(FEATURE_FACETS)
+DOSHA_FACETS = ('vata', 'pitta', 'kapha')
+EFFECT_ALIASES = {name: arrow for arrow, name in EFFECT_VALUES.items()}
+
+
+class FacetError(ValueError):
+    """Raised for an invalid facet filter or range"""
+
+
+def parse_food_filters(params):
+    """``(filters, ranges)`` from query parameters
+
+    ``filters`` maps facet -> list of values; ``ranges`` maps nutrient ->
+    ``(minimum, maximum)`` with None for an open end.
+    """
+    filters = {}
+    for facet in FACETS:
+        values = [value.strip() for value in params.get(facet, '').split(',') if value.strip()]
+        if values:
+            filters[facet] = values
+
+    ranges = {}
+    for field in NUTRIENT_FIELDS:
+        bounds = []
+        for suffix in ('min', 'max'):
+            value = params.get(f'{field}_{suffix}', '')
+            try:
+                bounds.append(float(value) if value != '' else None)
+            except ValueError as e:
+                raise FacetError(f'{field}_{suffix} must be a number') from e
+        if bounds != [None, None]:
+            ranges[field] = tuple(bounds)
+    return filters, ranges
+
+
+def parse_food_sort(value):
+    """``(nutrient, descending)`` from a ?sort= value, or None when not given"""
+    value = (value or '').strip()
+    if not value:
+        return None
+    descending = value.startswith('-')
+    field = value.lstrip('-+ ').lower()
+    if field not in NUTRIENT_FIELDS:
+        raise FacetError(f"Cannot sort by '{field}'; choose from {', '.join(NUTRIENT_FIELDS)}")
+    return field, descending
+
+
+def sort_food_rows(catalog, rows, sort):
+    """Catalog ``rows`` ordered by the nutrient in ``sort`` (see parse_food_sort)"""
+    field, descending = sort
+    values = catalog.nutrients[rows, NUTRIENT_FIELDS.index(field)]
+    return rows[np.argsort(-values if descending else values, kind='stable')]
+
+
+class FacetIndex:
+    """Value bitmaps of every facet for one catalog snapshot"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.labels = {}   # facet -> value labels
+        self.bitmaps = {}  # facet -> bool array, one row per label
+        self._rows = {}    # facet -> {lowercase label or alias: row}
+
+        for facet, attribute in ATTRIBUTE_FACETS.items():
+            labels, rows, bitmap_rows = [], {}, []
+            for index, value in enumerate(food_column(catalog.foods, attribute)):
+                value = (value or '').strip()
+                if not value:
+                    continue
+                row = rows.get(value.lower())
+                if row is None:
+                    row = rows[value.lower()] = len(labels)
+                    labels.append(value)
+                    bitmap_rows.append(np.zeros(len(catalog.foods), dtype=bool))
+                bitmap_rows[row][index] = True
+            self._add(facet, labels, rows, bitmap_rows)
+
+        matrix = catalog.features.matrix
+        for facet, (prefix, values) in FEATURE_FACETS.items():
+            bitmap_rows = [matrix[:, COLUMN[f'{prefix}:{value}']] > 0 for value in values]
+            labels = [value.title() for value in values]
+            self._add(facet, labels, {value: row for row, value in enumerate(values)}, bitmap_rows)
+
+        for facet in DOSHA_FACETS:
+            rows = self._rows[facet]
+            for alias, arrow in EFFECT_ALIASES.items():
+                if arrow in rows:
+                    rows[alias] = rows[arrow]
+
+    def _add(self, facet, labels, rows, bitmap_rows):
+        self.labels[facet] = tuple(labels)
+        self._rows[facet] = rows
+        self.bitmaps[facet] = np.array(bitmap_rows, dtype=bool).reshape(len(labels), len(self.catalog.foods))
+
+    def value_mask(self, facet, values):
+        """Foods having any of ``values`` for ``facet``"""
+        rows = []
+        for value in values:
+            row = self._rows[facet].get(value.lower())
+            if row is None:
+                choices = ', '.join(self.labels[facet])
+                raise FacetError(f"Unknown {facet} '{value}'; choose from {choices}")
+            rows.append(row)
+        return self.bitmaps[facet][rows].any(axis=0)
+
+    def range_mask(self, ranges):
+        """Foods whose per-serving nutrients fall inside ``ranges``"""
+        mask = np.ones(len(self.catalog.foods), dtype=bool)
+        for field, (minimum, maximum) in ranges.items():
+            column = self.catalog.nutrients[:, NUTRIENT_FIELDS.index(field)]
+            if minimum is not None:
+                mask &= column >= minimum
+            if maximum is not None:
+                mask &= column <= maximum
+        return mask
+
+    def apply(self, filters, ranges, within=None):
+        """``(mask, counts)``: the matching foods and the count of every facet value
+
+        ``within`` optionally limits everything, counts included, to a subset
+        of foods (for example search matches).
+        """
+        base = self.range_mask(ranges)
+        if within is not None:
+            base &= within
+        masks = {facet: self.value_mask(facet, values) for facet, values in filters.items()}
+        mask = base.copy()
+        for facet_mask in masks.values():
+            mask &= facet_mask
+
+        counts = {}
+        for facet in FACETS:
+            if facet in masks:
+                # Every filter except this facet's own
+                others = base.copy()
+                for other, facet_mask in masks.items():
+                    if other != facet:
+                        others &= facet_mask
+            else:
+                others = mask
+            totals = self.bitmaps[facet].astype(np.int32) @ others.astype(np.int32)
+            counts[facet] = {label: int(total) for label, total in zip(self.labels[facet], totals)}
+        return mask, counts
+
+
+_lock = threading.Lock()
+_index = None
+
+
+def get_facet_index(catalog=None):
+    """The facet index of ``catalog`` (default: the current catalog), built once per version"""
+    global _index
+    catalog = catalog or get_catalog()
+    index = _index
+    if index is not None and index.catalog is catalog:
+        return index
+    with _lock:
+        if _index is None or _index.catalog is not catalog:
+            _index = FacetIndex(catalog)
+        return _index
@@ -0,0 +1,145 @@
+"""
+NutriVeda food feature matrix
+
+Encodes the Ayurvedic properties of every food as 0/1 columns so that
+constitution compatibility is scored for the whole catalog with one matrix
+product, instead of lowercasing and comparing strings food by food.
+
+Columns (FEATURES):
+
+* ``virya:<value>`` - hot, warm, cold, cool
+* ``guna:<value>``  - heavy, moist, light, dry, cooling
+* ``rasa:<taste>``  - the six tastes; a food may list several
+* ``<dosha>:<arrow>`` - the ↓ / ↑ / = effect on vata, pitta and kapha
+* ``season:<name>`` - spring, summer, monsoon, autumn, winter ("All" sets all)
+
+Each dosha has a score weight per column and the virya and guna values a
+compatible food must have. A constitution is one dosha or several
+(``'vata-pitta'``, ``'vata+pitta'``): scores use the mean of the doshas'
+weights, and a food is compatible when it suits any of them. For a single
+dosha the rules give the same scores as the original per-food string checks.
+"""
+
+import re
+
+import numpy as np
+
+DOSHAS = ('vata', 'pitta', 'kapha')
+
+VIRYA_VALUES = ('hot', 'warm', 'cold', 'cool')
+GUNA_VALUES = ('heavy', 'moist', 'light', 'dry', 'cooling')
+RASA_VALUES = ('sweet', 'sour', 'salty', 'pungent', 'bitter', 'astringent')
+EFFECT_VALUES = {'↓': 'down', '↑': 'up', '=': 'neutral'}
+SEASONS = ('spring', 'summer', 'monsoon', 'autumn', 'winter')
+
+FEATURES = (
+    tuple(f'virya:{value}' for value in VIRYA_VALUES)
+    + tuple(f'guna:{value}' for value in GUNA_VALUES)
+    + tuple(f'rasa:{value}' for value in RASA_VALUES)
+    + tuple(f'{dosha}:{effect}' for dosha in DOSHAS for effect in EFFECT_VALUES.values())
+    + tuple(f'season:{season}' for season in SEASONS)
+)
+COLUMN = {feature: index for index, feature in enumerate(FEATURES)}
+
+# Score weight of each column, and the virya / guna values a compatible food needs
+DOSHA_RULES = {
+    'vata': {
+        'weights': {'virya:hot': 2, 'virya:warm': 2, 'guna:heavy': 2, 'guna:moist': 2, 'vata:down': 3},
+        'virya': ('hot', 'warm'),
+        'guna': ('heavy', 'moist'),
+    },
+    'pitta': {
+        'weights': {'virya:cold': 2, 'virya:cool': 2, 'guna:light': 2, 'guna:cooling': 2, 'pitta:down': 3},
+        'virya': ('cold', 'cool'),
+        'guna': ('light', 'cooling'),
+    },
+    'kapha': {
+        'weights': {'virya:hot': 2, 'virya:warm': 2, 'guna:light': 2, 'guna:dry': 2, 'kapha:down': 3},
+        'virya': ('hot', 'warm'),
+        'guna': ('light', 'dry'),
+    },
+}
+
+
+def _column_vector(columns, values=None):
+    vector = np.zeros(len(FEATURES))
+    for column in columns:
+        vector[COLUMN[column]] = 1 if values is None else values[column]
+    return vector
+
+
+# One column per dosha: score weights, and the allowed virya / guna columns
+WEIGHTS = np.stack([_column_vector(DOSHA_RULES[dosha]['weights'], DOSHA_RULES[dosha]['weights'])
+                    for dosha in DOSHAS], axis=1)
+VIRYA_MASKS = np.stack([_column_vector(f'virya:{value}' for value in DOSHA_RULES[dosha]['virya'])
+                        for dosha in DOSHAS], axis=1)
+GUNA_MASKS = np.stack([_column_vector(f'guna:{value}' for value in DOSHA_RULES[dosha]['guna'])
+                       for dosha in DOSHAS], axis=1)
+
+
+def parse_constitution(constitution):
+    """The doshas of a constitution, in DOSHAS order ('Pitta+Vata' -> ('vata', 'pitta'))"""
+    parts = set(re.split(r'[\s,+/&-]+', (constitution or '').lower()))
+    return tuple(dosha for dosha in DOSHAS if dosha in parts)
+
+
+def _split_values(text):
+    return {value for value in re.split(r'[\s,+/&]+', (text or '').lower()) if value}
+
+
+def encode_food(food):
+    """Feature row for one food (any object with the FoodItem attribute names)"""
+    row = np.zeros(len(FEATURES))
+    # virya and guna are matched as whole values, like the scoring rules
+    for prefix, value in (('virya', food.virya), ('guna', food.guna)):
+        column = COLUMN.get(f'{prefix}:{(value or "").strip().lower()}')
+        if column is not None:
+            row[column] = 1
+    for taste in _split_values(food.rasa):
+        column = COLUMN.get(f'rasa:{taste}')
+        if column is not None:
+            row[column] = 1
+    for dosha in DOSHAS:
+        effect = EFFECT_VALUES.get((getattr(food, f'{dosha}_effect') or '').strip())
+        if effect:
+            row[COLUMN[f'{dosha}:{effect}']] = 1
+    seasons = {season.strip().lower() for season in food.season or () if isinstance(season, str)}
+    for season in SEASONS if 'all' in seasons else seasons & set(SEASONS):
+        row[COLUMN[f'season:{season}']] = 1
+    return row
+
+
+class FoodFeatures:
+    """Feature matrix of a sequence of foods, one row per food
+
+    ``matrix`` may be passed in already encoded (for example memory-mapped).
+    """
+
+    def __init__(self, foods, matrix=None):
+        if matrix is None:
+            matrix = np.array([encode_food(food) for food in foods]).reshape(-1, len(FEATURES))
+        self.matrix = matrix
+
+    def scores(self, constitution):
+        """Compatibility score of every food for ``constitution`` (zeros if unknown)"""
+        doshas = parse_constitution(constitution)
+        if not doshas:
+            return np.zeros(len(self.matrix))
+        columns = [DOSHAS.index(dosha) for dosha in doshas]
+        return self.matrix @ WEIGHTS[:, columns].mean(axis=1)
+
+    def compatible(self, constitution):
+        """Whether each food suits ``constitution`` (all True if unknown)"""
+        doshas = parse_constitution(constitution)
+        if not doshas:
+            return np.ones(len(self.matrix), dtype=bool)
+        columns = [DOSHAS.index(dosha) for dosha in doshas]
+        suits = (self.matrix @ VIRYA_MASKS[:, columns] > 0) & (self.matrix @ GUNA_MASKS[:, columns] > 0)
+        return suits.any(axis=1)
+
+    def in_season(self, season):
+        """Whether each food is listed for ``season``"""
+        column = COLUMN.get(f'season:{(season or "").strip().lower()}')
+        if column is None:
+            return np.zeros(len(self.matrix), dtype=bool)
+        return self.matrix[:, column] > 0
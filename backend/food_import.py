@@ -0,0 +1,132 @@
+"""
+NutriVeda food ingestion from Book1.csv
+
+Reads the nutrient table shipped as Book1.csv and inserts the foods that are
+not in the database yet. Ayurvedic properties are derived from the food
+category. Besides the named nutrient fields, every numeric column after the
+category is kept as the food's ``nutrient_vector`` (NUTRIENT_VECTOR_COLUMNS).
+New rows are written with ``bulk_create``, so the ``fooditem`` table version
+is bumped by hand afterwards.
+"""
+
+import csv
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import FoodItem, TableVersion
+
+DEFAULT_CSV_NAME = 'Book1.csv'
+BATCH_SIZE = 500
+
+CATEGORY_MAP = {
+    1: "Vegetables", 2: "Fruits", 3: "Grains", 4: "Proteins",
+    5: "Dairy", 6: "Spices", 7: "Nuts", 8: "Oils", 9: "Beverages", 10: "Other"
+}
+
+# Book1.csv has no header names; only calories, water, protein, fat, carbs and
+# fiber are known, the other columns keep their position
+NUTRIENT_VECTOR_COLUMNS = (
+    'calories', 'water', 'protein', 'fat', 'carbs', 'fiber',
+) + tuple(f'column_{index}' for index in range(8, 23))
+FIRST_VECTOR_COLUMN = 2
+
+
+def default_csv_path():
+    """Book1.csv next to manage.py"""
+    return settings.BASE_DIR / DEFAULT_CSV_NAME
+
+
+def nutrient_vector(row):
+    """The NUTRIENT_VECTOR_COLUMNS values of a CSV row, None where blank or not a number"""
+    vector = []
+    for index in range(FIRST_VECTOR_COLUMN, FIRST_VECTOR_COLUMN + len(NUTRIENT_VECTOR_COLUMNS)):
+        value = row[index].strip() if index < len(row) else ''
+        try:
+            vector.append(float(value) if value else None)
+        except ValueError:
+            vector.append(None)
+    return vector
+
+
+def food_from_row(row):
+    """Build an unsaved FoodItem from a CSV row, or None for rows to skip"""
+    if len(row) < 3 or not row[0].strip():  # Skip empty rows
+        return None
+    name = row[0].strip()
+    if not name or name.startswith(','):  # Skip empty names
+        return None
+
+    # CSV structure: Name, Category, Calories, Water, Protein, Fat, Carbs, Fiber, etc.
+    category_num = int(row[1]) if row[1] else 6
+    calories = int(float(row[2])) if row[2] else 100
+    protein = float(row[4]) if row[4] else 5
+    fat = float(row[5]) if row[5] else 2
+    carbs = float(row[6]) if row[6] else 15
+    fiber = float(row[7]) if row[7] else 2
+    category = CATEGORY_MAP.get(category_num, "Other")
+
+    # Determine Ayurvedic properties based on food type
+    virya = "Cold" if category in ["Fruits", "Vegetables"] else "Hot"
+    digestion = "Easy" if category in ["Fruits", "Vegetables"] else "Hard"
+    rasa = "Sweet" if category in ["Fruits", "Dairy"] else "Pungent"
+    guna = "Light" if category in ["Fruits", "Vegetables"] else "Heavy"
+
+    # Dosha effects (simplified)
+    vata_effect = "↓" if category in ["Dairy", "Grains"] else "↑"
+    pitta_effect = "↓" if category in ["Fruits", "Vegetables"] else "↑"
+    kapha_effect = "↑" if category in ["Dairy", "Grains"] else "↓"
+
+    return FoodItem(
+        name=name,
+        category=category,
+        calories=calories,
+        serving="100g",
+        protein=protein,
+        carbs=carbs,
+        fat=fat,
+        fiber=fiber,
+        virya=virya,
+        digestion=digestion,
+        rasa=rasa,
+        guna=guna,
+        vata_effect=vata_effect,
+        pitta_effect=pitta_effect,
+        kapha_effect=kapha_effect,
+        season=["All"],
+        benefits=["Nutritional value", "Health benefits"],
+        precautions=["Allergies"],
+        description=f"{name} is a {category.lower()} with {virya.lower()} virya and {rasa.lower()} rasa.",
+        nutrient_vector=nutrient_vector(row)
+    )
+
+
+def import_foods_from_csv(csv_file=None, progress=None):
+    """Insert the foods from ``csv_file`` (default Book1.csv) that do not exist yet
+
+    ``progress(fraction, message)`` is called while reading. Returns the
+    number of foods created; malformed rows are skipped.
+    """
+    csv_file = csv_file or default_csv_path()
+    with open(csv_file, 'r', encoding='utf-8') as file:
+        rows = list(csv.reader(file))[1:]  # Skip header row
+
+    existing = set(FoodItem.objects.values_list('name', flat=True))
+    foods = []
+    for index, row in enumerate(rows):
+        try:
+            food = food_from_row(row)
+        except (ValueError, IndexError):
+            continue  # Skip malformed rows
+        if food is not None and food.name not in existing:
+            existing.add(food.name)
+            foods.append(food)
+        if progress and index % BATCH_SIZE == 0:
+            progress(0.9 * index / len(rows), f'Read {index} of {len(rows)} rows')
+
+    with transaction.atomic():
+        FoodItem.objects.bulk_create(foods, batch_size=BATCH_SIZE)
+        if foods:
+            # bulk_create does not send post_save
+            TableVersion.bump('fooditem')
+    return len(foods)
@@ -0,0 +1,182 @@
+"""
+NutriVeda food search
+
+Ranked, typo-tolerant search over food names, descriptions and benefits,
+answered from an in-process trigram index instead of ``LIKE`` scans. The
+index is built from the food catalog snapshot (``backend.catalog``) on first
+use and rebuilt when the catalog version changes.
+
+* Text is split into lowercase words. Every distinct word is indexed by its
+  trigrams, padded as ``'  word '`` so word starts weigh more.
+* A query word matches an indexed word that starts with it, or that shares
+  enough trigrams with it (Dice coefficient >= MIN_SIMILARITY), so
+  misspellings such as "tumeric" still find "turmeric".
+* A food's score for a query word is the best match similarity times the
+  weight of the field it was found in (FIELD_WEIGHTS). Every query word must
+  match; words may come in any order. Foods are returned best score first.
+* Stopwords are left out of queries. A query made only of stopwords ("the")
+  is matched word by word like any other, and also against the stopwords,
+  which are indexed separately, so it does not come back empty.
+"""
+
+import bisect
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+from .catalog import get_catalog
+
+FIELD_WEIGHTS = {'name': 3.0, 'benefits': 1.5, 'description': 1.0}
+MIN_SIMILARITY = 0.45
+# Shorter query words only match as prefixes
+MIN_TRIGRAM_WORD = 3
+STOPWORDS = frozenset(('a', 'an', 'and', 'in', 'is', 'of', 'the', 'with'))
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokens(text):
+    """Lowercase words of ``text``"""
+    return _WORD_RE.findall((text or '').lower())
+
+
+def words(text):
+    """Lowercase words of ``text`` without stopwords"""
+    return [word for word in tokens(text) if word not in STOPWORDS]
+
+
+def trigrams(word):
+    padded = f'  {word} '
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+def food_fields(food):
+    """``(field, text)`` pairs indexed for a catalog food"""
+    benefits = food.benefits if isinstance(food.benefits, (list, tuple)) else [food.benefits or '']
+    return (
+        ('name', food.name),
+        ('benefits', ' '.join(str(benefit) for benefit in benefits)),
+        ('description', food.description),
+    )
+
+
+def rank_rows(rows, scores):
+    """``rows`` ordered by their ``scores`` (catalog row order), best first; ties keep their order"""
+    return rows[np.argsort(-scores[rows], kind='stable')]
+
+
+class FoodSearchIndex:
+    """Trigram index over the foods of one catalog snapshot"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        postings = {}
+        stopword_postings = {}
+        for row, food in enumerate(catalog.foods):
+            for field, text in food_fields(food):
+                weight = FIELD_WEIGHTS[field]
+                for word in set(tokens(text)):
+                    target = stopword_postings if word in STOPWORDS else postings
+                    rows = target.setdefault(word, {})
+                    rows[row] = max(rows.get(row, 0.0), weight)
+
+        self.vocabulary = sorted(postings)
+        self.rows = [np.fromiter(postings[word], dtype=np.intp) for word in self.vocabulary]
+        self.weights = [np.fromiter(postings[word].values(), dtype=float) for word in self.vocabulary]
+        self.trigram_counts = np.array([len(trigrams(word)) for word in self.vocabulary])
+        self.by_trigram = {}
+        for index, word in enumerate(self.vocabulary):
+            for trigram in trigrams(word):
+                self.by_trigram.setdefault(trigram, []).append(index)
+        self.stopwords = {
+            word: (np.fromiter(rows, dtype=np.intp), np.fromiter(rows.values(), dtype=float))
+            for word, rows in stopword_postings.items()
+        }
+
+    def matches(self, word):
+        """``{vocabulary index: similarity}`` of the indexed words matching ``word``"""
+        found = {}
+        # Prefix matches, found by bisecting the sorted vocabulary
+        start = bisect.bisect_left(self.vocabulary, word)
+        for index in range(start, len(self.vocabulary)):
+            if not self.vocabulary[index].startswith(word):
+                break
+            found[index] = 1.0 if len(self.vocabulary[index]) == len(word) else 0.9
+        if len(word) < MIN_TRIGRAM_WORD:
+            return found
+
+        query = trigrams(word)
+        shared = Counter(index for trigram in query for index in self.by_trigram.get(trigram, ()))
+        for index, count in shared.items():
+            similarity = 2.0 * count / (len(query) + self.trigram_counts[index])
+            if similarity >= MIN_SIMILARITY and similarity > found.get(index, 0.0):
+                found[index] = similarity
+        return found
+
+    def postings(self, word, stopwords=False):
+        """``(rows, weights)`` of the foods matching ``word``, weights scaled by similarity
+
+        With ``stopwords``, foods containing ``word`` as a stopword match too.
+        """
+        for index, similarity in self.matches(word).items():
+            yield self.rows[index], similarity * self.weights[index]
+        if stopwords and word in self.stopwords:
+            yield self.stopwords[word]
+
+    def scores(self, query):
+        """Score of every food (catalog row order) for ``query``; 0 where it does not match"""
+        total = np.zeros(len(self.catalog.foods))
+        query_words = list(dict.fromkeys(words(query)))
+        stopwords = not query_words
+        if stopwords:
+            # Only stopwords: search for them rather than return nothing
+            query_words = list(dict.fromkeys(tokens(query)))
+        if not query_words:
+            return total
+        for word in query_words:
+            best = np.zeros(len(total))
+            for rows, weights in self.postings(word, stopwords):
+                best[rows] = np.maximum(best[rows], weights)
+            if not best.any():
+                return np.zeros(len(total))
+            # Every word must match
+            total = np.where(best > 0, total + best, -np.inf)
+        return np.maximum(total, 0.0)
+
+    def rank(self, query, mask=None):
+        """``(rows, scores)`` of the matching foods, best first, optionally within ``mask``"""
+        scores = self.scores(query)
+        matched = scores > 0
+        if mask is not None:
+            matched &= mask
+        rows = rank_rows(np.flatnonzero(matched), scores)
+        return rows, scores[rows]
+
+    def search(self, query, limit=None):
+        """Matching foods as ``(food, score)`` pairs, best first"""
+        rows, scores = self.rank(query)
+        return [(self.catalog.foods[row], float(score)) for row, score in zip(rows[:limit], scores[:limit])]
+
+
+_lock = threading.Lock()
+_index = None
+
+
+def get_search_index(catalog=None):
+    """The search index of ``catalog`` (default: the current catalog), built once per version"""
+    global _index
+    catalog = catalog or get_catalog()
+    index = _index
+    if index is not None and index.catalog is catalog:
+        return index
+    with _lock:
+        if _index is None or _index.catalog is not catalog:
+            _index = FoodSearchIndex(catalog)
+        return _index
+
+
+def search_foods(query, limit=None):
+    """Ranked ``(food, score)`` matches for ``query`` in the current catalog"""
+    return get_search_index().search(query, limit)
@@ -0,0 +1,101 @@
+"""
+NutriVeda food substitutes
+
+Finds the foods whose nutrient profile is closest to a given food, using the
+full Book1.csv nutrient vector kept in the food catalog snapshot
+(``backend.catalog``). The normalized matrix is built once per catalog
+version, so a lookup is one matrix-vector product.
+
+* Values are log-scaled (``sign(x) * log1p(|x|)``) so a few very large
+  values do not dominate, then standardized per column over the foods that
+  have them. Unknown values become the column mean (0).
+* Rows are scaled to unit length: the product with a food's row is the cosine
+  similarity of every food to it, between -1 and 1.
+* Candidates can be limited to foods compatible with a dosha or constitution
+  (``FoodFeatures.compatible``). The food itself is never returned.
+"""
+
+import threading
+
+import numpy as np
+
+from .catalog import get_catalog
+from .food_features import parse_constitution
+
+DEFAULT_SUBSTITUTES = 5
+MAX_SUBSTITUTES = 50
+
+
+def normalize_vectors(vectors):
+    """Unit-length rows of standardized, log-scaled ``vectors`` (NaN = unknown)"""
+    scaled = np.sign(vectors) * np.log1p(np.abs(vectors))
+    known = ~np.isnan(scaled)
+    counts = known.sum(axis=0)
+    filled = np.where(known, scaled, 0.0)
+    means = filled.sum(axis=0) / np.maximum(counts, 1)
+    deviations = np.where(known, scaled - means, 0.0)
+    stds = np.sqrt((deviations ** 2).sum(axis=0) / np.maximum(counts, 1))
+    standardized = deviations / np.where(stds > 0, stds, 1.0)
+    norms = np.linalg.norm(standardized, axis=1, keepdims=True)
+    return standardized / np.where(norms > 0, norms, 1.0)
+
+
+class SubstituteIndex:
+    """Normalized nutrient matrix of one catalog snapshot"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.matrix = normalize_vectors(catalog.nutrient_vectors)
+
+    def similarities(self, food_id):
+        """Cosine similarity of every food (catalog row order) to ``food_id``"""
+        return self.matrix @ self.matrix[self.catalog.index[food_id]]
+
+    def substitutes(self, food_id, limit=DEFAULT_SUBSTITUTES, constitution=None):
+        """The ``limit`` foods most similar to ``food_id`` as ``(food, similarity)`` pairs
+
+        Raises KeyError for an unknown food.
+        """
+        similarity = self.similarities(food_id)
+        candidates = np.ones(len(similarity), dtype=bool)
+        if constitution:
+            candidates &= self.catalog.features.compatible(constitution)
+        candidates[self.catalog.index[food_id]] = False
+        rows = np.flatnonzero(candidates)
+        if limit < len(rows):
+            rows = rows[np.argpartition(-similarity[rows], limit - 1)[:limit]]
+        # Best first; ties keep catalog order
+        rows = rows[np.lexsort((rows, -similarity[rows]))]
+        return [(self.catalog.foods[row], float(similarity[row])) for row in rows]
+
+
+def parse_substitute_params(params):
+    """``(limit, constitution)`` from ``?k=`` and ``?dosha=``; raises ValueError"""
+    k = params.get('k', '')
+    try:
+        limit = int(k) if k != '' else DEFAULT_SUBSTITUTES
+    except ValueError as e:
+        raise ValueError('k must be an integer') from e
+    if not 1 <= limit <= MAX_SUBSTITUTES:
+        raise ValueError(f'k must be between 1 and {MAX_SUBSTITUTES}')
+    constitution = params.get('dosha', '').strip() or None
+    if constitution and not parse_constitution(constitution):
+        raise ValueError(f"Unknown dosha '{constitution}'; use vata, pitta, kapha or a combination")
+    return limit, constitution
+
+
+_lock = threading.Lock()
+_index = None
+
+
+def get_substitute_index(catalog=None):
+    """The substitute index of ``catalog`` (default: the current catalog), built once per version"""
+    global _index
+    catalog = catalog or get_catalog()
+    index = _index
+    if index is not None and index.catalog is catalog:
+        return index
+    with _lock:
+        if _index is None or _index.catalog is not catalog:
+            _index = SubstituteIndex(catalog)
+        return _index
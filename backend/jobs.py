@@ -0,0 +1,268 @@
+"""
+NutriVeda background jobs
+
+A small job queue stored in the ``Job`` table, so it works with SQLite alone
+and needs no broker. Views enqueue work and return at once; one or more
+``manage.py run_jobs`` processes claim and run it.
+
+* Claiming is a conditional UPDATE (``status='queued'`` -> ``'running'``), so
+  several worker processes can poll the same table safely.
+* JOB_KIND_CONCURRENCY caps how many jobs of one kind run at the same time
+  across all workers.
+* Failed jobs are retried with exponential backoff (JOB_RETRY_DELAY seconds,
+  doubled per attempt) until ``max_attempts``. ValueError and TypeError mean
+  the payload is invalid, so those fail at once.
+* Running jobs send a heartbeat with every progress update, and from a
+  background thread every JOB_TIMEOUT / 4 seconds while the handler runs,
+  so long steps without progress calls are not mistaken for lost jobs.
+  Jobs whose heartbeat is older than JOB_TIMEOUT seconds are treated as
+  lost and requeued.
+
+Handlers are ``handler(payload, progress)`` callables listed in JOB_HANDLERS.
+``progress(fraction, message='')`` records progress; the return value must be
+JSON-serializable and becomes ``Job.result``.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection
+from django.db.models import Count, F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+JOB_HANDLERS = {
+    'cohort_charts': 'backend.tasks.cohort_charts',
+    'import_foods': 'backend.tasks.import_foods',
+    'train_models': 'backend.tasks.train_models',
+}
+
+# Jobs of one kind allowed to run at once across all workers (None = no limit)
+DEFAULT_KIND_CONCURRENCY = {
+    'cohort_charts': 1,
+    'import_foods': 1,
+    'train_models': 1,
+}
+
+DEFAULT_RETRY_DELAY = 30
+DEFAULT_TIMEOUT = 600
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Errors that another attempt will not fix
+PERMANENT_ERRORS = (ValueError, TypeError)
+
+# Seconds between progress writes for one job
+PROGRESS_INTERVAL = 0.5
+# Lower bound for the background heartbeat period
+MIN_HEARTBEAT_INTERVAL = 1.0
+
+
+class JobError(ValueError):
+    """Raised for an invalid job request"""
+
+
+def kind_concurrency(kind):
+    limits = {**DEFAULT_KIND_CONCURRENCY, **getattr(settings, 'JOB_KIND_CONCURRENCY', {})}
+    return limits.get(kind)
+
+
+def enqueue(kind, payload=None, max_attempts=None):
+    """Queue a job of ``kind`` and return it"""
+    if kind not in JOB_HANDLERS:
+        raise JobError(f"Unknown job kind '{kind}'; choose from {', '.join(JOB_HANDLERS)}")
+    if payload is not None and not isinstance(payload, dict):
+        raise JobError('payload must be an object')
+    if max_attempts is None:
+        max_attempts = getattr(settings, 'JOB_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+    return Job.objects.create(kind=kind, payload=payload or {}, max_attempts=max(int(max_attempts), 1))
+
+
+def requeue_lost_jobs(now=None):
+    """Put running jobs whose worker stopped sending heartbeats back in the queue"""
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=getattr(settings, 'JOB_TIMEOUT', DEFAULT_TIMEOUT))
+    lost = Job.objects.filter(status=RUNNING, heartbeat_at__lt=cutoff)
+    lost.filter(attempts__lt=F('max_attempts')).update(
+        status=QUEUED, worker='', error='Worker stopped responding', run_after=now
+    )
+    lost.update(status=FAILED, error='Worker stopped responding', finished_at=now)
+
+
+def claim_job(worker):
+    """Atomically move the next runnable job to ``running`` and return it, or None"""
+    now = timezone.now()
+    requeue_lost_jobs(now)
+    running = dict(
+        Job.objects.filter(status=RUNNING).values_list('kind').annotate(count=Count('id'))
+    )
+    candidates = (
+        Job.objects.filter(status=QUEUED, run_after__lte=now)
+        .order_by('run_after', 'created_at')
+        .values_list('id', 'kind')[:20]
+    )
+    for job_id, kind in candidates:
+        limit = kind_concurrency(kind)
+        if limit is not None and running.get(kind, 0) >= limit:
+            continue
+        claimed = Job.objects.filter(id=job_id, status=QUEUED).update(
+            status=RUNNING, worker=worker, attempts=F('attempts') + 1,
+            started_at=now, heartbeat_at=now, progress=0, message=''
+        )
+        if not claimed:
+            continue  # another worker got it first
+        if limit is not None and not _within_limit(job_id, kind, limit):
+            # Lost a race for the last slot of this kind; give the job back
+            Job.objects.filter(id=job_id).update(
+                status=QUEUED, worker='', attempts=F('attempts') - 1, started_at=None, heartbeat_at=None
+            )
+            continue
+        return Job.objects.get(id=job_id)
+    return None
+
+
+def _within_limit(job_id, kind, limit):
+    """Whether ``job_id`` is among the first ``limit`` running jobs of ``kind``"""
+    first = (
+        Job.objects.filter(status=RUNNING, kind=kind)
+        .order_by('started_at', 'id')
+        .values_list('id', flat=True)[:limit]
+    )
+    return job_id in set(first)
+
+
+class ProgressReporter:
+    """The ``progress`` callable handed to job handlers; also the job heartbeat"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._last = 0.0
+
+    def __call__(self, fraction, message=''):
+        now = time.monotonic()
+        if now - self._last < PROGRESS_INTERVAL and fraction < 1:
+            return
+        self._last = now
+        Job.objects.filter(id=self.job_id).update(
+            progress=min(max(float(fraction), 0.0), 1.0),
+            message=str(message)[:200],
+            heartbeat_at=timezone.now()
+        )
+
+
+class Heartbeat:
+    """Refreshes ``heartbeat_at`` of a running job from a background thread"""
+
+    def __init__(self, job_id, interval=None):
+        self.job_id = job_id
+        if interval is None:
+            interval = getattr(settings, 'JOB_TIMEOUT', DEFAULT_TIMEOUT) / 4
+        self.interval = max(interval, MIN_HEARTBEAT_INTERVAL)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stopped.wait(self.interval):
+                try:
+                    Job.objects.filter(id=self.job_id, status=RUNNING).update(heartbeat_at=timezone.now())
+                except DatabaseError as e:
+                    logger.warning('Heartbeat of job %s failed: %s', self.job_id, e)
+        finally:
+            # Threads get their own database connection
+            connection.close()
+
+
+def run_job(job):
+    """Run a claimed job and record its outcome"""
+    try:
+        handler = import_string(JOB_HANDLERS[job.kind])
+        with Heartbeat(job.id):
+            result = handler(job.payload, ProgressReporter(job.id))
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+        now = timezone.now()
+        if isinstance(e, PERMANENT_ERRORS) or job.attempts >= job.max_attempts:
+            logger.warning('Job %s (%s) failed: %s', job.id, job.kind, error)
+            Job.objects.filter(id=job.id).update(status=FAILED, error=error, finished_at=now)
+        else:
+            delay = getattr(settings, 'JOB_RETRY_DELAY', DEFAULT_RETRY_DELAY) * 2 ** (job.attempts - 1)
+            logger.info('Job %s (%s) will be retried in %ss: %s', job.id, job.kind, delay, error)
+            Job.objects.filter(id=job.id).update(
+                status=QUEUED, error=error, worker='', run_after=now + timedelta(seconds=delay)
+            )
+        return False
+
+    Job.objects.filter(id=job.id).update(
+        status=SUCCEEDED, result=result, progress=1.0, error='', finished_at=timezone.now()
+    )
+    return True
+
+
+class Worker:
+    """Runs queued jobs on ``concurrency`` threads until stopped
+
+    With ``burst`` the worker exits once the queue has no runnable jobs.
+    """
+
+    def __init__(self, concurrency=1, poll_interval=2.0, burst=False, name=None):
+        self.concurrency = max(concurrency, 1)
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = threading.Event()
+        self.processed = 0
+        self._lock = threading.Lock()
+
+    def run(self):
+        threads = [
+            threading.Thread(target=self._loop, args=(f'{self.name}/{index}',), daemon=True)
+            for index in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            # Let running jobs finish; claim nothing new
+            self.stopping.set()
+            for thread in threads:
+                thread.join()
+        return self.processed
+
+    def _loop(self, worker):
+        while not self.stopping.is_set():
+            close_old_connections()
+            job = claim_job(worker)
+            if job is None:
+                if self.burst:
+                    break
+                self.stopping.wait(self.poll_interval)
+                continue
+            run_job(job)
+            with self._lock:
+                self.processed += 1
+        close_old_connections()
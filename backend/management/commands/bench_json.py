@@ -0,0 +1,49 @@
+"""
+Micro-benchmark the API JSON backends on real payloads
+
+    python manage.py bench_json --repeat 50
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.models import DietChart, FoodItem, Patient
+from backend.responses import JSON_BACKENDS
+from backend.serializers import DIET_CHART_SERIALIZER, FOOD_SERIALIZER, PATIENT_SERIALIZER
+
+
+def build_payload(model, serializer, order_by='id'):
+    """Build the same envelope the list endpoint would return"""
+    projection = serializer.compile()
+    rows = model.objects.values_list(*projection.columns).order_by(order_by)
+    data = projection.serialize(rows)
+    return {'success': True, 'data': data, 'total': len(data)}
+
+
+class Command(BaseCommand):
+    help = 'Compare the available JSON encoder backends on the list API payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Encodes per backend and payload (best time is reported)')
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        payloads = {
+            'food-database': build_payload(FoodItem, FOOD_SERIALIZER),
+            'diet-charts': build_payload(DietChart, DIET_CHART_SERIALIZER, '-created_at'),
+            'patients': build_payload(Patient, PATIENT_SERIALIZER, '-created_at'),
+        }
+
+        self.stdout.write(f"{'payload':<16}{'rows':>8}{'backend':>10}{'bytes':>12}{'best ms':>10}")
+        for name, payload in payloads.items():
+            for backend, dumps in JSON_BACKENDS.items():
+                best = float('inf')
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    body = dumps(payload)
+                    best = min(best, time.perf_counter() - start)
+                self.stdout.write(
+                    f"{name:<16}{payload['total']:>8}{backend:>10}{len(body):>12}{best * 1000:>10.2f}"
+                )
@@ -0,0 +1,58 @@
+"""
+Export the food catalog as a memory-mapped artifact for worker processes
+
+    python manage.py build_food_catalog
+    python manage.py build_food_catalog --output /var/lib/nutriveda/food_catalog
+
+Run it before starting the workers (start_server.py does). The artifact of
+the current version is always rebuilt, so one left from another database is
+not reused; artifacts of older versions are removed unless --keep-old is
+given. A database that cannot be read yet (not migrated) is reported and
+skipped; the workers then load the catalog from the database themselves.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from backend.catalog import FOOD_FIELDS, FoodCatalog, FoodRecord, current_stamp
+from backend.catalog_artifact import prune_artifacts, write_artifact
+from backend.models import FoodItem
+
+
+class Command(BaseCommand):
+    help = 'Write the columnar food catalog artifact for the current food table version'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output',
+                            help='Artifact directory (defaults to FOOD_CATALOG_ARTIFACT_DIR)')
+        parser.add_argument('--keep-old', action='store_true',
+                            help='Keep artifacts of older food table versions')
+
+    def handle(self, *args, **options):
+        directory = options['output'] or getattr(settings, 'FOOD_CATALOG_ARTIFACT_DIR', None)
+        if not directory:
+            raise CommandError('Set FOOD_CATALOG_ARTIFACT_DIR or pass --output')
+
+        try:
+            version, source = current_stamp()
+            rows = FoodItem.objects.order_by('id').values_list(*FOOD_FIELDS)
+            catalog = FoodCatalog((FoodRecord(*row) for row in rows), version, source=source)
+        except DatabaseError as e:
+            self.stderr.write(self.style.WARNING(f'Skipping the food catalog artifact: {e} (run migrate first)'))
+            return
+        if not catalog.foods:
+            self.stdout.write('No foods to export')
+            return
+        try:
+            path = write_artifact(
+                directory, version, source, FOOD_FIELDS, catalog.foods, catalog.arrays(), replace=True
+            )
+        except OSError as e:
+            raise CommandError(f'Could not write {directory}: {e}') from e
+        removed = 0 if options['keep_old'] else prune_artifacts(directory, version)
+
+        self.stdout.write(
+            f'Food catalog v{version}: {len(catalog.foods)} foods at {path}'
+            + (f', removed {removed} old artifact(s)' if removed else '')
+        )
@@ -0,0 +1,53 @@
+"""
+Generate diet charts for a cohort of patients across a process pool
+
+    python manage.py generate_cohort_charts --prakriti Vata --age-min 30 --workers 4
+    python manage.py generate_cohort_charts --patients 1,2,3 --calories 1800 --goal "Weight Loss"
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.cohort import CohortError, generate_cohort_charts, select_cohort
+
+
+class Command(BaseCommand):
+    help = 'Generate and store diet charts for a list of patients or a patient filter'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', default='',
+                            help='Comma-separated patient IDs')
+        parser.add_argument('--q', default='', help='Name / phone / email search')
+        parser.add_argument('--prakriti', default='')
+        parser.add_argument('--gender', default='')
+        parser.add_argument('--age-min', type=int)
+        parser.add_argument('--age-max', type=int)
+        parser.add_argument('--calories', type=int, default=2000, help='Target calories per chart')
+        parser.add_argument('--goal', default='Maintenance')
+        parser.add_argument('--duration', type=int, default=30, help='Chart duration in days')
+        parser.add_argument('--workers', type=int,
+                            help='Process pool size (defaults to and is capped at COHORT_WORKERS)')
+
+    def handle(self, *args, **options):
+        patient_ids = [value for value in options['patients'].split(',') if value.strip()]
+        filters = {
+            'q': options['q'],
+            'prakriti': options['prakriti'],
+            'gender': options['gender'],
+            'age_min': options['age_min'],
+            'age_max': options['age_max'],
+        }
+        try:
+            patients, missing = select_cohort(patient_ids, filters)
+            result = generate_cohort_charts(
+                patients, options['calories'], options['goal'], options['duration'], options['workers']
+            )
+        except CohortError as e:
+            raise CommandError(str(e)) from e
+
+        if missing:
+            self.stderr.write(f"Unknown patient IDs skipped: {', '.join(map(str, missing))}")
+        self.stdout.write(
+            f"Created {result['created']} charts in {result['seconds']:.2f}s "
+            f"({result['charts_per_second'] or 0:.1f} charts/s, {result['workers']} workers; "
+            f"generate {result['generate_seconds']:.2f}s, write {result['write_seconds']:.2f}s)"
+        )
@@ -0,0 +1,32 @@
+"""
+Run queued background jobs
+
+    python manage.py run_jobs --concurrency 2
+    python manage.py run_jobs --burst    # exit when the queue is empty
+
+Run it from the project directory; start several for more parallelism.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = 'Claim and run jobs from the Job table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int,
+                            help='Jobs run at once by this process (defaults to JOB_WORKER_CONCURRENCY)')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to wait when the queue is empty')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once there are no runnable jobs')
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency'] or getattr(settings, 'JOB_WORKER_CONCURRENCY', 1)
+        worker = Worker(concurrency, options['poll_interval'], options['burst'])
+        self.stdout.write(f'Worker {worker.name} running {concurrency} job(s) at a time')
+        processed = worker.run()
+        self.stdout.write(f'Processed {processed} job(s)')
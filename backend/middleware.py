@@ -0,0 +1,160 @@
+"""
+NutriVeda middleware
+
+APICompressionMiddleware compresses JSON responses under ``/api/`` with brotli
+(when the ``brotli`` package is installed) or gzip, negotiated from the
+Accept-Encoding header. Settings, all optional:
+
+* API_COMPRESSION_MIN_SIZE      - smallest body worth compressing (bytes)
+* API_GZIP_LEVEL                - zlib level 1-9
+* API_BROTLI_QUALITY            - brotli quality 0-11
+* API_COMPRESSION_CACHE_ENTRIES - compressed bodies kept per process
+
+Compressed bytes are cached by (encoding, path, ETag) - or by a digest of the
+body when there is no ETag - so an unchanged payload is compressed once.
+"""
+
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def parse_accept_encoding(header):
+    """Return {coding: q} from an Accept-Encoding header"""
+    codings = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def choose_encoding(header):
+    """Pick the best supported content coding the client accepts, or None"""
+    codings = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        q = codings.get(coding, codings.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressedBodyCache:
+    """Small thread-safe LRU of compressed response bodies"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key, body):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class APICompressionMiddleware:
+    """Negotiated gzip/brotli compression for API responses"""
+
+    path_prefix = '/api/'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'API_COMPRESSION_MIN_SIZE', 1024)
+        self.gzip_level = getattr(settings, 'API_GZIP_LEVEL', 6)
+        self.brotli_quality = getattr(settings, 'API_BROTLI_QUALITY', 5)
+        self.cache = CompressedBodyCache(getattr(settings, 'API_COMPRESSION_CACHE_ENTRIES', 128))
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not request.path.startswith(self.path_prefix):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.status_code != 200 or response.has_header('Content-Encoding'):
+            return response
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = self.compress_stream(response.streaming_content, encoding)
+            del response.headers['Content-Length']
+        else:
+            content = response.content
+            if len(content) < self.min_size:
+                return response
+            etag = response.get('ETag')
+            if etag:
+                key = (encoding, request.path, etag)
+            else:
+                key = (encoding, hashlib.blake2b(content, digest_size=16).digest())
+            compressed = self.cache.get(key)
+            if compressed is None:
+                compressed = self.compress(content, encoding)
+                self.cache.set(key, compressed)
+            if len(compressed) >= len(content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The compressed body is no longer byte-for-byte the same representation
+        etag = response.get('ETag')
+        if etag and not etag.startswith('W/'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def compress(self, content, encoding):
+        if encoding == 'br':
+            return brotli.compress(content, quality=self.brotli_quality)
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress(content) + compressor.flush()
+
+    def compress_stream(self, chunks, encoding):
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            for chunk in chunks:
+                data = compressor.process(chunk)
+                if data:
+                    yield data
+            yield compressor.finish()
+        else:
+            compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            for chunk in chunks:
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+            yield compressor.flush()
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0002_alter_dietchart_id_alter_doshaassessment_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['created_at', 'id'], name='patient_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:43
+
+from django.db import migrations, models, OperationalError
+
+
+# External-content FTS5 index over the patient search columns, kept in sync
+# by triggers. SQLite drops triggers when Django rebuilds a table, so any later
+# migration that alters backend_patient columns must recreate them.
+PATIENT_FTS_SQL = [
+    """
+    CREATE VIRTUAL TABLE backend_patient_fts USING fts5(
+        name, phone, email, content='backend_patient', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER backend_patient_fts_ai AFTER INSERT ON backend_patient BEGIN
+        INSERT INTO backend_patient_fts(rowid, name, phone, email)
+        VALUES (new.id, new.name, new.phone, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER backend_patient_fts_ad AFTER DELETE ON backend_patient BEGIN
+        INSERT INTO backend_patient_fts(backend_patient_fts, rowid, name, phone, email)
+        VALUES ('delete', old.id, old.name, old.phone, old.email);
+    END
+    """,
+    """
+    CREATE TRIGGER backend_patient_fts_au AFTER UPDATE OF name, phone, email ON backend_patient BEGIN
+        INSERT INTO backend_patient_fts(backend_patient_fts, rowid, name, phone, email)
+        VALUES ('delete', old.id, old.name, old.phone, old.email);
+        INSERT INTO backend_patient_fts(rowid, name, phone, email)
+        VALUES (new.id, new.name, new.phone, new.email);
+    END
+    """,
+    "INSERT INTO backend_patient_fts(backend_patient_fts) VALUES ('rebuild')",
+]
+
+DROP_PATIENT_FTS_SQL = [
+    "DROP TRIGGER IF EXISTS backend_patient_fts_ai",
+    "DROP TRIGGER IF EXISTS backend_patient_fts_ad",
+    "DROP TRIGGER IF EXISTS backend_patient_fts_au",
+    "DROP TABLE IF EXISTS backend_patient_fts",
+]
+
+
+def create_patient_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            for statement in PATIENT_FTS_SQL:
+                cursor.execute(statement)
+        except OperationalError:
+            # SQLite built without FTS5; search falls back to LIKE prefix lookups
+            for statement in DROP_PATIENT_FTS_SQL:
+                cursor.execute(statement)
+
+
+def drop_patient_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in DROP_PATIENT_FTS_SQL:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0004_tableversion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['prakriti', 'age'], name='patient_prakriti_age_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['gender', 'age'], name='patient_gender_age_idx'),
+        ),
+        migrations.RunPython(create_patient_fts, drop_patient_fts),
+    ]
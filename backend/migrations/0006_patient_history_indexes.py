@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0005_patient_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dietchart',
+            index=models.Index(fields=['patient', 'created_at'], name='dietchart_patient_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='doshaassessment',
+            index=models.Index(fields=['patient', 'created_at'], name='dosha_patient_created_idx'),
+        ),
+    ]
@@ -0,0 +1,347 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:20
+
+from datetime import datetime, timedelta
+
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+# A frozen copy of the compact chart format (version 2) as defined in
+# backend.chart_storage when this migration was written, so the conversion
+# does not change with the application code. It reads the food table as it
+# is at migration time through the historical model.
+
+COMPACT_VERSION = 2
+FALLBACK = 'fallback'
+
+MEAL_SLOTS = (
+    ('Early Morning', '6:00 AM'),
+    ('Breakfast', '8:00 AM'),
+    ('Mid-Morning Snack', '11:00 AM'),
+    ('Lunch', '1:00 PM'),
+    ('Evening Snack', '4:00 PM'),
+    ('Dinner', '7:00 PM'),
+    ('Bedtime', '9:00 PM'),
+)
+SLOT_INDEX = {slot: index for index, slot in enumerate(MEAL_SLOTS)}
+
+GUIDELINE_KEYS = ('guidelines', 'seasonalRecommendations', 'doNotEat')
+GUIDELINE_SETS = ('vata', 'pitta', 'kapha', 'default')
+MEAL_KEYS = {'name', 'time', 'items', 'totalCalories'}
+DAY_KEYS = {'day', 'date', 'meals', 'totalCalories'}
+
+# Food columns chart items are built from
+FOOD_FIELDS = ('id', 'name', 'serving', 'calories', 'virya', 'rasa', 'category')
+
+GUIDELINES = {
+    'vata': [
+        'Eat warm, cooked foods',
+        'Include sweet, sour, and salty tastes',
+        'Avoid cold, raw foods',
+        'Maintain regular meal times',
+        'Include healthy fats and oils'
+    ],
+    'pitta': [
+        'Eat cooling, calming foods',
+        'Include sweet, bitter, and astringent tastes',
+        'Avoid spicy, hot foods',
+        'Eat at regular intervals',
+        'Include fresh fruits and vegetables'
+    ],
+    'kapha': [
+        'Eat light, warm foods',
+        'Include pungent, bitter, and astringent tastes',
+        'Avoid heavy, oily foods',
+        'Eat smaller portions',
+        'Include plenty of vegetables and spices'
+    ],
+}
+DEFAULT_GUIDELINES = [
+    'Eat balanced, nutritious meals',
+    'Maintain regular meal times',
+    'Include variety in your diet',
+    'Stay hydrated'
+]
+SEASONAL_RECOMMENDATIONS = [
+    'Include seasonal fruits and vegetables',
+    'Adjust spices according to season',
+    'Stay hydrated with herbal teas',
+    'Modify cooking methods for seasonal needs'
+]
+FOODS_TO_AVOID = {
+    'vata': ['Cold foods', 'Raw vegetables', 'Excess bitter taste', 'Dry foods'],
+    'pitta': ['Spicy foods', 'Hot beverages', 'Sour foods', 'Fried foods'],
+    'kapha': ['Heavy foods', 'Oily foods', 'Sweet foods', 'Cold drinks'],
+}
+DEFAULT_FOODS_TO_AVOID = ['Processed foods', 'Excess sugar', 'Artificial additives']
+
+# Fallback items per meal; stored items keep their own calories
+FALLBACK_FOODS = {
+    'Early Morning': [
+        {'name': 'Warm Water with Lemon', 'quantity': '1 glass', 'calories': 0, 'virya': 'Hot'},
+        {'name': 'Soaked Almonds', 'quantity': '5-6 pieces', 'calories': 0, 'virya': 'Hot'}
+    ],
+    'Breakfast': [
+        {'name': 'Oatmeal with Fruits', 'quantity': '1 bowl', 'calories': 0, 'virya': 'Cold'},
+        {'name': 'Herbal Tea', 'quantity': '1 cup', 'calories': 0, 'virya': 'Hot'}
+    ],
+    'Mid-Morning Snack': [
+        {'name': 'Green Tea', 'quantity': '1 cup', 'calories': 0, 'virya': 'Hot'},
+        {'name': 'Mixed Nuts', 'quantity': '10-12 pieces', 'calories': 0, 'virya': 'Hot'}
+    ],
+    'Lunch': [
+        {'name': 'Dal with Rice', 'quantity': '1 plate', 'calories': 0, 'virya': 'Hot'},
+        {'name': 'Vegetable Curry', 'quantity': '1 serving', 'calories': 0, 'virya': 'Hot'},
+        {'name': 'Chapati', 'quantity': '2 pieces', 'calories': 0, 'virya': 'Hot'}
+    ],
+    'Evening Snack': [
+        {'name': 'Herbal Tea', 'quantity': '1 cup', 'calories': 0, 'virya': 'Hot'},
+        {'name': 'Roasted Chana', 'quantity': '1 small bowl', 'calories': 0, 'virya': 'Hot'}
+    ],
+    'Dinner': [
+        {'name': 'Chapati with Sabzi', 'quantity': '2 pieces', 'calories': 0, 'virya': 'Hot'},
+        {'name': 'Dal', 'quantity': '1 bowl', 'calories': 0, 'virya': 'Hot'}
+    ],
+    'Bedtime': [
+        {'name': 'Warm Milk with Turmeric', 'quantity': '1 glass', 'calories': 0, 'virya': 'Hot'}
+    ],
+}
+DEFAULT_FALLBACK_FOODS = [{'name': 'Balanced Meal', 'quantity': '1 serving', 'calories': 0, 'virya': 'Hot'}]
+
+
+class Foods:
+    """The foods chart items refer to, by ID and by name"""
+
+    def __init__(self, apps):
+        FoodItem = apps.get_model('backend', 'FoodItem')
+        self.by_id = {}
+        self.by_name = {}
+        for row in FoodItem.objects.order_by('id').values(*FOOD_FIELDS):
+            self.by_id[row['id']] = row
+            self.by_name[row['name']] = row
+
+
+def normalize_constitution(prakriti):
+    return prakriti.lower() if prakriti else 'vata'
+
+
+def guideline_set(name):
+    return {
+        'guidelines': list(GUIDELINES.get(name, DEFAULT_GUIDELINES)),
+        'seasonalRecommendations': list(SEASONAL_RECOMMENDATIONS),
+        'doNotEat': list(FOODS_TO_AVOID.get(name, DEFAULT_FOODS_TO_AVOID)),
+    }
+
+
+def fallback_foods(meal_name):
+    return FALLBACK_FOODS.get(meal_name, DEFAULT_FALLBACK_FOODS)
+
+
+def food_item(food, quantity):
+    return {
+        'name': food['name'],
+        'quantity': f"{quantity:.1f} {food['serving']}",
+        'calories': int(food['calories'] * quantity),
+        'virya': food['virya'],
+        'rasa': food['rasa'],
+        'category': food['category']
+    }
+
+
+def is_compact(chart_data):
+    return isinstance(chart_data, dict) and chart_data.get('v') == COMPACT_VERSION
+
+
+def compact_chart(chart_data, foods):
+    if is_compact(chart_data) or not isinstance(chart_data, dict) or 'meals' not in chart_data:
+        return chart_data
+    try:
+        start_date = datetime.strptime(chart_data['date'], '%Y-%m-%d').date()
+    except (KeyError, TypeError, ValueError):
+        return chart_data
+
+    compact = {'v': COMPACT_VERSION}
+    guidelines = match_guideline_set(chart_data)
+    days = chart_data.get('days')
+    for key, value in chart_data.items():
+        if key == 'meals':
+            if not days or not isinstance(days[0], dict) or value != days[0].get('meals'):
+                compact['meals'] = [compact_meal(meal, foods) for meal in value]
+        elif key == 'days':
+            compact['days'] = compact_days(value, start_date, foods)
+        elif guidelines and key in GUIDELINE_KEYS:
+            compact.setdefault('guidelineSet', guidelines)
+        else:
+            compact[key] = value
+    return compact
+
+
+def hydrate_chart(chart_data, foods):
+    if not is_compact(chart_data):
+        return chart_data
+    start_date = datetime.strptime(chart_data['date'], '%Y-%m-%d').date()
+
+    data = {}
+    for key, value in chart_data.items():
+        if key == 'v':
+            continue
+        elif key == 'meals':
+            data['meals'] = [hydrate_meal(meal, foods) for meal in value]
+        elif key == 'days':
+            data['days'] = [hydrate_day(day, index, start_date, foods) for index, day in enumerate(value)]
+        elif key == 'guidelineSet':
+            data.update(guideline_set(value))
+        else:
+            data[key] = value
+    if 'meals' not in data:
+        data['meals'] = data['days'][0]['meals']
+    return data
+
+
+def match_guideline_set(chart_data):
+    if any(key not in chart_data for key in GUIDELINE_KEYS):
+        return None
+    own = normalize_constitution(chart_data.get('constitution'))
+    for name in dict.fromkeys((own,) + GUIDELINE_SETS):
+        lists = guideline_set(name)
+        if all(chart_data[key] == lists[key] for key in GUIDELINE_KEYS):
+            return name
+    return None
+
+
+def compact_days(days, start_date, foods):
+    compact = []
+    for index, day in enumerate(days):
+        if not isinstance(day, dict) or not isinstance(day.get('meals'), list):
+            compact.append(day)
+            continue
+        meals = [compact_meal(meal, foods) for meal in day['meals']]
+        derived = day_fields(index, start_date, day['meals'])
+        if set(day) == DAY_KEYS and all(day[key] == value for key, value in derived.items()):
+            compact.append(meals)
+        else:
+            compact.append({**day, 'meals': meals})
+    return compact
+
+
+def hydrate_day(day, index, start_date, foods):
+    if not isinstance(day, list):
+        if isinstance(day, dict) and isinstance(day.get('meals'), list):
+            return {**day, 'meals': [hydrate_meal(meal, foods) for meal in day['meals']]}
+        return day
+    meals = [hydrate_meal(meal, foods) for meal in day]
+    return {**day_fields(index, start_date, meals), 'meals': meals}
+
+
+def day_fields(index, start_date, meals):
+    return {
+        'day': index + 1,
+        'date': (start_date + timedelta(days=index)).strftime('%Y-%m-%d'),
+        'totalCalories': sum(meal.get('totalCalories', 0) for meal in meals if isinstance(meal, dict)),
+    }
+
+
+def compact_meal(meal, foods):
+    if not isinstance(meal, dict) or not isinstance(meal.get('items'), list):
+        return meal
+    slot = SLOT_INDEX.get((meal.get('name'), meal.get('time')))
+    if (slot is not None and set(meal) == MEAL_KEYS
+            and meal['totalCalories'] == total_calories(meal['items'])):
+        return [slot, [compact_item(item, foods, meal['name']) for item in meal['items']]]
+    return {**meal, 'items': [compact_item(item, foods) for item in meal['items']]}
+
+
+def hydrate_meal(meal, foods):
+    if not isinstance(meal, list):
+        if isinstance(meal, dict) and isinstance(meal.get('items'), list):
+            return {**meal, 'items': [hydrate_item(item, foods) for item in meal['items']]}
+        return meal
+    slot, items = meal
+    name, time = MEAL_SLOTS[slot]
+    items = [hydrate_item(item, foods, name) for item in items]
+    return {'name': name, 'time': time, 'items': items, 'totalCalories': total_calories(items)}
+
+
+def total_calories(items):
+    return sum(item.get('calories', 0) if isinstance(item, dict) else 0 for item in items)
+
+
+def compact_item(item, foods, meal_name=None):
+    if not isinstance(item, dict):
+        return item
+    food = foods.by_name.get(item.get('name'))
+    if food is None:
+        return compact_fallback_item(item, meal_name)
+    try:
+        servings = float(str(item['quantity']).split(' ', 1)[0])
+    except (KeyError, ValueError):
+        return item
+    if servings.is_integer():
+        servings = int(servings)
+
+    entry = [food['id'], servings]
+    hydrated = food_item(food, servings)
+    if hydrated['calories'] != item.get('calories'):
+        entry.append(item.get('calories'))
+        hydrated['calories'] = item.get('calories')
+    return entry if hydrated == item else item
+
+
+def compact_fallback_item(item, meal_name):
+    if meal_name is None:
+        return item
+    for index, fallback in enumerate(fallback_foods(meal_name)):
+        if {**fallback, 'calories': item.get('calories')} == item:
+            return [FALLBACK, index, item['calories']]
+    return item
+
+
+def hydrate_item(entry, foods, meal_name=None):
+    if not isinstance(entry, list):
+        return entry
+    if entry[0] == FALLBACK:
+        return {**fallback_foods(meal_name)[entry[1]], 'calories': entry[2]}
+    food_id, servings = entry[0], entry[1]
+    food = foods.by_id.get(food_id)
+    if food is None:
+        item = {'name': 'Unknown food', 'quantity': f'{servings:.1f} serving', 'calories': 0}
+    else:
+        item = food_item(food, servings)
+    if len(entry) > 2:
+        item['calories'] = entry[2]
+    return item
+
+
+def convert_charts(apps, convert):
+    DietChart = apps.get_model('backend', 'DietChart')
+    foods = Foods(apps)
+    batch = []
+    for chart in DietChart.objects.only('id', 'chart_data').iterator(chunk_size=BATCH_SIZE):
+        converted = convert(chart.chart_data, foods)
+        if converted is not chart.chart_data:
+            chart.chart_data = converted
+            batch.append(chart)
+        if len(batch) >= BATCH_SIZE:
+            DietChart.objects.bulk_update(batch, ['chart_data'])
+            batch = []
+    if batch:
+        DietChart.objects.bulk_update(batch, ['chart_data'])
+
+
+def compact_charts(apps, schema_editor):
+    convert_charts(apps, compact_chart)
+
+
+def hydrate_charts(apps, schema_editor):
+    convert_charts(apps, hydrate_chart)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0007_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(compact_charts, hydrate_charts),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:05
+
+import csv
+import os
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+BATCH_SIZE = 500
+CSV_NAME = 'Book1.csv'
+# Book1.csv columns kept in the vector, as of this migration: calories,
+# water, protein, fat, carbs, fiber and columns 8-22
+FIRST_VECTOR_COLUMN = 2
+VECTOR_LENGTH = 21
+
+
+def nutrient_vector(row):
+    vector = []
+    for index in range(FIRST_VECTOR_COLUMN, FIRST_VECTOR_COLUMN + VECTOR_LENGTH):
+        value = row[index].strip() if index < len(row) else ''
+        try:
+            vector.append(float(value) if value else None)
+        except ValueError:
+            vector.append(None)
+    return vector
+
+
+# Foods imported before nutrient_vector existed get theirs from Book1.csv by
+# name; foods that are not in the file keep an empty vector.
+def backfill_nutrient_vectors(apps, schema_editor):
+    FoodItem = apps.get_model('backend', 'FoodItem')
+    TableVersion = apps.get_model('backend', 'TableVersion')
+    csv_file = settings.BASE_DIR / CSV_NAME
+    if not os.path.exists(csv_file):
+        return
+    with open(csv_file, 'r', encoding='utf-8') as file:
+        vectors = {row[0].strip(): nutrient_vector(row) for row in list(csv.reader(file))[1:] if row}
+
+    foods = []
+    for food in FoodItem.objects.only('id', 'name', 'nutrient_vector'):
+        vector = vectors.get(food.name)
+        if vector and not food.nutrient_vector:
+            food.nutrient_vector = vector
+            foods.append(food)
+    FoodItem.objects.bulk_update(foods, ['nutrient_vector'], batch_size=BATCH_SIZE)
+    if foods:
+        # Same as TableVersion.bump('fooditem'); bulk_update does not send post_save
+        now = timezone.now()
+        if not TableVersion.objects.filter(table='fooditem').update(version=F('version') + 1, updated_at=now):
+            TableVersion.objects.create(table='fooditem', version=1, updated_at=now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0008_compact_chart_data'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fooditem',
+            name='nutrient_vector',
+            field=models.JSONField(default=list),
+        ),
+        migrations.RunPython(backfill_nutrient_vectors, migrations.RunPython.noop),
+    ]
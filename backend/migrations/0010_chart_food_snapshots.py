@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:40
+
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+# Compact charts (version 2) referred to foods by ID only, so they showed the
+# current food table. Version 3 adds a 'foods' map with each food's values as
+# they are at migration time. Frozen here so the conversion does not change
+# with backend.chart_storage.
+
+FALLBACK = 'fallback'
+SNAPSHOT_FIELDS = ('name', 'serving', 'calories', 'virya', 'rasa', 'category')
+
+
+def stored_items(chart_data):
+    """Every item list of a compact chart (meals and plan days)"""
+    groups = [chart_data.get('meals') or []]
+    for day in chart_data.get('days') or []:
+        if isinstance(day, list):
+            groups.append(day)
+        elif isinstance(day, dict) and isinstance(day.get('meals'), list):
+            groups.append(day['meals'])
+    for meals in groups:
+        for meal in meals:
+            if isinstance(meal, list):
+                yield meal[1]
+            elif isinstance(meal, dict) and isinstance(meal.get('items'), list):
+                yield meal['items']
+
+
+def add_snapshots(chart_data, snapshots):
+    foods = {}
+    for items in stored_items(chart_data):
+        for index, item in enumerate(items):
+            if not isinstance(item, list) or item[0] == FALLBACK:
+                continue
+            snapshot = snapshots.get(item[0])
+            if snapshot is None:
+                # Deleted food: keep what version 2 showed for it
+                items[index] = {
+                    'name': 'Unknown food',
+                    'quantity': f'{item[1]:.1f} serving',
+                    'calories': item[2] if len(item) > 2 else 0,
+                }
+            else:
+                foods[str(item[0])] = snapshot
+    chart_data['foods'] = foods
+    chart_data['v'] = 3
+
+
+def remove_snapshots(chart_data):
+    chart_data.pop('foods', None)
+    chart_data['v'] = 2
+
+
+def convert_charts(apps, version, convert):
+    DietChart = apps.get_model('backend', 'DietChart')
+    charts = []
+    for chart in DietChart.objects.only('id', 'chart_data').iterator(chunk_size=BATCH_SIZE):
+        if isinstance(chart.chart_data, dict) and chart.chart_data.get('v') == version:
+            convert(chart.chart_data)
+            charts.append(chart)
+    DietChart.objects.bulk_update(charts, ['chart_data'], batch_size=BATCH_SIZE)
+
+
+def snapshot_foods(apps, schema_editor):
+    FoodItem = apps.get_model('backend', 'FoodItem')
+    snapshots = {
+        row[0]: list(row[1:]) for row in FoodItem.objects.values_list('id', *SNAPSHOT_FIELDS)
+    }
+    convert_charts(apps, 2, lambda chart_data: add_snapshots(chart_data, snapshots))
+
+
+def drop_snapshots(apps, schema_editor):
+    convert_charts(apps, 3, remove_snapshots)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0009_fooditem_nutrient_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(snapshot_foods, drop_snapshots),
+    ]
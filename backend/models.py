@@ -1,6 +1,9 @@
 # NutriVeda Database Models
 from django.db import models
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
+from django.utils import timezone
 import json
 import uuid
 
@@ -35,6 +38,15 @@ class Patient(models.Model):
     last_visit = models.DateField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            # Keyset pagination walks (created_at, id) newest first
+            models.Index(fields=['created_at', 'id'], name='patient_created_id_idx'),
+            # Reception search filters; text matching uses backend_patient_fts on SQLite
+            models.Index(fields=['prakriti', 'age'], name='patient_prakriti_age_idx'),
+            models.Index(fields=['gender', 'age'], name='patient_gender_age_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.name} (ID: {self.id})"
     
@@ -43,7 +55,8 @@ class Patient(models.Model):
         if self.height and self.weight:
             height_m = self.height / 100
             self.bmi = round(self.weight / (height_m * height_m), 1)
-            self.save()
+            # Only the bmi column changes; unsaved patients get a full insert
+            self.save(update_fields=['bmi'] if self.pk else None)
         return self.bmi
 
 class FoodItem(models.Model):
@@ -68,6 +81,7 @@ class FoodItem(models.Model):
     benefits = models.JSONField(default=list)  # List of benefits
     precautions = models.JSONField(default=list)  # List of precautions
     description = models.TextField(blank=True)
+    nutrient_vector = models.JSONField(default=list)  # Numeric Book1.csv columns, None where blank
     
     def __str__(self):
         return f"{self.name} ({self.category})"
@@ -79,10 +93,15 @@ class DietChart(models.Model):
     goal = models.CharField(max_length=50)
     target_calories = models.IntegerField()
     duration = models.IntegerField()  # days
-    chart_data = models.JSONField()  # Store the entire diet chart
+    chart_data = models.JSONField()  # Compact diet chart, see backend.chart_storage
     created_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, default='Active')
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['patient', 'created_at'], name='dietchart_patient_created_idx'),
+        ]
+    
     def __str__(self):
         return f"Diet Chart for {self.patient.name} - {self.goal}"
 
@@ -98,5 +117,72 @@ class DoshaAssessment(models.Model):
     recommendations = models.JSONField()  # Store recommendations
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['patient', 'created_at'], name='dosha_patient_created_idx'),
+        ]
+    
     def __str__(self):
         return f"Dosha Assessment - {self.primary_dosha} ({self.confidence:.2f})"
+
+class TableVersion(models.Model):
+    """Write counter per table, used for conditional GET on the read APIs"""
+    table = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.table} v{self.version}"
+    
+    @classmethod
+    def bump(cls, table):
+        """Record a write to ``table``; call this after bulk operations that skip signals"""
+        now = timezone.now()
+        updated = cls.objects.filter(table=table).update(version=F('version') + 1, updated_at=now)
+        if not updated:
+            cls.objects.get_or_create(table=table, defaults={'version': 1, 'updated_at': now})
+
+class Job(models.Model):
+    """Background job run by ``manage.py run_jobs`` (see backend.jobs)"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    progress = models.FloatField(default=0)
+    message = models.CharField(max_length=200, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+            models.Index(fields=['created_at'], name='job_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} job {self.id} ({self.status})"
+
+def bump_table_version(sender, **kwargs):
+    """Signal receiver that bumps the version of the saved or deleted model's table"""
+    TableVersion.bump(sender._meta.model_name)
+
+for versioned_model in (Patient, FoodItem, DietChart, DoshaAssessment):
+    post_save.connect(bump_table_version, sender=versioned_model,
+                      dispatch_uid=f'bump_version_save_{versioned_model._meta.model_name}')
+    post_delete.connect(bump_table_version, sender=versioned_model,
+                        dispatch_uid=f'bump_version_delete_{versioned_model._meta.model_name}')
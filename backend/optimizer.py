@@ -0,0 +1,204 @@
+"""
+NutriVeda meal portion optimizer
+
+Chooses serving sizes for a whole day of meals in one vectorized solve over
+the catalog's nutrient matrix. Each meal draws candidates from its categories
+(best constitution matches first). Portions are picked to hit:
+
+* the meal's calories, protein, carbs and fat targets;
+* at least the meal's fiber target;
+* the calorie share of each category in the meal.
+
+Portions are bounded by MAX_SERVINGS. Every calorie served carries a small
+cost that is lower for foods with a higher constitution compatibility score,
+so those are preferred when several foods fit and few foods are used.
+
+Formally this is a box-constrained least-squares problem with a linear cost,
+solved with accelerated projected gradient (FISTA). All meals are independent
+blocks of one matrix, so a chart is a single solve of a few hundred small
+matrix-vector products. A first solve over all candidates shortlists up to
+ITEMS_PER_CATEGORY foods per category; further solves over the shortlist drop
+portions too small to serve and size the rest between MIN_SERVINGS and
+MAX_SERVINGS.
+"""
+
+import numpy as np
+
+from .catalog import NUTRIENT_FIELDS
+
+# Share of calories from protein, carbs and fat per goal
+MACRO_SPLITS = {
+    'weight loss': (0.30, 0.45, 0.25),
+    'weight gain': (0.20, 0.50, 0.30),
+    'maintenance': (0.20, 0.55, 0.25),
+}
+DEFAULT_MACRO_SPLIT = MACRO_SPLITS['maintenance']
+
+KCAL_PER_GRAM = {'protein': 4.0, 'carbs': 4.0, 'fat': 9.0}
+FIBER_PER_1000_KCAL = 14.0
+
+# Relative importance of each residual (NUTRIENT_FIELDS order, then categories)
+NUTRIENT_WEIGHTS = np.array([4.0, 1.0, 1.0, 1.0, 0.5])
+CATEGORY_WEIGHT = 1.0
+
+# Residuals that only count when the meal falls short (fiber)
+LOWER_BOUND_NUTRIENTS = np.array([False, False, False, False, True])
+
+CANDIDATES_PER_CATEGORY = 5
+ITEMS_PER_CATEGORY = 2
+# Relaxed portions below this are dropped rather than rounded up to MIN_SERVINGS
+KEEP_SERVINGS = 0.25
+MIN_SERVINGS = 0.5
+MAX_SERVINGS = 3.0
+MAX_SCORE = 7.0
+# Cost of filling a whole meal's calories with a food scoring 0
+CALORIE_COST = 0.02
+ITERATIONS = 150
+REFINE_ITERATIONS = 100
+
+
+def nutrient_targets(calories, goal):
+    """Daily or per-meal targets in NUTRIENT_FIELDS order for ``calories`` and ``goal``"""
+    protein, carbs, fat = MACRO_SPLITS.get((goal or '').lower(), DEFAULT_MACRO_SPLIT)
+    return np.array([
+        calories,
+        calories * protein / KCAL_PER_GRAM['protein'],
+        calories * carbs / KCAL_PER_GRAM['carbs'],
+        calories * fat / KCAL_PER_GRAM['fat'],
+        calories * FIBER_PER_1000_KCAL / 1000.0,
+    ])
+
+
+class PortionProblem:
+    """The stacked least-squares problem for a set of meals
+
+    ``rows`` are catalog rows of the candidate foods and ``meal_of`` the meal
+    each candidate belongs to. The residual vector is ``matrix @ x - targets``
+    with every row divided by its nutrient target and scaled by its weight.
+    """
+
+    def __init__(self, catalog, constitution, meals, goal, day=0, rotation_days=1, exclude=()):
+        rows, meal_of, slot_of = [], [], []
+        for meal_index, (_, categories) in enumerate(meals):
+            for slot, (category, _) in enumerate(categories):
+                candidates = catalog.rotation(
+                    category, constitution, CANDIDATES_PER_CATEGORY, day, rotation_days, exclude
+                )
+                for food in candidates:
+                    rows.append(catalog.index[food.id])
+                    meal_of.append(meal_index)
+                    slot_of.append(slot)
+
+        self.rows = np.array(rows, dtype=np.intp)
+        self.meal_of = np.array(meal_of, dtype=np.intp)
+        slot_of = np.array(slot_of, dtype=np.intp)
+        nutrients = catalog.nutrients[self.rows]
+        n_nutrients = len(NUTRIENT_FIELDS)
+        n_slots = max((len(categories) for _, categories in meals), default=0)
+        per_meal = n_nutrients + n_slots
+        self.group = self.meal_of * max(n_slots, 1) + slot_of
+
+        matrix = np.zeros((len(meals) * per_meal, len(rows)))
+        weights = np.zeros(len(meals) * per_meal)
+        lower_only = np.zeros(len(meals) * per_meal, dtype=bool)
+        for meal_index, (meal_calories, categories) in enumerate(meals):
+            base = meal_index * per_meal
+            targets = nutrient_targets(meal_calories, goal)
+            in_meal = self.meal_of == meal_index
+            scaled = nutrients[in_meal] / np.maximum(targets, 1e-9)
+            # A serving can at most fully meet a lower-bound target; capping it
+            # keeps one outlier value from dominating the step size
+            scaled[:, LOWER_BOUND_NUTRIENTS] = np.minimum(scaled[:, LOWER_BOUND_NUTRIENTS], 1.0)
+            matrix[base:base + n_nutrients, in_meal] = scaled.T
+            weights[base:base + n_nutrients] = np.where(targets > 0, NUTRIENT_WEIGHTS, 0.0)
+            lower_only[base:base + n_nutrients] = LOWER_BOUND_NUTRIENTS
+            # Categories with no foods in the catalog hand their share to the others
+            stocked = [
+                (slot, category_calories) for slot, (_, category_calories) in enumerate(categories)
+                if category_calories > 0 and (in_meal & (slot_of == slot)).any()
+            ]
+            stocked_calories = sum(category_calories for _, category_calories in stocked)
+            for slot, category_calories in stocked:
+                in_slot = in_meal & (slot_of == slot)
+                category_target = category_calories * meal_calories / stocked_calories
+                matrix[base + n_nutrients + slot, in_slot] = nutrients[in_slot, 0] / category_target
+                weights[base + n_nutrients + slot] = CATEGORY_WEIGHT
+
+        self.matrix = matrix * np.sqrt(weights)[:, None]
+        self.targets = np.sqrt(weights)
+        self.lower_only = lower_only
+        scores = catalog.constitution_scores(constitution)[self.rows]
+        meal_targets = np.array([max(calories, 1) for calories, _ in meals], dtype=float)[self.meal_of]
+        self.costs = CALORIE_COST * (nutrients[:, 0] / meal_targets) * (2.0 - scores / MAX_SCORE)
+
+    def gradient(self, matrix, x):
+        residual = matrix @ x - self.targets
+        residual -= self.lower_only * np.maximum(residual, 0.0)
+        return 2.0 * (matrix.T @ residual)
+
+    def solve(self):
+        """Return servings per candidate (``rows`` order), zero when not chosen"""
+        servings = np.zeros(len(self.rows))
+        if not len(self.rows):
+            return servings
+
+        relaxed = self._fista(
+            self.matrix, self.costs, np.zeros(len(self.rows)), np.full(len(self.rows), MAX_SERVINGS), ITERATIONS
+        )
+        chosen = self.choose(relaxed) & (relaxed > 0)
+
+        # Re-fit the shortlisted foods alone, then drop portions too small to
+        # round up to MIN_SERVINGS and size the rest within the serving bounds
+        for lower_bound in (0.0, MIN_SERVINGS):
+            if not chosen.any():
+                return servings
+            count = int(chosen.sum())
+            fitted = self._fista(
+                self.matrix[:, chosen], self.costs[chosen], np.full(count, lower_bound),
+                np.full(count, MAX_SERVINGS), REFINE_ITERATIONS, start=relaxed[chosen]
+            )
+            relaxed = np.zeros(len(self.rows))
+            relaxed[chosen] = fitted
+            chosen &= relaxed >= KEEP_SERVINGS
+
+        servings[chosen] = np.round(relaxed[chosen], 1)
+        return servings
+
+    def choose(self, relaxed):
+        """Mask of the largest relaxed portions per category, ITEMS_PER_CATEGORY at most"""
+        order = np.lexsort((-relaxed, self.group))
+        groups = self.group[order]
+        rank = np.arange(len(order)) - np.searchsorted(groups, groups)
+
+        chosen = np.zeros(len(relaxed), dtype=bool)
+        chosen[order] = rank < ITEMS_PER_CATEGORY
+        return chosen
+
+    def _fista(self, matrix, costs, lower, upper, iterations, start=None):
+        step = 1.0 / max(2.0 * np.linalg.norm(matrix, 2) ** 2, 1e-9)
+        x = np.clip(lower if start is None else start, lower, upper)
+        y = x.copy()
+        t = 1.0
+        for _ in range(iterations):
+            x_next = np.clip(y - step * (self.gradient(matrix, y) + costs), lower, upper)
+            t_next = (1.0 + np.sqrt(1.0 + 4.0 * t * t)) / 2.0
+            y = x_next + ((t - 1.0) / t_next) * (x_next - x)
+            x, t = x_next, t_next
+        return x
+
+
+def optimize_meals(catalog, constitution, meals, goal, day=0, rotation_days=1, exclude=()):
+    """Pick portions for ``meals`` in one solve
+
+    ``meals`` is a list of ``(meal_calories, [(category, category_calories), ...])``.
+    Candidates come from ``catalog.rotation`` for ``day``, without the food IDs
+    in ``exclude``. Returns, per meal, a list of ``(food, servings)`` pairs in
+    candidate order.
+    """
+    problem = PortionProblem(catalog, constitution, meals, goal, day, rotation_days, exclude)
+    servings = problem.solve()
+    selected = [[] for _ in meals]
+    for row, meal_index, amount in zip(problem.rows, problem.meal_of, servings):
+        if amount > 0:
+            selected[meal_index].append((catalog.foods[row], float(amount)))
+    return selected
@@ -0,0 +1,93 @@
+"""
+NutriVeda keyset (cursor) pagination helpers
+
+Database-backed lists page by keyset. Lists served from in-memory snapshots
+(the food catalog) use plain offsets, which cost nothing to skip there.
+"""
+
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor or limit cannot be decoded"""
+
+
+def encode_cursor(created_at, pk):
+    """Encode the (created_at, id) position of a row as an opaque token"""
+    raw = f"{created_at.isoformat()}|{pk}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, pk_type=int):
+    """Decode a cursor token back into its (created_at, id) pair"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+        created_at, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), pk_type(pk)
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE):
+    """Parse the ?limit= query parameter, clamped to MAX_PAGE_SIZE"""
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except ValueError as e:
+        raise InvalidCursor('limit must be an integer') from e
+    if limit < 1:
+        raise InvalidCursor('limit must be positive')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def parse_offset(value):
+    """Parse the ?offset= query parameter of offset-paginated lists"""
+    if value in (None, ''):
+        return 0
+    try:
+        offset = int(value)
+    except ValueError as e:
+        raise InvalidCursor('offset must be an integer') from e
+    if offset < 0:
+        raise InvalidCursor('offset must not be negative')
+    return offset
+
+
+def instance_position(obj):
+    """Read the (created_at, id) pagination key from a model instance"""
+    return obj.created_at, obj.id
+
+
+def paginate_keyset(queryset, limit, after=None, position=instance_position, pk_type=int):
+    """Return one page of newest-first rows plus the cursor for the next page
+
+    Rows are ordered by (created_at, id) descending, so each page is a single
+    index range scan regardless of how deep into the table it starts.
+    ``position`` reads the (created_at, id) pair from a fetched row, which
+    lets ``values_list`` querysets be paginated as well as model instances;
+    ``pk_type`` converts the cursor's id back (``uuid.UUID`` for UUID keys).
+    """
+    queryset = queryset.order_by('-created_at', '-id')
+    if after:
+        created_at, pk = decode_cursor(after, pk_type)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+
+    # Fetch one extra row to learn whether another page exists
+    rows = list(queryset[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_cursor(*position(rows[-1]))
+    return rows, next_cursor
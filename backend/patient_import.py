@@ -0,0 +1,205 @@
+"""
+NutriVeda bulk patient import
+
+Parses JSON arrays, NDJSON and CSV uploads into Patient rows and inserts them
+with ``bulk_create`` in fixed-size batches inside a single transaction. Rows
+that fail validation are reported back instead of aborting the import.
+"""
+
+import codecs
+import csv
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Patient, TableVersion
+
+DEFAULT_BATCH_SIZE = 500
+
+# Fields accepted from an import row, with the defaults used by patients_api POST
+PATIENT_DEFAULTS = {
+    'name': None,
+    'age': None,
+    'gender': None,
+    'phone': '',
+    'email': '',
+    'height': None,
+    'weight': None,
+    'prakriti': '',
+    'diet': 'Vegetarian',
+    'meal_frequency': 3,
+    'water_intake': 2.5,
+    'activity_level': 'Moderate',
+    'bowel_movement': 'Regular',
+    'sleep_hours': 7,
+    'stress_level': 'Medium',
+    'medical_history': '',
+    'current_medications': '',
+    'allergies': '',
+    'occupation': '',
+    'exercise_frequency': '',
+}
+
+FORMAT_CONTENT_TYPES = {
+    'application/json': 'json',
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'application/jsonlines': 'ndjson',
+    'text/csv': 'csv',
+    'application/csv': 'csv',
+}
+
+
+class ImportFormatError(ValueError):
+    """Raised when an upload cannot be parsed at all"""
+
+
+def get_batch_size(value=None):
+    """Resolve the insert batch size from the request or PATIENT_IMPORT_BATCH_SIZE"""
+    default = getattr(settings, 'PATIENT_IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    if value in (None, ''):
+        return default
+    try:
+        batch_size = int(value)
+    except ValueError as e:
+        raise ImportFormatError('batch_size must be an integer') from e
+    if batch_size < 1:
+        raise ImportFormatError('batch_size must be positive')
+    return batch_size
+
+
+def detect_format(request):
+    """Pick the upload format from ?format= or the Content-Type header"""
+    fmt = request.GET.get('format') or FORMAT_CONTENT_TYPES.get(request.content_type)
+    if fmt not in ('json', 'ndjson', 'csv'):
+        raise ImportFormatError(
+            'Unsupported import format; send application/json, application/x-ndjson or text/csv'
+        )
+    return fmt
+
+
+def iter_records(request, fmt):
+    """Yield (index, record_or_error) pairs from the request body
+
+    NDJSON and CSV are read line by line from the request stream; a line
+    that does not parse is yielded as an error string for that row.
+    """
+    if fmt == 'json':
+        try:
+            records = json.loads(request.body)
+        except ValueError as e:
+            raise ImportFormatError(f'Invalid JSON: {e}') from e
+        if not isinstance(records, list):
+            raise ImportFormatError('JSON import body must be an array of patients')
+        for index, record in enumerate(records):
+            yield index, record
+    elif fmt == 'ndjson':
+        index = 0
+        for line in codecs.iterdecode(request, 'utf-8'):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield index, json.loads(line)
+            except ValueError as e:
+                yield index, f'Invalid JSON: {e}'
+            index += 1
+    else:
+        reader = csv.DictReader(codecs.iterdecode(request, 'utf-8-sig'))
+        for index, row in enumerate(reader):
+            # Empty cells fall back to the field defaults
+            yield index, {key.strip(): value for key, value in row.items()
+                          if key and value not in ('', None)}
+
+
+def compute_bmi(height, weight):
+    """BMI from height in cm and weight in kg, or None if either is missing"""
+    if not height or not weight:
+        return None
+    height_m = float(height) / 100
+    return round(float(weight) / (height_m * height_m), 1)
+
+
+def compute_bmi_batch(patients):
+    """Fill in ``bmi`` for a whole batch of unsaved patients in one pass"""
+    for patient in patients:
+        patient.bmi = compute_bmi(patient.height, patient.weight)
+
+
+def patient_from_data(data):
+    """Build an unsaved Patient from request data, applying the API defaults"""
+    return Patient(**{field: data.get(field, default) for field, default in PATIENT_DEFAULTS.items()})
+
+
+def apply_patient_changes(patient, data):
+    """Apply a partial update to ``patient`` and return the changed field names
+
+    Values are validated and coerced like an import row. ``bmi`` is included
+    in the result only when height or weight actually changed. Raises
+    ValidationError for unknown or invalid fields.
+    """
+    unknown = [field for field in data if field not in PATIENT_DEFAULTS]
+    if unknown:
+        raise ValidationError({field: ['Unknown or read-only field.'] for field in unknown})
+
+    previous = {field: getattr(patient, field) for field in data}
+    for field, value in data.items():
+        if value == '' and Patient._meta.get_field(field).null:
+            value = None
+        setattr(patient, field, value)
+    exclude = [f.name for f in Patient._meta.fields if f.name not in data]
+    patient.clean_fields(exclude=exclude)
+
+    changed = [field for field in data if getattr(patient, field) != previous[field]]
+    if 'height' in changed or 'weight' in changed:
+        bmi = compute_bmi(patient.height, patient.weight)
+        if bmi != patient.bmi:
+            patient.bmi = bmi
+            changed.append('bmi')
+    return changed
+
+
+def import_patients(records, batch_size):
+    """Validate and bulk insert patients from an iterable of (index, record)
+
+    Returns ``(created, errors)`` where ``errors`` lists the rejected rows.
+    All batches are written inside one transaction.
+    """
+    created = 0
+    errors = []
+    batch = []
+
+    def flush():
+        compute_bmi_batch(batch)
+        Patient.objects.bulk_create(batch, batch_size=batch_size)
+        batch.clear()
+
+    with transaction.atomic():
+        for index, record in records:
+            if isinstance(record, str):
+                errors.append({'index': index, 'error': record})
+                continue
+            if not isinstance(record, dict):
+                errors.append({'index': index, 'error': 'Each patient must be an object'})
+                continue
+            patient = patient_from_data(record)
+            try:
+                # Also coerces CSV strings into ints and floats
+                patient.full_clean(exclude=['bmi'])
+            except ValidationError as e:
+                errors.append({'index': index, 'error': e.message_dict})
+                continue
+            batch.append(patient)
+            if len(batch) >= batch_size:
+                created += len(batch)
+                flush()
+        if batch:
+            created += len(batch)
+            flush()
+        if created:
+            # bulk_create does not send post_save
+            TableVersion.bump('patient')
+
+    return created, errors
@@ -0,0 +1,85 @@
+"""
+NutriVeda JSON response helpers
+
+All API views build their responses through ``json_response`` so the encoder
+can be swapped in one place. ``API_JSON_BACKEND`` selects it:
+
+* ``stdlib`` - the standard library ``json`` module
+* ``orjson`` - orjson, when installed
+* ``auto``   - orjson if importable, otherwise stdlib (the default)
+
+Both backends encode date, datetime, UUID and Decimal values natively, so
+views can put model values straight into the response data.
+"""
+
+import datetime
+import decimal
+import json
+import uuid
+
+from django.conf import settings
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value):
+    """Fallback for types the encoders do not handle themselves"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def _stdlib_dumps(data):
+    return json.dumps(data, default=_default, ensure_ascii=False).encode('utf-8')
+
+
+def _orjson_dumps(data):
+    return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+JSON_BACKENDS = {'stdlib': _stdlib_dumps}
+if orjson is not None:
+    JSON_BACKENDS['orjson'] = _orjson_dumps
+
+_backend_cache = {}
+
+
+def get_dumps(name=None):
+    """Return the ``dumps(data) -> bytes`` function for the configured backend"""
+    name = name or getattr(settings, 'API_JSON_BACKEND', 'auto')
+    if name not in _backend_cache:
+        if name == 'auto':
+            dumps = JSON_BACKENDS.get('orjson', _stdlib_dumps)
+        elif name in JSON_BACKENDS:
+            dumps = JSON_BACKENDS[name]
+        else:
+            raise ValueError(
+                f"Unknown or unavailable JSON backend '{name}'; "
+                f"choose from auto, {', '.join(JSON_BACKENDS)}"
+            )
+        _backend_cache[name] = dumps
+    return _backend_cache[name]
+
+
+def dumps(data):
+    """Encode ``data`` to JSON bytes with the configured backend"""
+    return get_dumps()(data)
+
+
+def json_response(data, status=200, **kwargs):
+    """Drop-in replacement for JsonResponse using the configured encoder"""
+    kwargs.setdefault('content_type', 'application/json')
+    return HttpResponse(dumps(data), status=status, **kwargs)
+
+
+def query_flag(request, name):
+    """Whether a boolean query parameter such as ?stream=1 is switched on"""
+    return request.GET.get(name, '').lower() in ('1', 'true', 'yes')
@@ -0,0 +1,87 @@
+"""
+NutriVeda search helpers
+
+On SQLite, patient name / phone / email lookups go through the
+``backend_patient_fts`` FTS5 table created in migration 0005, which answers
+prefix queries from its term index. Other databases fall back to
+``istartswith`` lookups.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+PATIENT_FTS_TABLE = 'backend_patient_fts'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_fts_available = {}
+
+
+def tokenize(query):
+    """Split a free-text query into lowercase word tokens"""
+    return [token.lower() for token in _TOKEN_RE.findall(query or '')]
+
+
+def fts_available(table):
+    """Whether ``table`` exists on the default connection (checked once per process)"""
+    if table not in _fts_available:
+        _fts_available[table] = (
+            connection.vendor == 'sqlite'
+            and table in connection.introspection.table_names()
+        )
+    return _fts_available[table]
+
+
+def fts_prefix_query(tokens):
+    """Build an FTS5 MATCH expression requiring every token as a prefix"""
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def filter_patients_by_text(queryset, query):
+    """Restrict ``queryset`` to patients whose name, phone or email match ``query``
+
+    Every token must prefix-match some word in one of the three columns.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset
+
+    if fts_available(PATIENT_FTS_TABLE):
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {PATIENT_FTS_TABLE} WHERE {PATIENT_FTS_TABLE} MATCH %s',
+            [fts_prefix_query(tokens)]
+        ))
+
+    for token in tokens:
+        queryset = queryset.filter(
+            Q(name__istartswith=token) | Q(name__icontains=f' {token}') |
+            Q(phone__startswith=token) | Q(email__istartswith=token)
+        )
+    return queryset
+
+
+def filter_patients(queryset, prakriti='', gender='', age_min=None, age_max=None):
+    """Apply the structured patient filters shared by search and cohort selection"""
+    # Stored values are title case ('Vata-Pitta', 'Female'); exact matches keep
+    # the (prakriti, age) / (gender, age) indexes usable
+    prakriti = (prakriti or '').strip()
+    gender = (gender or '').strip()
+    if prakriti:
+        queryset = queryset.filter(prakriti__in={prakriti, prakriti.title()})
+    if gender:
+        queryset = queryset.filter(gender__in={gender, gender.title()})
+    if age_min is not None:
+        queryset = queryset.filter(age__gte=age_min)
+    if age_max is not None:
+        queryset = queryset.filter(age__lte=age_max)
+    return queryset
+
+
+def parse_age_range(params):
+    """``(age_min, age_max)`` from ?age_min= / ?age_max=; raises ValueError"""
+    try:
+        return tuple(int(params[key]) if params.get(key) else None for key in ('age_min', 'age_max'))
+    except ValueError as e:
+        raise ValueError('age_min and age_max must be integers') from e
@@ -0,0 +1,203 @@
+"""
+NutriVeda row serializers
+
+List endpoints fetch plain tuples through ``values_list`` and turn them into
+dicts with a projection compiled once per (model, fields) pair, so no model
+instances are created per row. Fields are put in declaration order before
+lookup, and at most MAX_PROJECTIONS projections are kept per serializer
+(least recently used first out), since ?fields= comes from clients. Dates and UUIDs are left as-is for the JSON
+encoder in ``backend.responses``; ``created_at`` is truncated to a date in SQL.
+"""
+
+import threading
+from collections import OrderedDict
+from operator import itemgetter
+
+from .chart_storage import hydrate_chart
+
+MAX_PROJECTIONS = 64
+
+
+class Projection:
+    """A compiled field projection: the columns to fetch and a row converter"""
+
+    def __init__(self, keys, columns, transforms):
+        self.keys = keys
+        self.columns = columns
+        self._transforms = transforms
+
+    def to_dict(self, row):
+        """Convert one values_list tuple into an API dict"""
+        data = dict(zip(self.keys, row))
+        for key, index, transform in self._transforms:
+            value = row[index]
+            data[key] = transform(value) if value is not None else None
+        return data
+
+    def serialize(self, rows):
+        """Convert an iterable of values_list tuples into a list of dicts"""
+        to_dict = self.to_dict
+        return [to_dict(row) for row in rows]
+
+    def position(self, *columns):
+        """Return a getter that reads the given columns from a fetched row"""
+        return itemgetter(*(self.columns.index(column) for column in columns))
+
+
+class RowSerializer:
+    """Describes how a model's columns map to API keys
+
+    ``fields`` is an ordered sequence of ``(key, column, transform)`` entries;
+    ``transform`` may be None when the column value is already JSON-ready.
+    """
+
+    def __init__(self, fields):
+        self.fields = {key: (column, transform) for key, column, transform in fields}
+        self.default_keys = tuple(key for key, _, _ in fields)
+        self._order = {key: index for index, key in enumerate(self.default_keys)}
+        self._compiled = OrderedDict()
+        self._lock = threading.Lock()
+
+    def parse_fields(self, param, default=None):
+        """Parse a ?fields= value into a tuple of keys, defaulting to all"""
+        default = default or self.default_keys
+        if not param:
+            return default
+        keys = tuple(dict.fromkeys(key.strip() for key in param.split(',') if key.strip()))
+        unknown = [key for key in keys if key not in self.fields]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return keys or default
+
+    def compile(self, keys=None, extra_columns=()):
+        """Return the cached Projection for ``keys``
+
+        ``extra_columns`` are fetched after the projected ones (for example the
+        pagination key) but do not appear in the serialized dict.
+        """
+        # Declaration order, so reordered ?fields= values share one projection
+        keys = tuple(sorted(keys or self.default_keys, key=self._order.__getitem__))
+        cache_key = (keys, tuple(extra_columns))
+        with self._lock:
+            projection = self._compiled.get(cache_key)
+            if projection is not None:
+                self._compiled.move_to_end(cache_key)
+                return projection
+
+        columns = [self.fields[key][0] for key in keys]
+        transforms = tuple(
+            (key, index, self.fields[key][1])
+            for index, key in enumerate(keys)
+            if self.fields[key][1] is not None
+        )
+        for column in extra_columns:
+            if column not in columns:
+                columns.append(column)
+        projection = Projection(keys, tuple(columns), transforms)
+        with self._lock:
+            self._compiled[cache_key] = projection
+            if len(self._compiled) > MAX_PROJECTIONS:
+                self._compiled.popitem(last=False)
+        return projection
+
+
+PATIENT_SERIALIZER = RowSerializer([
+    ('id', 'id', None),
+    ('name', 'name', None),
+    ('age', 'age', None),
+    ('gender', 'gender', None),
+    ('phone', 'phone', None),
+    ('email', 'email', None),
+    ('height', 'height', None),
+    ('weight', 'weight', None),
+    ('bmi', 'bmi', None),
+    ('prakriti', 'prakriti', None),
+    ('diet', 'diet', None),
+    ('meal_frequency', 'meal_frequency', None),
+    ('water_intake', 'water_intake', None),
+    ('activity_level', 'activity_level', None),
+    ('bowel_movement', 'bowel_movement', None),
+    ('sleep_hours', 'sleep_hours', None),
+    ('stress_level', 'stress_level', None),
+    ('medical_history', 'medical_history', None),
+    ('current_medications', 'current_medications', None),
+    ('allergies', 'allergies', None),
+    ('occupation', 'occupation', None),
+    ('exercise_frequency', 'exercise_frequency', None),
+    ('last_visit', 'last_visit', None),
+    ('created_at', 'created_at__date', None),
+])
+
+FOOD_SERIALIZER = RowSerializer([
+    ('id', 'id', None),
+    ('name', 'name', None),
+    ('category', 'category', None),
+    ('calories', 'calories', None),
+    ('serving', 'serving', None),
+    ('protein', 'protein', None),
+    ('carbs', 'carbs', None),
+    ('fat', 'fat', None),
+    ('fiber', 'fiber', None),
+    ('virya', 'virya', None),
+    ('digestion', 'digestion', None),
+    ('rasa', 'rasa', None),
+    ('guna', 'guna', None),
+    ('vata', 'vata_effect', None),
+    ('pitta', 'pitta_effect', None),
+    ('kapha', 'kapha_effect', None),
+    ('season', 'season', None),
+    ('benefits', 'benefits', None),
+    ('precautions', 'precautions', None),
+    ('description', 'description', None),
+])
+
+# ?compact=1: just enough for food pickers
+FOOD_COMPACT_KEYS = ('id', 'name', 'category', 'calories', 'vata', 'pitta', 'kapha')
+
+DIET_CHART_SERIALIZER = RowSerializer([
+    ('id', 'id', None),
+    ('patient_id', 'patient_id', None),
+    ('patient_name', 'patient__name', None),
+    ('goal', 'goal', None),
+    ('target_calories', 'target_calories', None),
+    ('duration', 'duration', None),
+    ('chart_data', 'chart_data', hydrate_chart),
+    ('created_at', 'created_at__date', None),
+    ('status', 'status', None),
+])
+
+# ?compact=1: chart_data as stored, without hydration (see backend.chart_storage)
+DIET_CHART_COMPACT_SERIALIZER = RowSerializer([
+    (key, column, None if key == 'chart_data' else transform)
+    for key, (column, transform) in DIET_CHART_SERIALIZER.fields.items()
+])
+
+# Diet chart list without the chart_data blob (?summary=1)
+DIET_CHART_SUMMARY_KEYS = tuple(key for key in DIET_CHART_SERIALIZER.default_keys if key != 'chart_data')
+
+DOSHA_ASSESSMENT_SERIALIZER = RowSerializer([
+    ('id', 'id', None),
+    ('patient_id', 'patient_id', None),
+    ('assessment_type', 'assessment_type', None),
+    ('responses', 'responses', None),
+    ('primary_dosha', 'primary_dosha', None),
+    ('dosha_scores', 'dosha_scores', None),
+    ('confidence', 'confidence', None),
+    ('recommendations', 'recommendations', None),
+    ('created_at', 'created_at', None),
+])
+
+JOB_SERIALIZER = RowSerializer([
+    ('id', 'id', None),
+    ('kind', 'kind', None),
+    ('status', 'status', None),
+    ('progress', 'progress', None),
+    ('message', 'message', None),
+    ('result', 'result', None),
+    ('error', 'error', None),
+    ('attempts', 'attempts', None),
+    ('max_attempts', 'max_attempts', None),
+    ('created_at', 'created_at', None),
+    ('started_at', 'started_at', None),
+    ('finished_at', 'finished_at', None),
+])
@@ -31,6 +31,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'backend.middleware.APICompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -68,6 +69,54 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Rows per bulk_create batch for /api/patients/import/
+PATIENT_IMPORT_BATCH_SIZE = int(os.environ.get('PATIENT_IMPORT_BATCH_SIZE', 500))
+
+# Rows fetched and encoded per chunk for ?stream=1 list responses
+API_STREAM_CHUNK_SIZE = int(os.environ.get('API_STREAM_CHUNK_SIZE', 500))
+
+# JSON encoder for API responses: auto (orjson when installed), orjson or stdlib
+API_JSON_BACKEND = os.environ.get('API_JSON_BACKEND', 'auto')
+
+# Compression of /api/ responses (brotli is used when installed, else gzip)
+API_COMPRESSION_MIN_SIZE = int(os.environ.get('API_COMPRESSION_MIN_SIZE', 1024))
+API_GZIP_LEVEL = int(os.environ.get('API_GZIP_LEVEL', 6))
+API_BROTLI_QUALITY = int(os.environ.get('API_BROTLI_QUALITY', 5))
+API_COMPRESSION_CACHE_ENTRIES = int(os.environ.get('API_COMPRESSION_CACHE_ENTRIES', 128))
+
+# Seconds between food table version checks for the in-memory food catalog
+FOOD_CATALOG_CHECK_INTERVAL = float(os.environ.get('FOOD_CATALOG_CHECK_INTERVAL', 5))
+
+# Memory-mapped food catalog artifacts shared by worker processes
+# (manage.py build_food_catalog); empty disables them
+FOOD_CATALOG_ARTIFACT_DIR = os.environ.get('FOOD_CATALOG_ARTIFACT_DIR', str(BASE_DIR / 'food_catalog'))
+
+# Diet chart portion engine: optimizer (macro-aware, NumPy) or greedy
+DIET_CHART_ENGINE = os.environ.get('DIET_CHART_ENGINE', 'optimizer')
+
+# Memoized chart templates: entries per process (0 disables), TTL in seconds
+# and the calorie band width targets are rounded to
+DIET_CHART_CACHE_ENTRIES = int(os.environ.get('DIET_CHART_CACHE_ENTRIES', 256))
+DIET_CHART_CACHE_TTL = int(os.environ.get('DIET_CHART_CACHE_TTL', 3600))
+DIET_CHART_CALORIE_BAND = int(os.environ.get('DIET_CHART_CALORIE_BAND', 50))
+
+# Multi-day plans: days generated with the chart (the rest on first access)
+# and days before a daily menu repeats
+DIET_PLAN_INITIAL_DAYS = int(os.environ.get('DIET_PLAN_INITIAL_DAYS', 7))
+DIET_PLAN_ROTATION_DAYS = int(os.environ.get('DIET_PLAN_ROTATION_DAYS', 4))
+
+# Background jobs (manage.py run_jobs): jobs per worker process, retry
+# backoff base and heartbeat timeout in seconds, attempts per job
+JOB_WORKER_CONCURRENCY = int(os.environ.get('JOB_WORKER_CONCURRENCY', 2))
+JOB_RETRY_DELAY = int(os.environ.get('JOB_RETRY_DELAY', 30))
+JOB_TIMEOUT = int(os.environ.get('JOB_TIMEOUT', 600))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+
+# Cohort chart generation: process pool size (0 = up to 4, by CPU count) and
+# patients per worker task
+COHORT_WORKERS = int(os.environ.get('COHORT_WORKERS', 0))
+COHORT_CHUNK_SIZE = int(os.environ.get('COHORT_CHUNK_SIZE', 50))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -0,0 +1,66 @@
+"""
+NutriVeda streaming JSON responses
+
+Large list responses can be sent as a StreamingHttpResponse that reads rows
+from ``QuerySet.iterator(chunk_size=...)`` and encodes them a chunk at a time,
+so worker memory stays flat regardless of the number of rows. The body has
+the same envelope as the buffered responses, with ``total`` written last.
+"""
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from .responses import get_dumps, query_flag
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def get_chunk_size():
+    """Rows fetched and encoded per chunk (API_STREAM_CHUNK_SIZE)"""
+    return getattr(settings, 'API_STREAM_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def wants_stream(request):
+    """Whether the client asked for a streamed body with ?stream=1"""
+    return query_flag(request, 'stream')
+
+
+def iter_json_envelope(rows, to_dict, extra=None, chunk_size=None):
+    """Yield the JSON envelope for ``rows`` piece by piece"""
+    chunk_size = chunk_size or get_chunk_size()
+    dumps = get_dumps()
+
+    yield b'{"success":true,"data":['
+    total = 0
+    buffer = []
+    for row in rows:
+        buffer.append(dumps(to_dict(row)))
+        if len(buffer) >= chunk_size:
+            yield (b',' if total else b'') + b','.join(buffer)
+            total += len(buffer)
+            buffer = []
+    if buffer:
+        yield (b',' if total else b'') + b','.join(buffer)
+        total += len(buffer)
+
+    tail = [b'],"total":%d' % total]
+    for key, value in (extra or {}).items():
+        tail.append(b',' + dumps(key) + b':' + dumps(value))
+    tail.append(b'}')
+    yield b''.join(tail)
+
+
+def stream_queryset(queryset, projection, extra=None):
+    """Stream a values_list queryset through ``projection`` without buffering it
+
+    ``queryset`` may also be an already fetched list (for example a page).
+    """
+    chunk_size = get_chunk_size()
+    if hasattr(queryset, 'iterator'):
+        rows = queryset.iterator(chunk_size=chunk_size)
+    else:
+        rows = queryset
+    return StreamingHttpResponse(
+        iter_json_envelope(rows, projection.to_dict, extra, chunk_size),
+        content_type='application/json'
+    )
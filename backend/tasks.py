@@ -0,0 +1,59 @@
+"""
+NutriVeda background job handlers
+
+Each handler takes ``(payload, progress)`` and returns a JSON-serializable
+result; see ``backend.jobs``.
+"""
+
+from pathlib import Path
+
+from django.conf import settings
+
+from .cohort import generate_cohort_charts, safe_start_method, select_cohort
+from .diet_generator import parse_duration
+from .food_import import default_csv_path, import_foods_from_csv
+
+
+def cohort_charts(payload, progress):
+    """Generate diet charts for a cohort (same payload as the cohort API)"""
+    progress(0, 'Selecting patients')
+    patients, missing = select_cohort(payload.get('patient_ids'), payload.get('filter'))
+    result = generate_cohort_charts(
+        patients,
+        target_calories=int(payload.get('target_calories', 2000)),
+        goal=payload.get('goal', 'Maintenance'),
+        duration=parse_duration(payload.get('duration')),
+        workers=payload.get('workers'),
+        progress=progress,
+        # The job worker runs a heartbeat thread next to this one; do not fork it
+        start_method=safe_start_method()
+    )
+    result['chart_ids'] = [str(chart_id) for chart_id in result['chart_ids']]
+    result['missing_patient_ids'] = missing
+    return result
+
+
+def import_foods(payload, progress):
+    """Import foods from Book1.csv, or another CSV inside the project directory"""
+    csv_file = default_csv_path()
+    if payload.get('path'):
+        base_dir = Path(settings.BASE_DIR).resolve()
+        csv_file = (base_dir / payload['path']).resolve()
+        if base_dir not in csv_file.parents:
+            raise ValueError('path must be inside the project directory')
+    created = import_foods_from_csv(csv_file, progress)
+    return {'created': created}
+
+
+def train_models(payload, progress):
+    """Retrain the Prakriti model (model_bridge.py) and rewrite static/model_data.json
+
+    model_bridge resolves its dataset and output paths from the working
+    directory, so workers run from the project directory.
+    """
+    from model_bridge import ModelBridge
+
+    progress(0, 'Training')
+    if not ModelBridge().train_and_save_model():
+        raise RuntimeError('Model training failed; see the worker log')
+    return {'output': 'static/model_data.json'}
@@ -0,0 +1,57 @@
+"""
+NutriVeda API tests
+
+    python manage.py test backend
+"""
+
+from django.test import TestCase, override_settings
+
+from .models import FoodItem, TableVersion
+
+
+def create_food(name, **fields):
+    return FoodItem.objects.create(**{
+        'name': name, 'category': 'Grains', 'calories': 100, 'serving': '1 cup', 'protein': 3.0,
+        'carbs': 20.0, 'fat': 1.0, 'fiber': 2.0, 'virya': 'Hot', 'digestion': 'Easy', 'rasa': 'Sweet',
+        'guna': 'Light', 'vata_effect': '↓', 'pitta_effect': '=', 'kapha_effect': '↑', **fields
+    })
+
+
+# A long check interval: the catalog only notices writes through the ETag's version
+@override_settings(FOOD_CATALOG_CHECK_INTERVAL=3600, FOOD_CATALOG_ARTIFACT_DIR='')
+class FoodCatalogValidatorTests(TestCase):
+    """Food responses must match the ETag they are sent with"""
+
+    def setUp(self):
+        self.rice = create_food('Rice')
+        self.barley = create_food('Barley', calories=110)
+
+    def write_from_another_process(self):
+        # update() sends no signals, so this process's catalog is not invalidated,
+        # as with a write made by another worker
+        FoodItem.objects.filter(id=self.rice.id).update(name='Red Rice')
+        TableVersion.bump('fooditem')
+
+    def test_food_list_after_external_write(self):
+        first = self.client.get('/api/food-database/')
+        self.assertIn('Rice', [food['name'] for food in first.json()['data']])
+
+        self.write_from_another_process()
+        second = self.client.get('/api/food-database/')
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertIn('Red Rice', [food['name'] for food in second.json()['data']])
+
+        cached = self.client.get('/api/food-database/', HTTP_IF_NONE_MATCH=second['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        stale = self.client.get('/api/food-database/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(stale.status_code, 200)
+
+    def test_food_substitutes_after_external_write(self):
+        url = f'/api/food-database/{self.barley.id}/substitutes/'
+        first = self.client.get(url)
+        self.assertEqual([food['name'] for food in first.json()['data']], ['Rice'])
+
+        self.write_from_another_process()
+        second = self.client.get(url)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual([food['name'] for food in second.json()['data']], ['Red Rice'])
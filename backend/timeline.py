@@ -0,0 +1,56 @@
+"""
+NutriVeda patient timeline
+
+Merges a patient's diet charts and dosha assessments into one newest-first
+feed. Each source is read with a single keyset-paginated query on its
+(patient_id, created_at) index, so a page costs a fixed number of queries no
+matter how long the patient's history is.
+"""
+
+import heapq
+import uuid
+
+from .models import DietChart, DoshaAssessment
+from .pagination import encode_cursor, paginate_keyset
+from .serializers import DIET_CHART_SERIALIZER, DOSHA_ASSESSMENT_SERIALIZER
+
+# Summary fields per entry type; the chart_data and responses blobs are left out
+TIMELINE_SOURCES = (
+    ('diet_chart', DietChart, DIET_CHART_SERIALIZER,
+     ('id', 'goal', 'target_calories', 'duration', 'status')),
+    ('dosha_assessment', DoshaAssessment, DOSHA_ASSESSMENT_SERIALIZER,
+     ('id', 'assessment_type', 'primary_dosha', 'dosha_scores', 'confidence')),
+)
+
+
+def _entries(entry_type, rows, projection, position):
+    for row in rows:
+        created_at, pk = position(row)
+        entry = projection.to_dict(row)
+        entry['type'] = entry_type
+        entry['date'] = created_at
+        yield (created_at, pk), entry
+
+
+def patient_timeline(patient_id, limit, after=None):
+    """Return one page of timeline entries and the cursor for the next page"""
+    sources = []
+    has_more = False
+    for entry_type, model, serializer, keys in TIMELINE_SOURCES:
+        projection = serializer.compile(keys, extra_columns=('created_at', 'id'))
+        position = projection.position('created_at', 'id')
+        rows, next_cursor = paginate_keyset(
+            model.objects.filter(patient_id=patient_id).values_list(*projection.columns),
+            limit, after, position=position, pk_type=uuid.UUID
+        )
+        has_more = has_more or next_cursor is not None
+        sources.append(_entries(entry_type, rows, projection, position))
+
+    merged = list(heapq.merge(*sources, key=lambda item: item[0], reverse=True))
+    has_more = has_more or len(merged) > limit
+    page = merged[:limit]
+
+    next_cursor = None
+    if has_more and page:
+        next_cursor = encode_cursor(*page[-1][0])
+    return [entry for _, entry in page], next_cursor
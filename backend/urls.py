@@ -14,10 +14,21 @@ from . import views
 urlpatterns = [
     # API endpoints
     path('api/patients/', views.patients_api, name='patients'),
+    path('api/patients/search/', views.patients_search_api, name='patients_search'),
+    path('api/patients/<int:patient_id>/', views.patient_detail_api, name='patient_detail'),
+    path('api/patients/<int:patient_id>/timeline/', views.patient_timeline_api, name='patient_timeline'),
+    path('api/patients/import/', views.patients_import_api, name='patients_import'),
     path('api/food-database/', views.food_database_api, name='food_database'),
+    path('api/food-database/<int:food_id>/substitutes/', views.food_substitutes_api, name='food_substitutes'),
     path('api/diet-charts/', views.diet_charts_api, name='diet_charts'),
+    path('api/diet-charts/cohort/', views.diet_charts_cohort_api, name='diet_charts_cohort'),
+    path('api/diet-charts/<uuid:chart_id>/', views.diet_chart_detail_api, name='diet_chart_detail'),
+    path('api/diet-charts/<uuid:chart_id>/days/', views.diet_chart_days_api, name='diet_chart_days'),
+    path('api/diet-charts/<uuid:chart_id>/meals/', views.diet_chart_meal_api, name='diet_chart_meal'),
     path('api/dosha-assessment/', views.dosha_assessment_api, name='dosha_assessment'),
     path('api/analytics/', views.analytics_api, name='analytics'),
+    path('api/jobs/', views.jobs_api, name='jobs'),
+    path('api/jobs/<uuid:job_id>/', views.job_detail_api, name='job_detail'),
 ]
 
 # Serve static files in development
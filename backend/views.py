@@ -2,90 +2,104 @@
 NutriVeda API Views
 """
 
-from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
+from django.core.exceptions import ValidationError
 import json
-import uuid
-from datetime import datetime
 
-from .models import Patient, FoodItem, DietChart, DoshaAssessment
+from .chart_edit import edit_meal
+from .chart_storage import compact_chart, hydrate_chart
+from .catalog import get_catalog, table_stamp
+from .cohort import generate_cohort_charts, select_cohort
+from .conditional import get_table_versions, versioned
+from .diet_generator import extend_plan, fill_plan_fields, generate_database_driven_diet_chart, parse_duration
+from .food_facets import get_facet_index, parse_food_filters, parse_food_sort, sort_food_rows
+from .food_search import get_search_index, rank_rows
+from .food_substitutes import get_substitute_index, parse_substitute_params
+from .jobs import enqueue
+from .models import Patient, FoodItem, DietChart, DoshaAssessment, Job
+from .pagination import InvalidCursor, paginate_keyset, parse_limit, parse_offset
+from .patient_import import (
+    ImportFormatError, apply_patient_changes, compute_bmi, detect_format, get_batch_size,
+    import_patients, iter_records, patient_from_data,
+)
+from .responses import json_response, query_flag
+from .search import filter_patients, filter_patients_by_text, parse_age_range
+from .serializers import (
+    PATIENT_SERIALIZER, FOOD_SERIALIZER, FOOD_COMPACT_KEYS, DIET_CHART_SERIALIZER,
+    DIET_CHART_COMPACT_SERIALIZER, DIET_CHART_SUMMARY_KEYS, JOB_SERIALIZER,
+)
+from .streaming import stream_queryset, wants_stream
+from .timeline import patient_timeline
+
+# Plan days returned (and generated) by one diet_chart_days_api request
+MAX_PLAN_DAYS_PER_REQUEST = 31
+# DietChart columns needed to plan more days (see fill_plan_fields)
+PLAN_CHART_FIELDS = (
+    'id', 'duration', 'chart_data', 'created_at', 'target_calories', 'goal', 'patient__prakriti',
+)
 
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
+@versioned('patient')
 def patients_api(request):
     """Patient management API"""
     if request.method == 'GET':
-        patients = Patient.objects.all().order_by('-created_at')
-        patients_data = []
-        for patient in patients:
-            patients_data.append({
-                'id': patient.id,
-                'name': patient.name,
-                'age': patient.age,
-                'gender': patient.gender,
-                'phone': patient.phone,
-                'email': patient.email,
-                'height': patient.height,
-                'weight': patient.weight,
-                'bmi': patient.bmi,
-                'prakriti': patient.prakriti,
-                'diet': patient.diet,
-                'meal_frequency': patient.meal_frequency,
-                'water_intake': patient.water_intake,
-                'activity_level': patient.activity_level,
-                'bowel_movement': patient.bowel_movement,
-                'sleep_hours': patient.sleep_hours,
-                'stress_level': patient.stress_level,
-                'medical_history': patient.medical_history,
-                'current_medications': patient.current_medications,
-                'allergies': patient.allergies,
-                'occupation': patient.occupation,
-                'exercise_frequency': patient.exercise_frequency,
-                'last_visit': patient.last_visit.strftime('%Y-%m-%d'),
-                'created_at': patient.created_at.strftime('%Y-%m-%d')
-            })
+        try:
+            fields = PATIENT_SERIALIZER.parse_fields(request.GET.get('fields'))
+        except ValueError as e:
+            return json_response({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+        
+        # Keyset pagination is opt-in via ?limit= / ?after=
+        paginated = 'limit' in request.GET or 'after' in request.GET
+        projection = PATIENT_SERIALIZER.compile(
+            fields, extra_columns=('created_at', 'id') if paginated else ()
+        )
+        patients = Patient.objects.values_list(*projection.columns)
+        next_cursor = None
+        if paginated:
+            try:
+                limit = parse_limit(request.GET.get('limit'))
+                patients, next_cursor = paginate_keyset(
+                    patients, limit, request.GET.get('after'),
+                    position=projection.position('created_at', 'id')
+                )
+            except InvalidCursor as e:
+                return json_response({
+                    'success': False,
+                    'error': str(e)
+                }, status=400)
+        else:
+            patients = patients.order_by('-created_at', '-id')
         
-        return JsonResponse({
+        page_info = {}
+        if paginated:
+            page_info = {
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
+            }
+        if wants_stream(request):
+            return stream_queryset(patients, projection, page_info)
+        
+        patients_data = projection.serialize(patients)
+        return json_response({
             'success': True,
             'data': patients_data,
-            'total': len(patients_data)
+            'total': len(patients_data),
+            **page_info
         })
     
     elif request.method == 'POST':
         try:
             data = json.loads(request.body)
             
-            # Calculate BMI if height and weight provided
-            bmi = None
-            if data.get('height') and data.get('weight'):
-                height_m = float(data['height']) / 100
-                bmi = round(float(data['weight']) / (height_m * height_m), 1)
-            
-            # Create new patient in database
-            patient = Patient.objects.create(
-                name=data.get('name'),
-                age=data.get('age'),
-                gender=data.get('gender'),
-                phone=data.get('phone', ''),
-                email=data.get('email', ''),
-                height=data.get('height'),
-                weight=data.get('weight'),
-                bmi=bmi,
-                prakriti=data.get('prakriti', ''),
-                diet=data.get('diet', 'Vegetarian'),
-                meal_frequency=data.get('meal_frequency', 3),
-                water_intake=data.get('water_intake', 2.5),
-                activity_level=data.get('activity_level', 'Moderate'),
-                bowel_movement=data.get('bowel_movement', 'Regular'),
-                sleep_hours=data.get('sleep_hours', 7),
-                stress_level=data.get('stress_level', 'Medium'),
-                medical_history=data.get('medical_history', ''),
-                current_medications=data.get('current_medications', ''),
-                allergies=data.get('allergies', ''),
-                occupation=data.get('occupation', ''),
-                exercise_frequency=data.get('exercise_frequency', '')
-            )
+            # Create new patient in database, with BMI if height and weight provided
+            patient = patient_from_data(data)
+            patient.bmi = compute_bmi(data.get('height'), data.get('weight'))
+            patient.save()
             
             # Return patient data
             patient_data = {
@@ -111,92 +125,298 @@ def patients_api(request):
                 'allergies': patient.allergies,
                 'occupation': patient.occupation,
                 'exercise_frequency': patient.exercise_frequency,
-                'last_visit': patient.last_visit.strftime('%Y-%m-%d'),
-                'created_at': patient.created_at.strftime('%Y-%m-%d')
+                'last_visit': patient.last_visit,
+                'created_at': patient.created_at.date()
             }
             
-            return JsonResponse({
+            return json_response({
                 'success': True,
                 'message': 'Patient added successfully',
                 'data': patient_data
             })
             
         except Exception as e:
-            return JsonResponse({
+            return json_response({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+
+@csrf_exempt
+@require_http_methods(["GET", "PATCH"])
+@versioned('patient')
+def patient_detail_api(request, patient_id):
+    """Single patient API: read one patient or update some of its fields"""
+    try:
+        fields = PATIENT_SERIALIZER.parse_fields(request.GET.get('fields'))
+    except ValueError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    projection = PATIENT_SERIALIZER.compile(fields)
+    
+    updated_fields = None
+    if request.method == 'PATCH':
+        try:
+            data = json.loads(request.body)
+            if not isinstance(data, dict):
+                raise ValueError('PATCH body must be a JSON object')
+            patient = Patient.objects.get(id=patient_id)
+            updated_fields = apply_patient_changes(patient, data)
+            if updated_fields:
+                # Write only the changed columns
+                patient.save(update_fields=updated_fields)
+        except Patient.DoesNotExist:
+            return json_response({
+                'success': False,
+                'error': 'Patient not found'
+            }, status=404)
+        except ValidationError as e:
+            return json_response({
+                'success': False,
+                'error': e.message_dict
+            }, status=400)
+        except ValueError as e:
+            return json_response({
                 'success': False,
                 'error': str(e)
             }, status=400)
+    
+    row = Patient.objects.filter(id=patient_id).values_list(*projection.columns).first()
+    if row is None:
+        return json_response({
+            'success': False,
+            'error': 'Patient not found'
+        }, status=404)
+    
+    response_data = {
+        'success': True,
+        'data': projection.to_dict(row)
+    }
+    if updated_fields is not None:
+        response_data['message'] = 'Patient updated successfully'
+        response_data['updated_fields'] = updated_fields
+    return json_response(response_data)
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@versioned('patient', 'dietchart', 'doshaassessment')
+def patient_timeline_api(request, patient_id):
+    """Patient history API: diet charts and dosha assessments, newest first"""
+    patient = Patient.objects.filter(id=patient_id).values('id', 'name', 'prakriti').first()
+    if patient is None:
+        return json_response({
+            'success': False,
+            'error': 'Patient not found'
+        }, status=404)
+    
+    try:
+        limit = parse_limit(request.GET.get('limit'), default=20)
+        entries, next_cursor = patient_timeline(patient_id, limit, request.GET.get('after'))
+    except InvalidCursor as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    
+    return json_response({
+        'success': True,
+        'patient': patient,
+        'data': entries,
+        'total': len(entries),
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    })
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@versioned('patient')
+def patients_search_api(request):
+    """Patient search API: prefix match on name/phone/email plus filters"""
+    try:
+        fields = PATIENT_SERIALIZER.parse_fields(request.GET.get('fields'))
+        limit = parse_limit(request.GET.get('limit'), default=20)
+        age_min, age_max = parse_age_range(request.GET)
+    except ValueError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    
+    patients = filter_patients_by_text(Patient.objects.all(), request.GET.get('q', ''))
+    patients = filter_patients(
+        patients, request.GET.get('prakriti', ''), request.GET.get('gender', ''), age_min, age_max
+    )
+    
+    projection = PATIENT_SERIALIZER.compile(fields)
+    rows = patients.order_by('name', 'id').values_list(*projection.columns)[:limit]
+    patients_data = projection.serialize(rows)
+    
+    return json_response({
+        'success': True,
+        'data': patients_data,
+        'total': len(patients_data)
+    })
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def patients_import_api(request):
+    """Bulk patient import API (JSON array, NDJSON or CSV body)"""
+    try:
+        fmt = detect_format(request)
+        batch_size = get_batch_size(request.GET.get('batch_size'))
+        created, errors = import_patients(iter_records(request, fmt), batch_size)
+    except (ImportFormatError, UnicodeDecodeError) as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    
+    return json_response({
+        'success': True,
+        'message': f'Imported {created} patients',
+        'data': {
+            'created': created,
+            'failed': len(errors),
+            'errors': errors
+        }
+    })
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@versioned('fooditem')
 def food_database_api(request):
-    """Food database API"""
-    category = request.GET.get('category', '')
-    search = request.GET.get('search', '')
-    
-    # Start with all food items
-    foods = FoodItem.objects.all()
-    
-    # Apply filters
-    if category:
-        foods = foods.filter(category__iexact=category)
-    
-    if search:
-        foods = foods.filter(name__icontains=search)
-    
-    # Convert to list format
-    foods_data = []
-    for food in foods:
-        foods_data.append({
-            'id': food.id,
-            'name': food.name,
-            'category': food.category,
-            'calories': food.calories,
-            'serving': food.serving,
-            'protein': food.protein,
-            'carbs': food.carbs,
-            'fat': food.fat,
-            'fiber': food.fiber,
-            'virya': food.virya,
-            'digestion': food.digestion,
-            'rasa': food.rasa,
-            'guna': food.guna,
-            'vata': food.vata_effect,
-            'pitta': food.pitta_effect,
-            'kapha': food.kapha_effect,
-            'season': food.season,
-            'benefits': food.benefits,
-            'precautions': food.precautions,
-            'description': food.description
+    """Food database API, served from the in-memory food catalog
+    
+    ?search= returns ranked, typo-tolerant matches. Facets (category, virya,
+    guna, digestion, rasa, vata, pitta, kapha, season; comma-separated values)
+    and <nutrient>_min / <nutrient>_max ranges narrow the list, and the
+    response counts the foods per facet value (see backend.food_facets).
+    ?sort=<nutrient> / ?sort=-<nutrient> orders by a nutrient, ?compact=1
+    returns only FOOD_COMPACT_KEYS, and ?limit= / ?offset= return one page.
+    """
+    search = request.GET.get('search', '').strip()
+    
+    # Offset pagination is opt-in via ?limit= / ?offset=
+    paginated = 'limit' in request.GET or 'offset' in request.GET
+    try:
+        fields = FOOD_SERIALIZER.parse_fields(request.GET.get('fields'), food_default_fields(request))
+        filters, ranges = parse_food_filters(request.GET)
+        sort = parse_food_sort(request.GET.get('sort'))
+        if paginated:
+            limit = parse_limit(request.GET.get('limit'))
+            offset = parse_offset(request.GET.get('offset'))
+        catalog = request_catalog(request)
+        scores = get_search_index(catalog).scores(search) if search else None
+        mask, facets = get_facet_index(catalog).apply(filters, ranges, None if scores is None else scores > 0)
+    except ValueError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    projection = FOOD_SERIALIZER.compile(fields)
+    
+    rows = mask.nonzero()[0]
+    if scores is not None:
+        rows = rank_rows(rows, scores)
+    if sort:
+        rows = sort_food_rows(catalog, rows, sort)
+    matched = len(rows)
+    page_info = {'matched': matched}
+    if paginated:
+        rows = rows[offset:offset + limit]
+        has_more = offset + limit < matched
+        page_info.update({
+            'next_offset': offset + limit if has_more else None,
+            'has_more': has_more
         })
+    columns = projection.columns
+    foods = [tuple(getattr(catalog.foods[row], column) for column in columns) for row in rows]
+    if wants_stream(request):
+        return stream_queryset(foods, projection, extra={**page_info, 'facets': facets})
+    foods_data = projection.serialize(foods)
     
-    return JsonResponse({
+    return json_response({
         'success': True,
         'data': foods_data,
-        'total': len(foods_data)
+        'total': len(foods_data),
+        **page_info,
+        'facets': facets
     })
 
+def request_catalog(request):
+    """The food catalog at the ``fooditem`` version this response's ETag was computed from"""
+    version, updated_at = get_table_versions(request, ('fooditem',))['fooditem']
+    return get_catalog(table_stamp(version, updated_at))
+
+def food_default_fields(request):
+    """?compact=1 returns only the fields food pickers need"""
+    return FOOD_COMPACT_KEYS if query_flag(request, 'compact') else None
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@versioned('fooditem')
+def food_substitutes_api(request, food_id):
+    """The ?k= foods nutritionally closest to a food, optionally only those suiting ?dosha="""
+    try:
+        fields = FOOD_SERIALIZER.parse_fields(request.GET.get('fields'), food_default_fields(request))
+        limit, constitution = parse_substitute_params(request.GET)
+    except ValueError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    catalog = request_catalog(request)
+    if food_id not in catalog.index:
+        return json_response({
+            'success': False,
+            'error': 'Food not found'
+        }, status=404)
+    projection = FOOD_SERIALIZER.compile(fields)
+    
+    substitutes = get_substitute_index(catalog).substitutes(food_id, limit, constitution)
+    columns = projection.columns
+    substitutes_data = []
+    for food, similarity in substitutes:
+        food_data = projection.to_dict(tuple(getattr(food, column) for column in columns))
+        food_data['similarity'] = round(similarity, 4)
+        substitutes_data.append(food_data)
+    
+    return json_response({
+        'success': True,
+        'data': substitutes_data,
+        'total': len(substitutes_data)
+    })
+
+def diet_chart_serializer(request):
+    """?compact=1 returns chart_data in its stored form, referring to foods by ID"""
+    return DIET_CHART_COMPACT_SERIALIZER if query_flag(request, 'compact') else DIET_CHART_SERIALIZER
+
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
+@versioned('dietchart', 'patient', 'fooditem')
 def diet_charts_api(request):
     """Diet charts API"""
     if request.method == 'GET':
-        charts = DietChart.objects.all().order_by('-created_at')
-        charts_data = []
-        for chart in charts:
-            charts_data.append({
-                'id': str(chart.id),
-                'patient_id': chart.patient.id,
-                'patient_name': chart.patient.name,
-                'goal': chart.goal,
-                'target_calories': chart.target_calories,
-                'duration': chart.duration,
-                'chart_data': chart.chart_data,
-                'created_at': chart.created_at.strftime('%Y-%m-%d'),
-                'status': chart.status
-            })
+        # ?summary=1 leaves out the chart_data blob; fetch it from the detail endpoint
+        default_fields = DIET_CHART_SUMMARY_KEYS if query_flag(request, 'summary') else None
+        serializer = diet_chart_serializer(request)
+        try:
+            fields = serializer.parse_fields(request.GET.get('fields'), default_fields)
+        except ValueError as e:
+            return json_response({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+        projection = serializer.compile(fields)
+        
+        # patient__name is fetched through a join rather than a query per chart
+        charts = DietChart.objects.values_list(*projection.columns).order_by('-created_at')
+        if wants_stream(request):
+            return stream_queryset(charts, projection)
+        charts_data = projection.serialize(charts)
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'data': charts_data,
             'total': len(charts_data)
@@ -209,41 +429,200 @@ def diet_charts_api(request):
             # Generate diet chart based on patient constitution
             patient_id = data.get('patient_id')
             patient = Patient.objects.get(id=patient_id)
+            duration = parse_duration(data.get('duration'))
             
-            diet_chart = generate_ayurvedic_diet_chart(patient, data)
+            diet_chart = generate_database_driven_diet_chart(
+                patient, data.get('target_calories', 2000), data.get('goal', 'Maintenance'),
+                duration=duration
+            )
             
             new_chart = DietChart.objects.create(
                 patient=patient,
                 goal=data.get('goal', 'Maintenance'),
                 target_calories=data.get('target_calories', 2000),
-                duration=data.get('duration', 30),
-                chart_data=diet_chart
+                duration=duration,
+                chart_data=compact_chart(diet_chart)
             )
             
             chart_data = {
-                'id': str(new_chart.id),
+                'id': new_chart.id,
                 'patient_id': patient_id,
                 'patient_name': patient.name,
                 'goal': new_chart.goal,
                 'target_calories': new_chart.target_calories,
                 'duration': new_chart.duration,
-                'chart_data': new_chart.chart_data,
-                'created_at': new_chart.created_at.strftime('%Y-%m-%d'),
+                'chart_data': diet_chart,
+                'created_at': new_chart.created_at.date(),
                 'status': new_chart.status
             }
             
-            return JsonResponse({
+            return json_response({
                 'success': True,
                 'message': 'Diet chart generated successfully',
                 'data': chart_data
             })
             
         except Exception as e:
-            return JsonResponse({
+            return json_response({
                 'success': False,
                 'error': str(e)
             }, status=400)
 
+@csrf_exempt
+@require_http_methods(["POST"])
+def diet_charts_cohort_api(request):
+    """Generate diet charts for a list of patients or a patient filter ("async": true queues a job)"""
+    try:
+        data = json.loads(request.body)
+        if data.get('async'):
+            # Validate now so a bad request fails here rather than in the worker
+            select_cohort(data.get('patient_ids'), data.get('filter'))
+            parse_duration(data.get('duration'))
+            payload = {key: value for key, value in data.items() if key != 'async'}
+            return job_accepted(enqueue('cohort_charts', payload))
+        patients, missing = select_cohort(data.get('patient_ids'), data.get('filter'))
+        target_calories = int(data.get('target_calories', 2000))
+        duration = parse_duration(data.get('duration'))
+        result = generate_cohort_charts(
+            patients,
+            target_calories=target_calories,
+            goal=data.get('goal', 'Maintenance'),
+            duration=duration,
+            workers=data.get('workers')
+        )
+    except (json.JSONDecodeError, AttributeError, TypeError, ValueError) as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    
+    result['missing_patient_ids'] = missing
+    return json_response({
+        'success': True,
+        'message': f"Generated {result['created']} diet charts",
+        'data': result
+    })
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@versioned('dietchart', 'patient', 'fooditem')
+def diet_chart_detail_api(request, chart_id):
+    """Single diet chart API, including the full chart_data"""
+    serializer = diet_chart_serializer(request)
+    try:
+        fields = serializer.parse_fields(request.GET.get('fields'))
+    except ValueError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    projection = serializer.compile(fields)
+    
+    row = DietChart.objects.filter(id=chart_id).values_list(*projection.columns).first()
+    if row is None:
+        return json_response({
+            'success': False,
+            'error': 'Diet chart not found'
+        }, status=404)
+    
+    return json_response({
+        'success': True,
+        'data': projection.to_dict(row)
+    })
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def diet_chart_days_api(request, chart_id):
+    """Days of a multi-day plan (?from=&to=); days not generated yet are built on first access
+    
+    Only the requested days are generated, so stored charts may have null
+    entries for days nobody has asked for.
+    """
+    try:
+        first_day = int(request.GET.get('from') or 1)
+        last_day = int(request.GET.get('to') or first_day + 6)
+        if first_day < 1 or last_day < first_day:
+            raise ValueError('from must be at least 1 and not after to')
+        if last_day - first_day + 1 > MAX_PLAN_DAYS_PER_REQUEST:
+            raise ValueError(f'At most {MAX_PLAN_DAYS_PER_REQUEST} days per request')
+    except ValueError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    
+    chart = DietChart.objects.filter(id=chart_id).select_related('patient').only(*PLAN_CHART_FIELDS).first()
+    if chart is None:
+        return json_response({
+            'success': False,
+            'error': 'Diet chart not found'
+        }, status=404)
+    if first_day > chart.duration:
+        return json_response({
+            'success': False,
+            'error': f'from must not be after the last day of the plan ({chart.duration})'
+        }, status=400)
+    
+    chart_data = hydrate_chart(chart.chart_data)
+    filled = fill_plan_fields(chart_data, chart)
+    if extend_plan(chart_data, first_day, last_day, chart.duration) or filled:
+        chart.chart_data = compact_chart(chart_data)
+        chart.save(update_fields=['chart_data'])
+    days = chart_data['days']
+    
+    return json_response({
+        'success': True,
+        'data': {
+            'chart_id': chart.id,
+            'duration': chart.duration,
+            'generated_days': sum(day is not None for day in days),
+            'days': days[first_day - 1:last_day]
+        }
+    })
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def diet_chart_meal_api(request, chart_id):
+    """Regenerate one meal of a chart, or swap one item ("item": index, optional "food_id")"""
+    chart = DietChart.objects.filter(id=chart_id).select_related('patient').only(*PLAN_CHART_FIELDS).first()
+    if chart is None:
+        return json_response({
+            'success': False,
+            'error': 'Diet chart not found'
+        }, status=404)
+    
+    try:
+        data = json.loads(request.body)
+        if not data.get('meal'):
+            raise ValueError('meal is required')
+        item = data.get('item')
+        food_id = data.get('food_id')
+        plan_day, meal = edit_meal(
+            chart,
+            day=int(data.get('day', 1)),
+            meal_name=data['meal'],
+            item=int(item) if item is not None else None,
+            food_id=int(food_id) if food_id is not None else None,
+            exclude=[int(excluded) for excluded in data.get('exclude', [])]
+        )
+    except (json.JSONDecodeError, AttributeError, KeyError, TypeError, ValueError) as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    
+    return json_response({
+        'success': True,
+        'message': f"{meal['name']} updated",
+        'data': {
+            'chart_id': chart.id,
+            'day': plan_day['day'],
+            'date': plan_day['date'],
+            'totalCalories': plan_day['totalCalories'],
+            'meal': meal
+        }
+    })
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def dosha_assessment_api(request):
@@ -263,7 +642,7 @@ def dosha_assessment_api(request):
         )
         
         assessment_data = {
-            'id': str(assessment.id),
+            'id': assessment.id,
             'patient_id': assessment.patient_id,
             'assessment_type': assessment.assessment_type,
             'responses': assessment.responses,
@@ -271,22 +650,23 @@ def dosha_assessment_api(request):
             'dosha_scores': assessment.dosha_scores,
             'confidence': assessment.confidence,
             'recommendations': assessment.recommendations,
-            'created_at': assessment.created_at.strftime('%Y-%m-%d %H:%M:%S')
+            'created_at': assessment.created_at
         }
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'message': 'Dosha assessment saved successfully',
             'data': assessment_data
         })
         
     except Exception as e:
-        return JsonResponse({
+        return json_response({
             'success': False,
             'error': str(e)
         }, status=400)
 
 @csrf_exempt
+@versioned('patient', 'dietchart', 'doshaassessment', 'fooditem')
 def analytics_api(request):
     """Analytics and statistics API"""
     total_patients = Patient.objects.count()
@@ -305,10 +685,10 @@ def analytics_api(request):
         recent_patients.append({
             'id': patient.id,
             'name': patient.name,
-            'created_at': patient.created_at.strftime('%Y-%m-%d')
+            'created_at': patient.created_at.date()
         })
     
-    return JsonResponse({
+    return json_response({
         'success': True,
         'data': {
             'total_patients': total_patients,
@@ -320,100 +700,75 @@ def analytics_api(request):
         }
     })
 
-# Helper functions
-def generate_ayurvedic_diet_chart(patient, preferences):
-    """Generate personalized Ayurvedic diet chart"""
-    constitution = patient.prakriti.lower()
-    goal = preferences.get('goal', 'Maintenance')
-    target_calories = preferences.get('target_calories', 2000)
-    
-    # Base meal structure
-    meals = []
-    
-    # Early Morning (6:00 AM)
-    early_morning = {
-        'name': 'Early Morning',
-        'time': '6:00 AM',
-        'items': [],
-        'total_calories': 0
-    }
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+def jobs_api(request):
+    """Background jobs API: list recent jobs or queue a new one"""
+    if request.method == 'GET':
+        try:
+            limit = parse_limit(request.GET.get('limit'))
+        except ValueError as e:
+            return json_response({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+        
+        jobs = Job.objects.all()
+        if request.GET.get('status'):
+            jobs = jobs.filter(status=request.GET['status'])
+        if request.GET.get('kind'):
+            jobs = jobs.filter(kind=request.GET['kind'])
+        projection = JOB_SERIALIZER.compile()
+        jobs_data = projection.serialize(jobs.order_by('-created_at').values_list(*projection.columns)[:limit])
+        
+        return json_response({
+            'success': True,
+            'data': jobs_data,
+            'total': len(jobs_data)
+        })
     
-    if 'vata' in constitution:
-        early_morning['items'] = [
-            {'name': 'Warm Water with Ginger', 'quantity': '1 glass', 'calories': 10, 'virya': 'Hot'},
-            {'name': 'Soaked Almonds', 'quantity': '5-6 pieces', 'calories': 70, 'virya': 'Hot'}
-        ]
-    elif 'pitta' in constitution:
-        early_morning['items'] = [
-            {'name': 'Cool Water with Lime', 'quantity': '1 glass', 'calories': 8, 'virya': 'Cold'},
-            {'name': 'Soaked Almonds (peeled)', 'quantity': '4-5 pieces', 'calories': 60, 'virya': 'Hot'}
-        ]
-    else:  # Kapha
-        early_morning['items'] = [
-            {'name': 'Warm Water with Honey', 'quantity': '1 glass', 'calories': 20, 'virya': 'Hot'},
-            {'name': 'Light Herbal Tea', 'quantity': '1 cup', 'calories': 5, 'virya': 'Hot'}
-        ]
-    
-    early_morning['total_calories'] = sum(item['calories'] for item in early_morning['items'])
-    meals.append(early_morning)
-    
-    return {
-        'meals': meals,
-        'total_calories': sum(meal['total_calories'] for meal in meals),
-        'constitution_guidelines': get_constitution_guidelines(constitution),
-        'seasonal_recommendations': get_seasonal_recommendations(),
-        'foods_to_avoid': get_foods_to_avoid(constitution)
-    }
-
-def get_constitution_guidelines(constitution):
-    """Get dietary guidelines based on constitution"""
-    guidelines = {
-        'vata': [
-            'Eat warm, cooked, and moist foods',
-            'Favor sweet, sour, and salty tastes',
-            'Maintain regular meal times',
-            'Avoid cold, dry, and raw foods',
-            'Include healthy oils and ghee'
-        ],
-        'pitta': [
-            'Choose cooling and refreshing foods',
-            'Favor sweet, bitter, and astringent tastes',
-            'Avoid spicy, fried, and acidic foods',
-            'Eat at regular intervals',
-            'Include fresh fruits and vegetables'
-        ],
-        'kapha': [
-            'Eat light, warm, and spicy foods',
-            'Favor pungent, bitter, and astringent tastes',
-            'Avoid heavy, oily, and sweet foods',
-            'Maintain active lifestyle',
-            'Use warming spices'
-        ]
-    }
-    return guidelines.get(constitution, guidelines['vata'])
+    try:
+        data = json.loads(request.body)
+        job = enqueue(data.get('kind'), data.get('payload'), data.get('max_attempts'))
+    except (json.JSONDecodeError, AttributeError, TypeError, ValueError) as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    
+    return job_accepted(job)
 
-def get_seasonal_recommendations():
-    """Get seasonal dietary recommendations"""
-    current_month = datetime.now().month
-    
-    if current_month in [12, 1, 2]:  # Winter
-        return ['Warming foods', 'Hot beverages', 'Cooked grains', 'Healthy fats']
-    elif current_month in [3, 4, 5]:  # Spring
-        return ['Light foods', 'Detox drinks', 'Fresh vegetables', 'Minimal oils']
-    elif current_month in [6, 7, 8]:  # Summer
-        return ['Cooling foods', 'Fresh fruits', 'Coconut water', 'Light meals']
-    else:  # Monsoon
-        return ['Warm foods', 'Digestive spices', 'Avoid raw foods', 'Herbal teas']
+@csrf_exempt
+@require_http_methods(["GET"])
+def job_detail_api(request, job_id):
+    """Status, progress and result of one background job"""
+    projection = JOB_SERIALIZER.compile()
+    row = Job.objects.filter(id=job_id).values_list(*projection.columns).first()
+    if row is None:
+        return json_response({
+            'success': False,
+            'error': 'Job not found'
+        }, status=404)
+    
+    return json_response({
+        'success': True,
+        'data': projection.to_dict(row)
+    })
 
-def get_foods_to_avoid(constitution):
-    """Get foods to avoid based on constitution"""
-    restrictions = {
-        'vata': ['Cold foods', 'Raw vegetables', 'Dry foods', 'Excess bitter taste'],
-        'pitta': ['Spicy foods', 'Sour foods', 'Fried foods', 'Alcohol', 'Excess heat'],
-        'kapha': ['Heavy foods', 'Sweet foods', 'Dairy', 'Fried foods', 'Cold foods']
-    }
-    return restrictions.get(constitution, [])
+def job_accepted(job):
+    """202 response for a newly queued job"""
+    return json_response({
+        'success': True,
+        'message': f'{job.kind} job queued',
+        'data': {
+            'id': job.id,
+            'kind': job.kind,
+            'status': job.status,
+            'status_url': f'/api/jobs/{job.id}/'
+        }
+    }, status=202)
 
+# Helper functions
 def generate_dosha_recommendations(primary_dosha):
     """Generate recommendations based on primary dosha"""
     recommendations = {
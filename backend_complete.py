@@ -9,7 +9,7 @@ import sys
 import django
 from django.conf import settings
 from django.core.management import execute_from_command_line
-from django.http import JsonResponse, HttpResponse
+from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.urls import path, include
@@ -58,6 +58,9 @@ django.setup()
 
 # Import models after Django setup
 from backend.models import Patient, FoodItem, DietChart, DoshaAssessment
+from backend.responses import json_response
+from backend.chart_storage import hydrate_chart
+from backend.diet_generator import parse_duration
 
 # API Views
 @csrf_exempt
@@ -92,17 +95,17 @@ def patients_api(request):
                     'allergies': patient.allergies,
                     'occupation': patient.occupation,
                     'exercise_frequency': patient.exercise_frequency,
-                    'last_visit': patient.last_visit.strftime('%Y-%m-%d'),
-                    'created_at': patient.created_at.strftime('%Y-%m-%d')
+                    'last_visit': patient.last_visit,
+                    'created_at': patient.created_at.date()
                 })
             
-            return JsonResponse({
+            return json_response({
                 'success': True,
                 'data': patients_data,
                 'total': len(patients_data)
             })
         except Exception as e:
-            return JsonResponse({
+            return json_response({
                 'success': False,
                 'error': str(e)
             }, status=500)
@@ -166,18 +169,18 @@ def patients_api(request):
                 'allergies': patient.allergies,
                 'occupation': patient.occupation,
                 'exercise_frequency': patient.exercise_frequency,
-                'last_visit': patient.last_visit.strftime('%Y-%m-%d'),
-                'created_at': patient.created_at.strftime('%Y-%m-%d')
+                'last_visit': patient.last_visit,
+                'created_at': patient.created_at.date()
             }
             
-            return JsonResponse({
+            return json_response({
                 'success': True,
                 'message': 'Patient added successfully',
                 'data': patient_data
             })
             
         except Exception as e:
-            return JsonResponse({
+            return json_response({
                 'success': False,
                 'error': str(e)
             }, status=400)
@@ -226,13 +229,13 @@ def food_database_api(request):
                 'description': food.description
             })
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'data': foods_data,
             'total': len(foods_data)
         })
     except Exception as e:
-        return JsonResponse({
+        return json_response({
             'success': False,
             'error': str(e)
         }, status=500)
@@ -247,24 +250,24 @@ def diet_charts_api(request):
             charts_data = []
             for chart in charts:
                 charts_data.append({
-                    'id': str(chart.id),
+                    'id': chart.id,
                     'patient_id': chart.patient.id,
                     'patient_name': chart.patient.name,
                     'goal': chart.goal,
                     'target_calories': chart.target_calories,
                     'duration': chart.duration,
-                    'chart_data': chart.chart_data,
-                    'created_at': chart.created_at.strftime('%Y-%m-%d'),
+                    'chart_data': hydrate_chart(chart.chart_data),
+                    'created_at': chart.created_at.date(),
                     'status': chart.status
                 })
             
-            return JsonResponse({
+            return json_response({
                 'success': True,
                 'data': charts_data,
                 'total': len(charts_data)
             })
         except Exception as e:
-            return JsonResponse({
+            return json_response({
                 'success': False,
                 'error': str(e)
             }, status=500)
@@ -283,30 +286,30 @@ def diet_charts_api(request):
                 patient=patient,
                 goal=data.get('goal', 'Maintenance'),
                 target_calories=data.get('target_calories', 2000),
-                duration=data.get('duration', 30),
+                duration=parse_duration(data.get('duration')),
                 chart_data=diet_chart
             )
             
             chart_data = {
-                'id': str(new_chart.id),
+                'id': new_chart.id,
                 'patient_id': patient_id,
                 'patient_name': patient.name,
                 'goal': new_chart.goal,
                 'target_calories': new_chart.target_calories,
                 'duration': new_chart.duration,
                 'chart_data': new_chart.chart_data,
-                'created_at': new_chart.created_at.strftime('%Y-%m-%d'),
+                'created_at': new_chart.created_at.date(),
                 'status': new_chart.status
             }
             
-            return JsonResponse({
+            return json_response({
                 'success': True,
                 'message': 'Diet chart generated successfully',
                 'data': chart_data
             })
             
         except Exception as e:
-            return JsonResponse({
+            return json_response({
                 'success': False,
                 'error': str(e)
             }, status=400)
@@ -456,10 +459,10 @@ def analytics_api(request):
             recent_patients.append({
                 'id': patient.id,
                 'name': patient.name,
-                'created_at': patient.created_at.strftime('%Y-%m-%d')
+                'created_at': patient.created_at.date()
             })
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'data': {
                 'total_patients': total_patients,
@@ -471,7 +474,7 @@ def analytics_api(request):
             }
         })
     except Exception as e:
-        return JsonResponse({
+        return json_response({
             'success': False,
             'error': str(e)
         }, status=500)
@@ -9,7 +9,7 @@ import sys
 import django
 from django.conf import settings
 from django.core.management import execute_from_command_line
-from django.http import JsonResponse, HttpResponse
+from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.urls import path, include
@@ -37,6 +37,7 @@ if not settings.configured:
         ],
         MIDDLEWARE=[
             'corsheaders.middleware.CorsMiddleware',
+            'backend.middleware.APICompressionMiddleware',
             'django.middleware.common.CommonMiddleware',
             'django.contrib.sessions.middleware.SessionMiddleware',
             'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -58,6 +59,10 @@ django.setup()
 
 # Import models after Django setup
 from backend.models import Patient, FoodItem, DietChart, DoshaAssessment
+from backend.responses import json_response
+from backend.chart_storage import compact_chart, hydrate_chart
+from backend.diet_generator import generate_database_driven_diet_chart, parse_duration
+from backend.food_import import import_foods_from_csv
 
 # API Views
 @csrf_exempt
@@ -91,11 +96,11 @@ def patients_api(request):
                 'allergies': patient.allergies,
                 'occupation': patient.occupation,
                 'exercise_frequency': patient.exercise_frequency,
-                'last_visit': patient.last_visit.strftime('%Y-%m-%d'),
-                'created_at': patient.created_at.strftime('%Y-%m-%d')
+                'last_visit': patient.last_visit,
+                'created_at': patient.created_at.date()
             })
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'data': patients_data,
             'total': len(patients_data)
@@ -160,18 +165,18 @@ def patients_api(request):
                 'allergies': patient.allergies,
                 'occupation': patient.occupation,
                 'exercise_frequency': patient.exercise_frequency,
-                'last_visit': patient.last_visit.strftime('%Y-%m-%d'),
-                'created_at': patient.created_at.strftime('%Y-%m-%d')
+                'last_visit': patient.last_visit,
+                'created_at': patient.created_at.date()
             }
             
-            return JsonResponse({
+            return json_response({
                 'success': True,
                 'message': 'Patient added successfully',
                 'data': patient_data
             })
             
         except Exception as e:
-            return JsonResponse({
+            return json_response({
                 'success': False,
                 'error': str(e)
             }, status=400)
@@ -219,270 +224,12 @@ def food_database_api(request):
             'description': food.description
         })
     
-    return JsonResponse({
+    return json_response({
         'success': True,
         'data': foods_data,
         'total': len(foods_data)
     })
 
-def generate_database_driven_diet_chart(patient, target_calories, goal):
-    """Generate diet chart using foods from the database based on patient constitution"""
-    constitution = patient.prakriti.lower() if patient.prakriti else 'vata'
-    
-    # Define meal structure with calorie distribution
-    meal_structure = [
-        {'name': 'Early Morning', 'time': '6:00 AM', 'calorie_percent': 0.05},
-        {'name': 'Breakfast', 'time': '8:00 AM', 'calorie_percent': 0.25},
-        {'name': 'Mid-Morning Snack', 'time': '11:00 AM', 'calorie_percent': 0.10},
-        {'name': 'Lunch', 'time': '1:00 PM', 'calorie_percent': 0.35},
-        {'name': 'Evening Snack', 'time': '4:00 PM', 'calorie_percent': 0.10},
-        {'name': 'Dinner', 'time': '7:00 PM', 'calorie_percent': 0.15}
-    ]
-    
-    meals = []
-    
-    for meal_info in meal_structure:
-        meal_calories = int(target_calories * meal_info['calorie_percent'])
-        meal_items = select_foods_for_meal(constitution, meal_info['name'], meal_calories)
-        
-        meal = {
-            'name': meal_info['name'],
-            'time': meal_info['time'],
-            'items': meal_items,
-            'totalCalories': sum(item['calories'] for item in meal_items)
-        }
-        meals.append(meal)
-    
-    # Add bedtime drink
-    bedtime_items = select_foods_for_meal(constitution, 'Bedtime', 50)
-    meals.append({
-        'name': 'Bedtime',
-        'time': '9:00 PM',
-        'items': bedtime_items,
-        'totalCalories': sum(item['calories'] for item in bedtime_items)
-    })
-    
-    return {
-        'patientName': patient.name,
-        'constitution': patient.prakriti,
-        'goal': goal,
-        'calories': target_calories,
-        'duration': 30,
-        'date': datetime.now().strftime('%Y-%m-%d'),
-        'meals': meals,
-        'guidelines': get_constitution_guidelines(constitution),
-        'seasonalRecommendations': get_seasonal_recommendations(),
-        'doNotEat': get_foods_to_avoid(constitution)
-    }
-
-def select_foods_for_meal(constitution, meal_name, target_calories):
-    """Select appropriate foods from database for a specific meal based on constitution"""
-    foods = []
-    
-    # Define meal categories and their calorie distribution
-    if meal_name == 'Early Morning':
-        categories = ['Beverages', 'Nuts']
-        calorie_distribution = [0.3, 0.7]
-    elif meal_name == 'Breakfast':
-        categories = ['Grains', 'Fruits', 'Beverages']
-        calorie_distribution = [0.6, 0.3, 0.1]
-    elif meal_name == 'Mid-Morning Snack':
-        categories = ['Beverages', 'Nuts', 'Fruits']
-        calorie_distribution = [0.2, 0.5, 0.3]
-    elif meal_name == 'Lunch':
-        categories = ['Grains', 'Legumes', 'Vegetables', 'Dairy']
-        calorie_distribution = [0.4, 0.3, 0.2, 0.1]
-    elif meal_name == 'Evening Snack':
-        categories = ['Beverages', 'Nuts', 'Fruits']
-        calorie_distribution = [0.3, 0.4, 0.3]
-    elif meal_name == 'Dinner':
-        categories = ['Grains', 'Vegetables', 'Dairy']
-        calorie_distribution = [0.5, 0.3, 0.2]
-    elif meal_name == 'Bedtime':
-        categories = ['Beverages', 'Dairy']
-        calorie_distribution = [0.7, 0.3]
-    else:
-        categories = ['Grains', 'Vegetables']
-        calorie_distribution = [0.6, 0.4]
-    
-    # Select foods for each category
-    for i, category in enumerate(categories):
-        if i < len(calorie_distribution):
-            category_calories = int(target_calories * calorie_distribution[i])
-            category_foods = get_foods_by_category_and_constitution(category, constitution, category_calories)
-            foods.extend(category_foods)
-    
-    # If no foods found, add some basic items
-    if not foods:
-        foods = get_fallback_foods(meal_name, target_calories)
-    
-    return foods
-
-def get_foods_by_category_and_constitution(category, constitution, target_calories):
-    """Get foods from database filtered by category and constitution compatibility"""
-    try:
-        # Get foods from the category
-        category_foods = FoodItem.objects.filter(category__iexact=category)
-        
-        # Filter by constitution compatibility
-        constitution_foods = []
-        for food in category_foods:
-            if is_food_compatible_with_constitution(food, constitution):
-                constitution_foods.append(food)
-        
-        # If no compatible foods found, get any foods from category
-        if not constitution_foods:
-            constitution_foods = list(category_foods)
-        
-        # Select foods to meet calorie target
-        selected_foods = []
-        remaining_calories = target_calories
-        
-        # Sort by constitution compatibility (prefer foods that balance the constitution)
-        constitution_foods.sort(key=lambda x: get_constitution_compatibility_score(x, constitution), reverse=True)
-        
-        for food in constitution_foods[:5]:  # Limit to 5 foods per category
-            if remaining_calories <= 0:
-                break
-                
-            # Calculate quantity based on calories
-            quantity = min(remaining_calories / food.calories, 3)  # Max 3 servings
-            if quantity >= 0.5:  # Only include if at least half serving
-                selected_foods.append({
-                    'name': food.name,
-                    'quantity': f"{quantity:.1f} {food.serving}",
-                    'calories': int(food.calories * quantity),
-                    'virya': food.virya,
-                    'rasa': food.rasa,
-                    'category': food.category
-                })
-                remaining_calories -= int(food.calories * quantity)
-        
-        return selected_foods
-        
-    except Exception as e:
-        print(f"Error selecting foods: {e}")
-        return []
-
-def is_food_compatible_with_constitution(food, constitution):
-    """Check if food is compatible with patient's constitution"""
-    if constitution == 'vata':
-        # Vata needs grounding, warming foods
-        return food.virya.lower() in ['hot', 'warm'] and food.guna.lower() in ['heavy', 'moist']
-    elif constitution == 'pitta':
-        # Pitta needs cooling, calming foods
-        return food.virya.lower() in ['cold', 'cool'] and food.guna.lower() in ['light', 'cooling']
-    elif constitution == 'kapha':
-        # Kapha needs light, warming foods
-        return food.virya.lower() in ['hot', 'warm'] and food.guna.lower() in ['light', 'dry']
-    return True  # Default to compatible
-
-def get_constitution_compatibility_score(food, constitution):
-    """Get a score indicating how well a food suits the constitution"""
-    score = 0
-    
-    if constitution == 'vata':
-        if food.virya.lower() in ['hot', 'warm']: score += 2
-        if food.guna.lower() in ['heavy', 'moist']: score += 2
-        if food.vata_effect == '↓': score += 3  # Foods that reduce vata
-    elif constitution == 'pitta':
-        if food.virya.lower() in ['cold', 'cool']: score += 2
-        if food.guna.lower() in ['light', 'cooling']: score += 2
-        if food.pitta_effect == '↓': score += 3  # Foods that reduce pitta
-    elif constitution == 'kapha':
-        if food.virya.lower() in ['hot', 'warm']: score += 2
-        if food.guna.lower() in ['light', 'dry']: score += 2
-        if food.kapha_effect == '↓': score += 3  # Foods that reduce kapha
-    
-    return score
-
-def get_fallback_foods(meal_name, target_calories):
-    """Provide fallback foods if database selection fails"""
-    fallback_foods = {
-        'Early Morning': [
-            {'name': 'Warm Water with Lemon', 'quantity': '1 glass', 'calories': 5, 'virya': 'Hot'},
-            {'name': 'Soaked Almonds', 'quantity': '5-6 pieces', 'calories': 35, 'virya': 'Hot'}
-        ],
-        'Breakfast': [
-            {'name': 'Oatmeal with Fruits', 'quantity': '1 bowl', 'calories': int(target_calories * 0.6), 'virya': 'Cold'},
-            {'name': 'Herbal Tea', 'quantity': '1 cup', 'calories': 5, 'virya': 'Hot'}
-        ],
-        'Mid-Morning Snack': [
-            {'name': 'Green Tea', 'quantity': '1 cup', 'calories': 2, 'virya': 'Hot'},
-            {'name': 'Mixed Nuts', 'quantity': '10-12 pieces', 'calories': int(target_calories * 0.8), 'virya': 'Hot'}
-        ],
-        'Lunch': [
-            {'name': 'Dal with Rice', 'quantity': '1 plate', 'calories': int(target_calories * 0.6), 'virya': 'Hot'},
-            {'name': 'Vegetable Curry', 'quantity': '1 serving', 'calories': int(target_calories * 0.3), 'virya': 'Hot'},
-            {'name': 'Chapati', 'quantity': '2 pieces', 'calories': int(target_calories * 0.1), 'virya': 'Hot'}
-        ],
-        'Evening Snack': [
-            {'name': 'Herbal Tea', 'quantity': '1 cup', 'calories': 5, 'virya': 'Hot'},
-            {'name': 'Roasted Chana', 'quantity': '1 small bowl', 'calories': int(target_calories * 0.8), 'virya': 'Hot'}
-        ],
-        'Dinner': [
-            {'name': 'Chapati with Sabzi', 'quantity': '2 pieces', 'calories': int(target_calories * 0.7), 'virya': 'Hot'},
-            {'name': 'Dal', 'quantity': '1 bowl', 'calories': int(target_calories * 0.3), 'virya': 'Hot'}
-        ],
-        'Bedtime': [
-            {'name': 'Warm Milk with Turmeric', 'quantity': '1 glass', 'calories': 50, 'virya': 'Hot'}
-        ]
-    }
-    
-    return fallback_foods.get(meal_name, [
-        {'name': 'Balanced Meal', 'quantity': '1 serving', 'calories': target_calories, 'virya': 'Hot'}
-    ])
-
-def get_constitution_guidelines(constitution):
-    """Get dietary guidelines based on constitution"""
-    guidelines = {
-        'vata': [
-            'Eat warm, cooked foods',
-            'Include sweet, sour, and salty tastes',
-            'Avoid cold, raw foods',
-            'Maintain regular meal times',
-            'Include healthy fats and oils'
-        ],
-        'pitta': [
-            'Eat cooling, calming foods',
-            'Include sweet, bitter, and astringent tastes',
-            'Avoid spicy, hot foods',
-            'Eat at regular intervals',
-            'Include fresh fruits and vegetables'
-        ],
-        'kapha': [
-            'Eat light, warm foods',
-            'Include pungent, bitter, and astringent tastes',
-            'Avoid heavy, oily foods',
-            'Eat smaller portions',
-            'Include plenty of vegetables and spices'
-        ]
-    }
-    return guidelines.get(constitution, [
-        'Eat balanced, nutritious meals',
-        'Maintain regular meal times',
-        'Include variety in your diet',
-        'Stay hydrated'
-    ])
-
-def get_seasonal_recommendations():
-    """Get seasonal dietary recommendations"""
-    return [
-        'Include seasonal fruits and vegetables',
-        'Adjust spices according to season',
-        'Stay hydrated with herbal teas',
-        'Modify cooking methods for seasonal needs'
-    ]
-
-def get_foods_to_avoid(constitution):
-    """Get foods to avoid based on constitution"""
-    avoid_foods = {
-        'vata': ['Cold foods', 'Raw vegetables', 'Excess bitter taste', 'Dry foods'],
-        'pitta': ['Spicy foods', 'Hot beverages', 'Sour foods', 'Fried foods'],
-        'kapha': ['Heavy foods', 'Oily foods', 'Sweet foods', 'Cold drinks']
-    }
-    return avoid_foods.get(constitution, ['Processed foods', 'Excess sugar', 'Artificial additives'])
-
 @csrf_exempt
 def analytics_api(request):
     """Analytics and statistics API"""
@@ -502,10 +249,10 @@ def analytics_api(request):
         recent_patients.append({
             'id': patient.id,
             'name': patient.name,
-            'created_at': patient.created_at.strftime('%Y-%m-%d')
+            'created_at': patient.created_at.date()
         })
     
-    return JsonResponse({
+    return json_response({
         'success': True,
         'data': {
             'total_patients': total_patients,
@@ -526,23 +273,23 @@ def diet_charts_api(request):
         charts_data = []
         for chart in charts:
             charts_data.append({
-                'id': str(chart.id),
+                'id': chart.id,
                 'patient_id': chart.patient.id,
                 'patientName': chart.patient.name,
                 'patient_name': chart.patient.name,
                 'goal': chart.goal,
                 'target_calories': chart.target_calories,
                 'duration': chart.duration,
-                'chart_data': chart.chart_data,
-                'createdDate': chart.created_at.strftime('%Y-%m-%d'),
-                'created_at': chart.created_at.strftime('%Y-%m-%d'),
+                'chart_data': hydrate_chart(chart.chart_data),
+                'createdDate': chart.created_at.date(),
+                'created_at': chart.created_at.date(),
                 'status': chart.status,
                 'chart': {
                     'duration': chart.duration
                 }
             })
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'data': charts_data,
             'total': len(charts_data)
@@ -564,35 +311,35 @@ def diet_charts_api(request):
                 patient=patient,
                 goal=data.get('goal', 'Maintenance'),
                 target_calories=data.get('target_calories', 2000),
-                duration=data.get('duration', 30),
-                chart_data=diet_chart_data
+                duration=parse_duration(data.get('duration')),
+                chart_data=compact_chart(diet_chart_data)
             )
             
             chart_data = {
-                'id': str(new_chart.id),
+                'id': new_chart.id,
                 'patient_id': patient_id,
                 'patientName': patient.name,
                 'patient_name': patient.name,
                 'goal': new_chart.goal,
                 'target_calories': new_chart.target_calories,
                 'duration': new_chart.duration,
-                'chart_data': new_chart.chart_data,
-                'createdDate': new_chart.created_at.strftime('%Y-%m-%d'),
-                'created_at': new_chart.created_at.strftime('%Y-%m-%d'),
+                'chart_data': diet_chart_data,
+                'createdDate': new_chart.created_at.date(),
+                'created_at': new_chart.created_at.date(),
                 'status': new_chart.status,
                 'chart': {
                     'duration': new_chart.duration
                 }
             }
             
-            return JsonResponse({
+            return json_response({
                 'success': True,
                 'message': 'Diet chart generated successfully',
                 'data': chart_data
             })
             
         except Exception as e:
-            return JsonResponse({
+            return json_response({
                 'success': False,
                 'error': str(e)
             }, status=400)
@@ -603,7 +350,7 @@ def diet_charts_api(request):
             chart_id = data.get('chart_id')
             
             if not chart_id:
-                return JsonResponse({
+                return json_response({
                     'success': False,
                     'error': 'Chart ID is required'
                 }, status=400)
@@ -613,18 +360,18 @@ def diet_charts_api(request):
             patient_name = chart.patient.name
             chart.delete()
             
-            return JsonResponse({
+            return json_response({
                 'success': True,
                 'message': f'Diet chart for {patient_name} deleted successfully'
             })
             
         except DietChart.DoesNotExist:
-            return JsonResponse({
+            return json_response({
                 'success': False,
                 'error': 'Diet chart not found'
             }, status=404)
         except Exception as e:
-            return JsonResponse({
+            return json_response({
                 'success': False,
                 'error': str(e)
             }, status=400)
@@ -653,9 +400,6 @@ urlpatterns += [
 def initialize_food_database():
     """Initialize comprehensive food database from Book1.csv"""
     
-    import csv
-    import os
-    
     # Read from Book1.csv
     csv_file = os.path.join(os.path.dirname(__file__), 'Book1.csv')
     
@@ -664,76 +408,7 @@ def initialize_food_database():
         return
     
     print("📖 Reading food data from Book1.csv...")
-    
-    # Parse CSV and create food items
-    with open(csv_file, 'r', encoding='utf-8') as file:
-        csv_reader = csv.reader(file)
-        next(csv_reader)  # Skip header row
-        
-        for row in csv_reader:
-            if len(row) < 3 or not row[0].strip():  # Skip empty rows
-                continue
-                
-            try:
-                # Extract data from CSV row
-                name = row[0].strip()
-                if not name or name.startswith(','):  # Skip empty names
-                    continue
-                    
-                # Map CSV columns to our food item structure
-                # CSV structure: Name, Category, Calories, Water, Protein, Fat, Carbs, Fiber, etc.
-                category_num = int(row[1]) if row[1] else 6
-                calories = int(float(row[2])) if row[2] else 100
-                water = float(row[3]) if row[3] else 80
-                protein = float(row[4]) if row[4] else 5
-                fat = float(row[5]) if row[5] else 2
-                carbs = float(row[6]) if row[6] else 15
-                fiber = float(row[7]) if row[7] else 2
-                
-                # Map category number to category name
-                category_map = {
-                    1: "Vegetables", 2: "Fruits", 3: "Grains", 4: "Proteins", 
-                    5: "Dairy", 6: "Spices", 7: "Nuts", 8: "Oils", 9: "Beverages", 10: "Other"
-                }
-                category = category_map.get(category_num, "Other")
-                
-                # Determine Ayurvedic properties based on food type
-                virya = "Cold" if category in ["Fruits", "Vegetables"] else "Hot"
-                digestion = "Easy" if category in ["Fruits", "Vegetables"] else "Hard"
-                rasa = "Sweet" if category in ["Fruits", "Dairy"] else "Pungent"
-                guna = "Light" if category in ["Fruits", "Vegetables"] else "Heavy"
-                
-                # Dosha effects (simplified)
-                vata_effect = "↓" if category in ["Dairy", "Grains"] else "↑"
-                pitta_effect = "↓" if category in ["Fruits", "Vegetables"] else "↑"
-                kapha_effect = "↑" if category in ["Dairy", "Grains"] else "↓"
-                
-                # Create food item if it doesn't exist
-                if not FoodItem.objects.filter(name=name).exists():
-                    FoodItem.objects.create(
-                        name=name,
-                        category=category,
-                        calories=calories,
-                        serving="100g",
-                        protein=protein,
-                        carbs=carbs,
-                        fat=fat,
-                        fiber=fiber,
-                        virya=virya,
-                        digestion=digestion,
-                        rasa=rasa,
-                        guna=guna,
-                        vata_effect=vata_effect,
-                        pitta_effect=pitta_effect,
-                        kapha_effect=kapha_effect,
-                        season=["All"],
-                        benefits=["Nutritional value", "Health benefits"],
-                        precautions=["Allergies"],
-                        description=f"{name} is a {category.lower()} with {virya.lower()} virya and {rasa.lower()} rasa."
-                    )
-                    
-            except (ValueError, IndexError) as e:
-                continue  # Skip malformed rows
+    import_foods_from_csv(csv_file)
     
     print(f"✅ Food database initialized with {FoodItem.objects.count()} items from Book1.csv!")
 
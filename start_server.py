@@ -13,7 +13,10 @@ if __name__ == "__main__":
     
     # Check if we're on Railway (production)
     if os.environ.get('RAILWAY_ENVIRONMENT') or os.environ.get('PORT'):
-        # Use gunicorn for production
+        # Use gunicorn for production; the workers memory-map one shared food catalog,
+        # built after migrating so the tables it reads exist
+        execute_from_command_line(['manage.py', 'migrate', '--noinput'])
+        execute_from_command_line(['manage.py', 'build_food_catalog'])
         try:
             import gunicorn.app.wsgiapp as wsgi
             port = os.environ.get('PORT', '8000')